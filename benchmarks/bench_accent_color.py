@@ -0,0 +1,134 @@
+"""
+Benchmark da extração de cor de destaque dos banners (src/services/portal/colors.py):
+implementação atual (NumPy, vetorizada) x a anterior (colorsys pixel a pixel + quantize
+do Pillow numa imagem de 1 linha), que fica copiada aqui só como referência.
+
+Uso (da raiz do repositório):
+    python benchmarks/bench_accent_color.py [imagem ...]
+
+Sem imagens, gera alguns banners sintéticos (fundo neutro + mancha de cor viva).
+Mostra o tempo médio por imagem de cada versão e a cor que cada uma escolheu.
+"""
+import colorsys
+import importlib.util
+import pathlib
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageOps
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# carrega colors.py direto do arquivo -- importar pelo pacote `src` sobe o app Flask
+# inteiro (banco, Supabase), que não tem nada a ver com o benchmark.
+_spec = importlib.util.spec_from_file_location("colors", ROOT / "src/services/portal/colors.py")
+colors = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(colors)
+
+
+# ===== implementação anterior (referência) =====
+
+def _legacy_hsv(rgb):
+    r, g, b = rgb
+    return colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
+
+
+def _legacy_quantize_dominant(pixels):
+    sample = Image.new("RGB", (len(pixels), 1))
+    sample.putdata(pixels)
+    palette_image = sample.convert("P", palette=Image.ADAPTIVE, colors=12)
+    palette = palette_image.getpalette()
+    _, idx = sorted(palette_image.getcolors(), reverse=True)[0]
+    return tuple(palette[idx * 3: idx * 3 + 3])
+
+
+def legacy_extract_accent_color(file_storage, thumbnail_size=150):
+    try:
+        image = Image.open(file_storage)
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.thumbnail((thumbnail_size, thumbnail_size))
+        rgb_image = image.convert("RGB")
+        pixels = list(rgb_image.getdata())
+
+        vivid_pixels = [
+            p for p in pixels
+            if (lambda hsv: hsv[1] >= 0.35 and 0.15 <= hsv[2] <= 0.97)(_legacy_hsv(p))
+        ]
+
+        if len(vivid_pixels) >= max(50, len(pixels) * 0.01):
+            best_color = _legacy_quantize_dominant(vivid_pixels)
+        else:
+            palette_image = rgb_image.convert("P", palette=Image.ADAPTIVE, colors=12)
+            palette = palette_image.getpalette()
+            color_counts = sorted(palette_image.getcolors(), reverse=True)
+            best_color = None
+            for _, idx in color_counts:
+                candidate = tuple(palette[idx * 3: idx * 3 + 3])
+                if 0.15 <= _legacy_hsv(candidate)[2] <= 0.97:
+                    best_color = candidate
+                    break
+            if best_color is None:
+                _, idx = color_counts[0]
+                best_color = tuple(palette[idx * 3: idx * 3 + 3])
+
+        return "#{:02x}{:02x}{:02x}".format(*best_color)
+    except Exception:
+        return "#f29422"
+    finally:
+        file_storage.seek(0)
+
+
+# ===== imagens de teste =====
+
+def _synthetic_banners():
+    rng = np.random.default_rng(42)
+    for name, accent in (("vermelho", (200, 30, 40)), ("azul", (20, 80, 210)), ("verde", (40, 170, 60))):
+        pixels = rng.normal(128, 12, size=(1080, 1920, 3))  # fundo cinza com ruído
+        pixels[300:700, 1200:1700] = rng.normal(accent, 10, size=(400, 500, 3))
+        yield name, Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    yield "preto-e-branco", Image.fromarray(rng.integers(0, 255, size=(1080, 1920), dtype=np.uint8), "L")
+
+
+def _load_inputs(paths):
+    if not paths:
+        paths_and_images = list(_synthetic_banners())
+    else:
+        paths_and_images = [(p, Image.open(p)) for p in paths]
+
+    for name, image in paths_and_images:
+        buffer = BytesIO()
+        image.convert("RGB").save(buffer, format="JPEG", quality=90)
+        yield name, buffer.getvalue()
+
+
+def _time_it(fn, data, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(BytesIO(data))
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main(argv):
+    repeat = 5
+    print(f"{'imagem':<18} {'anterior 150px':>16} {'numpy 150px':>14} {'numpy 256px':>14}  cores (anterior / numpy / top-3)")
+    for name, data in _load_inputs(argv):
+        legacy_ms, legacy_color = _time_it(legacy_extract_accent_color, data, repeat)
+
+        colors._THUMBNAIL_SIZE = 150
+        numpy_150_ms, _ = _time_it(colors.extract_accent_color, data, repeat)
+        colors._THUMBNAIL_SIZE = 256
+        numpy_256_ms, numpy_color = _time_it(colors.extract_accent_color, data, repeat)
+        top3 = colors.extract_accent_palette(BytesIO(data), k=3)
+
+        print(
+            f"{name:<18} {legacy_ms:>13.1f} ms {numpy_150_ms:>11.1f} ms {numpy_256_ms:>11.1f} ms"
+            f"  {legacy_color} / {numpy_color} / {', '.join(top3)}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
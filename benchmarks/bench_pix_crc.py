@@ -0,0 +1,82 @@
+"""
+Benchmark do CRC16 e da montagem de payloads Pix (src/controllers/pix_emv.py):
+CRC por tabela (atual) x o laço bit a bit anterior, que fica copiado aqui só como
+referência, e build_pix_payloads_bulk x build_pix_payload um por um.
+
+Só mede tempo -- a conferência dos resultados (CRC dos payloads estáticos, payloads
+conhecidos, tabela x bit a bit, lote x um por um) fica em tests/test_pix_emv.py.
+
+Uso (da raiz do repositório):
+    python benchmarks/bench_pix_crc.py [quantidade de payloads]
+"""
+import importlib.util
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# carrega pix_emv.py direto do arquivo -- importar pelo pacote `src` sobe o app Flask
+# inteiro (banco, Supabase), que não tem nada a ver com o benchmark.
+_spec = importlib.util.spec_from_file_location("pix_emv", ROOT / "src/controllers/pix_emv.py")
+pix_emv = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(pix_emv)
+
+PIX_KEY = "17739576000178"
+MERCHANT_NAME = "CONVENCAO AMAZONICA"
+MERCHANT_CITY = "MANAUS"
+
+
+# ===== implementação anterior (referência) =====
+
+def legacy_crc16_ccitt(payload: str) -> str:
+    crc = 0xFFFF
+    for char in payload:
+        crc ^= ord(char) << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = (crc << 1) ^ 0x1021
+            else:
+                crc = crc << 1
+            crc &= 0xFFFF
+    return f"{crc:04X}"
+
+
+# ===== medição =====
+
+def _time_it(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 10_000
+    items = [
+        (f"{[200.09, 100.09, 50.09][i % 3]:.2f}", f"R{i}N{[1, 2, 4][i % 3]}")
+        for i in range(count)
+    ]
+    bodies = [
+        pix_emv.build_pix_payload(PIX_KEY, MERCHANT_NAME, MERCHANT_CITY, amount, txid)[:-4]
+        for amount, txid in items
+    ]
+
+    legacy_ms, _ = _time_it(lambda: [legacy_crc16_ccitt(body) for body in bodies])
+    table_ms, _ = _time_it(lambda: [pix_emv._crc16_ccitt(body) for body in bodies])
+    single_ms, _ = _time_it(lambda: [
+        pix_emv.build_pix_payload(PIX_KEY, MERCHANT_NAME, MERCHANT_CITY, amount, txid) for amount, txid in items
+    ])
+    bulk_ms, _ = _time_it(lambda: pix_emv.build_pix_payloads_bulk(items, PIX_KEY, MERCHANT_NAME, MERCHANT_CITY))
+
+    print(f"{count} payloads")
+    print(f"  CRC bit a bit (anterior)   {legacy_ms:>9.1f} ms")
+    print(f"  CRC por tabela             {table_ms:>9.1f} ms  ({legacy_ms / table_ms:.1f}x)")
+    print(f"  build_pix_payload um a um  {single_ms:>9.1f} ms")
+    print(f"  build_pix_payloads_bulk    {bulk_ms:>9.1f} ms  ({single_ms / bulk_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
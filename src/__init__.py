@@ -10,7 +10,7 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 from PIL import UnidentifiedImageError
 from PIL.Image import DecompressionBombError
 from supabase import create_client
-from src.controllers.b2_utils import get_b2_file_url
+from src.controllers.b2_utils import get_b2_file_url, get_b2_image_srcset, proof_thumbnail_key
 from src.constants import (
     PIX_PADRAO_MSG,
     CRIANCAS_MSG,
@@ -30,6 +30,8 @@ app = Flask(__name__)
 # sairia como http:// mesmo com o site servido em https:// -- confia em 1 hop de proxy.
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 app.jinja_env.globals['get_b2_file_url'] = get_b2_file_url
+app.jinja_env.globals['get_b2_image_srcset'] = get_b2_image_srcset
+app.jinja_env.globals['proof_thumbnail_key'] = proof_thumbnail_key
 
 
 def get_social_icon(platform):
@@ -135,57 +137,11 @@ def fmt_manaus(dt):
     return dt.astimezone(tz_manaus).strftime("%d/%m/%Y %H:%M")
 
 
-def _active_nav_links():
-    # import local: cms_nav_links só existe depois de `flask create_cms_tables`.
-    # se a tabela ainda não existir, degrada pra lista vazia em vez de derrubar o site inteiro.
-    from src.models import NavLink
-    try:
-        return (
-            NavLink.query
-            .filter_by(parent_id=None, is_active=True)
-            .order_by(NavLink.order)
-            .all()
-        )
-    except Exception:
-        database.session.rollback()
-        return []
-
-
-def _active_social_links():
-    from src.models import SocialLink
-    try:
-        return (
-            SocialLink.query
-            .filter_by(is_active=True)
-            .order_by(SocialLink.order)
-            .all()
-        )
-    except Exception:
-        database.session.rollback()
-        return []
-
-
-def _portal_footer_settings():
-    from src.services.settings import get_footer_settings
-    try:
-        return get_footer_settings()
-    except Exception:
-        database.session.rollback()
-        return {"endereco": "", "telefone": ""}
-
-
-def _active_ministries_for_nav():
-    from src.models import Ministry
-    try:
-        return (
-            Ministry.query
-            .filter_by(is_active=True)
-            .order_by(Ministry.name)
-            .all()
-        )
-    except Exception:
-        database.session.rollback()
-        return []
+def _site_chrome() -> dict:
+    # import local: o snapshot consulta src.models, que só existe depois que este
+    # módulo termina de carregar (mesmo motivo do get_social_icon lá em cima)
+    from src.services.portal.chrome import get_site_chrome
+    return get_site_chrome()
 
 
 @app.context_processor
@@ -202,11 +158,9 @@ def inject_globals():
         "lot1_limit": LOT1_LIMIT,
         "pix_suffix": str(PIX_SUFFIX).replace(".", ","),
 
-        # portal / CMS
-        "nav_links": _active_nav_links(),
-        "social_links": _active_social_links(),
-        "footer_settings": _portal_footer_settings(),
-        "nav_ministries": _active_ministries_for_nav(),
+        # portal / CMS -- nav_links, social_links, footer_settings e nav_ministries,
+        # vindos do cache do processo (ver src/services/portal/chrome.py)
+        **_site_chrome(),
     }
 
 
@@ -256,6 +210,9 @@ def handle_image_decompression_bomb(e):
 
 from src import routes
 from src.routes_coracao import bp_coracao
+from src.services.perf import init_perf_instrumentation
+
+init_perf_instrumentation()
 
 app.register_blueprint(bp_coracao)
 app.supabase = supabase
@@ -1,19 +1,93 @@
 from b2sdk.v2 import InMemoryAccountInfo, B2Api
-from b2sdk.v2.exception import FileNotPresent
+from b2sdk.v2.exception import (
+    B2ConnectionError,
+    B2RequestTimeout,
+    FileNotPresent,
+    InvalidAuthToken,
+    ServiceError,
+    TooManyRequests,
+    Unauthorized,
+)
 import os
+import re
+import threading
+import time
 
 # Pegue os valores do seu ambiente, ou substitua aqui pelos seus valores
 B2_KEY_ID = os.environ.get("B2_KEY_ID")
 B2_APPLICATION_KEY = os.environ.get("B2_APPLICATION_KEY")
 B2_BUCKET_NAME = os.environ.get("B2_BUCKET_NAME")
+# "production" em produção; aceita também a URL de um B2 falso local pra teste
+# (ex: B2_REALM=http://localhost:8180) -- o b2sdk trata qualquer coisa que não seja
+# nome de realm conhecido como a URL base da API.
+B2_REALM = os.environ.get("B2_REALM") or "production"
+
+_MAX_ATTEMPTS = 3
+_RETRY_BASE_DELAY = 0.5  # segundos -- dobra a cada tentativa
+_TRANSIENT_ERRORS = (ServiceError, TooManyRequests, B2ConnectionError, B2RequestTimeout)
+
+# Larguras das variantes responsivas (srcset) geradas no upload de imagem -- ver
+# save_image_upload. A key principal carrega a largura dela no nome
+# ("<uuid>_rs1600.jpg") e cada variante fica ao lado dela com um sufixo previsível
+# ("<uuid>_rs1600_w640.webp"), então dá pra montar o srcset só a partir da key, sem
+# guardar nada no banco. Key sem o marcador (imagens antigas) não tem variante.
+RESPONSIVE_WIDTHS = (320, 640, 960, 1280, 1600, 1920)
+RESPONSIVE_FORMATS = ("webp", "jpg")
+_RESPONSIVE_KEY = re.compile(r"_rs(\d+)\.jpg$")
+
+_bucket_lock = threading.Lock()
+_bucket = None
 
 
 def get_b2():
-    info = InMemoryAccountInfo()
-    b2_api = B2Api(info)
-    b2_api.authorize_account("production", B2_KEY_ID, B2_APPLICATION_KEY)
-    bucket = b2_api.get_bucket_by_name(B2_BUCKET_NAME)
-    return bucket
+    """
+    Bucket autorizado, compartilhado pelo processo inteiro (um por worker do gunicorn).
+
+    Autorizar + buscar o bucket custa duas idas à API do B2 -- antes isso rodava a cada
+    upload/delete, então um artigo com capa e várias imagens no corpo pagava a
+    autorização uma vez por imagem. O B2Api guarda o token e o pool de upload URLs no
+    InMemoryAccountInfo (thread-safe), renova o token sozinho quando expira e pega outra
+    upload URL quando uma falha -- então basta montar uma vez e reaproveitar.
+    """
+    global _bucket
+    bucket = _bucket
+    if bucket is not None:
+        return bucket
+
+    with _bucket_lock:
+        if _bucket is None:
+            info = InMemoryAccountInfo()
+            b2_api = B2Api(info)
+            b2_api.authorize_account(B2_REALM, B2_KEY_ID, B2_APPLICATION_KEY)
+            _bucket = b2_api.get_bucket_by_name(B2_BUCKET_NAME)
+        return _bucket
+
+
+def reset_b2() -> None:
+    """Descarta o bucket em cache -- o próximo get_b2() autoriza do zero."""
+    global _bucket
+    with _bucket_lock:
+        _bucket = None
+
+
+def _call_with_retry(operation):
+    """
+    Roda `operation(bucket)` tentando de novo em falha passageira (503, 429, rede) com
+    espera crescente. 401 (token inválido/revogado, que o b2sdk não resolve renovando)
+    derruba o bucket em cache e autoriza de novo antes da próxima tentativa.
+    Esgotadas as tentativas, o erro sobe pra quem chamou, como antes.
+    """
+    for attempt in range(1, _MAX_ATTEMPTS + 1):
+        try:
+            return operation(get_b2())
+        except (InvalidAuthToken, Unauthorized):
+            if attempt == _MAX_ATTEMPTS:
+                raise
+            reset_b2()
+        except _TRANSIENT_ERRORS:
+            if attempt == _MAX_ATTEMPTS:
+                raise
+            time.sleep(_RETRY_BASE_DELAY * 2 ** (attempt - 1))
 
 
 def upload_to_b2(filename, fileobj, folder=""):
@@ -27,10 +101,33 @@ def upload_to_b2(filename, fileobj, folder=""):
     de servir conteúdo desatualizado. Sem isso, o navegador rebaixa a mesma imagem do zero
     a cada visita, porque o B2 não manda Cache-Control nenhum por padrão.
     """
-    bucket = get_b2()
     full_path = f"{folder}/{filename}" if folder else filename
     fileobj.seek(0)
-    bucket.upload_bytes(fileobj.read(), full_path, cache_control="public, max-age=31536000, immutable")
+    data = fileobj.read()
+    _call_with_retry(
+        lambda bucket: bucket.upload_bytes(data, full_path, cache_control="public, max-age=31536000, immutable")
+    )
+    return full_path
+
+
+def upload_stream_to_b2(filename, fileobj, folder="", content_type=None):
+    """
+    Como upload_to_b2, mas sem ler o arquivo inteiro pra um bytes antes: o b2sdk lê do
+    `fileobj` em pedaços (arquivo grande vira upload em partes), então a memória fica
+    no tamanho de uma parte, não do arquivo. `fileobj` precisa ser "seekable" (o
+    FileStorage do Flask é) -- cada nova tentativa começa do início.
+    """
+    full_path = f"{folder}/{filename}" if folder else filename
+
+    def _upload(bucket):
+        fileobj.seek(0)
+        bucket.upload_unbound_stream(
+            fileobj, full_path,
+            content_type=content_type,
+            cache_control="public, max-age=31536000, immutable",
+        )
+
+    _call_with_retry(_upload)
     return full_path
 
 
@@ -41,14 +138,57 @@ def delete_from_b2(filename):
     como sucesso -- o estado final desejado (fora do bucket) já está valendo.
     Qualquer outro erro (rede, autenticação) sobe pra quem chamou decidir o que fazer.
     """
-    bucket = get_b2()
-    try:
-        file_version = bucket.get_file_info_by_name(filename)
-    except FileNotPresent:
-        return
-    file_version.delete()
+    def _delete(bucket):
+        try:
+            file_version = bucket.get_file_info_by_name(filename)
+        except FileNotPresent:
+            return
+        file_version.delete()
+
+    _call_with_retry(_delete)
 
 
 def get_b2_file_url(filename):
     # Padrão público: https://f000.backblazeb2.com/file/[bucket]/[filename]
     return f"https://f005.backblazeb2.com/file/{B2_BUCKET_NAME}/{filename}"
+
+
+def responsive_key_name(base_name: str, width: int) -> str:
+    """Nome da key principal de uma imagem que ganha variantes responsivas -- `width` é
+    a largura real dela já reduzida (ver image_display_width), a maior do srcset."""
+    return f"{base_name}_rs{width}.jpg"
+
+
+def responsive_widths(key) -> tuple:
+    """Larguras com variante pra essa key -- vazio se ela não foi enviada com variantes."""
+    match = _RESPONSIVE_KEY.search(key or "")
+    if not match:
+        return ()
+    max_width = int(match.group(1))
+    return tuple(w for w in RESPONSIVE_WIDTHS if w < max_width) + (max_width,)
+
+
+def derived_image_key(key: str, width: int, fmt: str) -> str:
+    # o JPEG na largura máxima é a própria key principal -- não existe cópia dele
+    if fmt == "jpg" and responsive_widths(key)[-1:] == (width,):
+        return key
+    return f"{key[:-len('.jpg')]}_w{width}.{fmt}"
+
+
+def proof_thumbnail_key(key) -> str | None:
+    """Key da miniatura de um comprovante de Pix -- ao lado da key principal, com
+    "_thumb" no nome (ver services/proofs.py). None pra PDF, que não tem miniatura."""
+    if not key or not key.endswith(".jpg"):
+        return None
+    return f"{key[:-len('.jpg')]}_thumb.jpg"
+
+
+def get_b2_image_srcset(filename, fmt: str = "jpg") -> str:
+    """
+    Valor pronto pro atributo srcset ("url 320w, url 640w, ..."), no formato pedido
+    ("jpg" ou "webp"). String vazia pra imagem sem variantes -- o template cai no src.
+    """
+    return ", ".join(
+        f"{get_b2_file_url(derived_image_key(filename, width, fmt))} {width}w"
+        for width in responsive_widths(filename)
+    )
@@ -8,17 +8,34 @@ def _tlv(tag: str, value: str) -> str:
     return f"{tag}{ln}{value}"
 
 
-def _crc16_ccitt(payload: str) -> str:
-    crc = 0xFFFF
-    for char in payload:
-        crc ^= ord(char) << 8
+def _build_crc16_table() -> tuple:
+    # CRC16-CCITT (polinômio 0x1021), o que o BACEN pede no campo 63: o resultado dos 8
+    # deslocamentos de cada byte possível, calculado uma vez só
+    table = []
+    for byte in range(256):
+        crc = byte << 8
         for _ in range(8):
-            if crc & 0x8000:
-                crc = (crc << 1) ^ 0x1021
-            else:
-                crc = crc << 1
-            crc &= 0xFFFF
-    return f"{crc:04X}"
+            crc = (crc << 1) ^ 0x1021 if crc & 0x8000 else crc << 1
+        table.append(crc & 0xFFFF)
+    return tuple(table)
+
+
+_CRC16_TABLE = _build_crc16_table()
+
+
+def _crc16_update(crc: int, data: bytes) -> int:
+    """Continua um CRC já começado -- o lote calcula o prefixo comum uma vez só."""
+    table = _CRC16_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ byte]
+    return crc
+
+
+def _crc16_ccitt(payload) -> str:
+    # uma consulta à tabela por byte, em vez de 8 voltas de bit por caractere; conta
+    # sobre os bytes UTF-8, igual ao comprimento dos campos em _tlv
+    data = payload.encode("utf-8") if isinstance(payload, str) else payload
+    return f"{_crc16_update(0xFFFF, data):04X}"
 
 
 def _format_amount(amount) -> str | None:
@@ -32,30 +49,29 @@ def _format_amount(amount) -> str | None:
         return None
 
 
-def build_pix_payload(
-    pix_key: str,
-    merchant_name: str = "CONVENCAO_AMAZONICA",
-    merchant_city: str = "MANAUS",
-    amount=None,
-    txid: str = "***",
-) -> str:
-    # Limpa a chave (apenas números se for CPF/CNPJ)
-    key = re.sub(r"\D", "", pix_key).strip()
+def _clean_key(pix_key: str) -> str:
+    # CPF/CNPJ vai só com os dígitos ("17.739.576/0001-78" -> "17739576000178");
+    # e-mail, telefone (+55...) e chave aleatória vão como estão
+    key = pix_key.strip()
+    digits = re.sub(r"\D", "", key)
+    if re.fullmatch(r"[\d.\-/ ]+", key) and len(digits) in (11, 14):
+        return digits
+    return key
 
+
+def _fixed_fields(pix_key: str, merchant_name: str, merchant_city: str) -> tuple[str, str]:
+    """(campos antes do valor, campos entre o valor e o txid) -- iguais em todo payload
+    do mesmo recebedor."""
     # Payload Format Indicator e Merchant Account Information
     pfi = "000201"
     # O campo 26 (MAI) precisa ser montado com precisão
     gui = _tlv("00", "br.gov.bcb.pix")
-    chave = _tlv("01", key)
+    chave = _tlv("01", _clean_key(pix_key))
     mai = _tlv("26", gui + chave)
 
     mcc = _tlv("52", "0000")
     moeda = _tlv("53", "986")
 
-    # Valor: Nubank exige ponto decimal e duas casas
-    amt = _format_amount(amount)
-    valor = _tlv("54", amt) if amt else ""
-
     pais = _tlv("58", "BR")
 
     # Nome e Cidade: Sem caracteres especiais e em maiúsculas
@@ -63,6 +79,15 @@ def build_pix_payload(
     nome = _tlv("59", merchant_name[:25].upper())
     cidade = _tlv("60", merchant_city[:15].upper())
 
+    return pfi + mai + mcc + moeda, pais + nome + cidade
+
+
+def _variable_fields(amount, txid: str) -> tuple[str, str]:
+    """(campo do valor, campo adicional com o txid) -- o que muda de um payload pro outro."""
+    # Valor: Nubank exige ponto decimal e duas casas
+    amt = _format_amount(amount)
+    valor = _tlv("54", amt) if amt else ""
+
     # Campo 62: O TXID não pode ser vazio. Se não tiver, use obrigatoriamente ***
     safe_txid = re.sub(r"[^A-Za-z0-9]", "", txid) if txid != "***" else "***"
     if not safe_txid:
@@ -70,14 +95,47 @@ def build_pix_payload(
 
     # Montagem do campo adicional
     campo_62 = _tlv("05", safe_txid)
-    add = _tlv("62", campo_62)
+    return valor, _tlv("62", campo_62)
 
-    # Concatenação na ordem correta do manual do BACEN
-    payload = pfi + mai + mcc + moeda + valor + pais + nome + cidade + add
 
+def build_pix_payload(
+    pix_key: str,
+    merchant_name: str = "CONVENCAO_AMAZONICA",
+    merchant_city: str = "MANAUS",
+    amount=None,
+    txid: str = "***",
+) -> str:
+    head, middle = _fixed_fields(pix_key, merchant_name, merchant_city)
+    valor, add = _variable_fields(amount, txid)
+
+    # Concatenação na ordem correta do manual do BACEN
     # O 6304 indica que o próximo dado é o CRC de 4 dígitos
-    payload_com_final_crc = payload + "6304"
+    payload_com_final_crc = head + valor + middle + add + "6304"
 
     crc_gerado = _crc16_ccitt(payload_com_final_crc)
 
     return payload_com_final_crc + crc_gerado
+
+
+def build_pix_payloads_bulk(
+    items,
+    pix_key: str,
+    merchant_name: str = "CONVENCAO_AMAZONICA",
+    merchant_city: str = "MANAUS",
+) -> list[str]:
+    """
+    Vários payloads do mesmo recebedor de uma vez -- `items` é uma sequência de
+    (amount, txid), a resposta vem na mesma ordem. Mesmo resultado de chamar
+    build_pix_payload pra cada um, mas os campos fixos (chave, nome, cidade) são
+    montados uma vez só e o CRC deles também: cada payload só calcula o CRC do pedaço
+    que muda.
+    """
+    head, middle = _fixed_fields(pix_key, merchant_name, merchant_city)
+    head_crc = _crc16_update(0xFFFF, head.encode("utf-8"))
+
+    payloads = []
+    for amount, txid in items:
+        valor, add = _variable_fields(amount, txid)
+        rest = valor + middle + add + "6304"
+        payloads.append(f"{head}{rest}{_crc16_update(head_crc, rest.encode('utf-8')):04X}")
+    return payloads
@@ -2,7 +2,10 @@ from src import database, bcrypt, login_manager
 from flask_login import UserMixin
 from datetime import datetime
 import pytz
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint
+from sqlalchemy.orm import validates
+from src.controllers.validators import only_digits
+from src.utils.texto import normalizar_nome
 
 fuso_am = pytz.timezone("America/Manaus")
 
@@ -49,11 +52,16 @@ class User(database.Model, UserMixin):
     password_reset_at = database.Column(database.DateTime, nullable=True)
 
     is_active = database.Column(database.Boolean, default=True)
-    created_at = database.Column(database.DateTime, default=datetime.utcnow)
+    created_at = database.Column(database.DateTime, nullable=False, default=datetime.utcnow)
 
     roles = database.relationship(
         "Role", secondary=user_roles, backref="users")
 
+    # ordem do /admin/usuarios (paginação por cursor, ver services/pagination.py)
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
+
     # 1 usuário -> 1 inscrição (você pode mudar pra 1:N depois)
     registration = database.relationship(
         "Registration",
@@ -155,12 +163,22 @@ class Registration(database.Model):
     reviewed_at = database.Column(database.DateTime, nullable=True)
     review_note = database.Column(database.Text, nullable=True)
 
-    created_at = database.Column(database.DateTime, default=datetime.utcnow)
+    created_at = database.Column(database.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = database.Column(
         database.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # colunas "sombra" só pra busca do admin -- preenchidas sozinhas pelo @validates
+    # abaixo sempre que nome/local/CPF/telefone mudam. Nome e local sem acento e em
+    # minúsculo ("joao" acha "João"), CPF e telefone só com dígitos (acha formatado ou
+    # não). Índices: `flask create_registration_search` (ver services/registration_search.py).
+    search_text = database.Column(database.String(280), nullable=True)
+    cpf_digits = database.Column(database.String(14), nullable=True)
+    phone_digits = database.Column(database.String(20), nullable=True)
+
     __table_args__ = (
         UniqueConstraint("cpf", name="uq_registrations_cpf"),
+        # ordem da lista de inscrições do admin (paginação por cursor)
+        Index("ix_registrations_created_at_id", "created_at", "id"),
     )
 
     user = database.relationship(
@@ -174,10 +192,42 @@ class Registration(database.Model):
         foreign_keys=[reviewed_by_user_id]
     )
 
+    @validates("full_name", "iap_local")
+    def _sync_search_text(self, key, value):
+        full_name = value if key == "full_name" else self.full_name
+        iap_local = value if key == "iap_local" else self.iap_local
+        self.search_text = normalizar_nome(f"{full_name or ''} {iap_local or ''}")
+        return value
+
+    @validates("cpf")
+    def _sync_cpf_digits(self, key, value):
+        self.cpf_digits = only_digits(value)
+        return value
+
+    @validates("phone")
+    def _sync_phone_digits(self, key, value):
+        self.phone_digits = only_digits(value)
+        return value
+
     def __repr__(self):
         return f"<Registration {self.full_name} ({self.status})>"
 
 
+class RegistrationCounter(database.Model):
+    """
+    Contadores do dashboard do admin (total, por status, comprovantes pendentes),
+    mantidos na mesma transação de quem cria/revisa inscrição -- ver get_kpis em
+    services/registration.py. Vazia = desligada (o dashboard conta direto na tabela).
+    """
+    __tablename__ = "registration_counters"
+
+    key = database.Column(database.String(40), primary_key=True)
+    value = database.Column(database.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<RegistrationCounter {self.key}={self.value}>"
+
+
 class AuditLog(database.Model):
     __tablename__ = "audit_logs"
     id = database.Column(database.Integer, primary_key=True)
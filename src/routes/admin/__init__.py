@@ -1,3 +1,3 @@
-from src.routes.admin import dashboard, permissions, registrations, reports, settings
+from src.routes.admin import dashboard, perf, permissions, reconciliation, registrations, reports, settings
 
-__all__ = ["dashboard", "permissions", "registrations", "reports", "settings"]
+__all__ = ["dashboard", "perf", "permissions", "reconciliation", "registrations", "reports", "settings"]
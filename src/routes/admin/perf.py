@@ -0,0 +1,16 @@
+from flask import render_template
+
+from src import app
+from src.decorators import super_required
+from src.services.perf import PERF_SLOW_REQUEST_MS, endpoint_stats, uptime_seconds
+
+
+@app.route("/admin/perf")
+@super_required
+def admin_perf():
+    return render_template(
+        "admin/perf.html",
+        rows=endpoint_stats(),
+        uptime_minutes=int(uptime_seconds() // 60),
+        slow_request_ms=PERF_SLOW_REQUEST_MS,
+    )
@@ -10,6 +10,8 @@ from src import app, database
 from src.decorators import super_required
 from src.models import Registration, Role, User
 from src.services.audit import log_audit
+from src.services.pagination import keyset_paginate
+from src.services.registration_search import registration_search_filter
 from src.services.security import generate_temp_password
 
 
@@ -131,29 +133,29 @@ def admin_reset_password(user_id):
 @super_required
 def admin_usuarios():
     busca = (request.args.get("q") or "").strip()
-    page = request.args.get("page", 1, type=int)
+    after = request.args.get("after", "")
+    before = request.args.get("before", "")
     per_page = 20
 
     query = User.query
 
     if busca:
-        termo = f"%{busca}%"
-        # o relacionamento entre User e Registration é 1:1 no sistema
+        # o relacionamento entre User e Registration é 1:1 no sistema; nome/CPF/telefone
+        # usam a mesma busca normalizada da lista de inscrições
+        conditions = [User.email.ilike(f"%{busca}%")]
+        registration_condition = registration_search_filter(busca)
+        if registration_condition is not None:
+            conditions.append(registration_condition)
         query = (
             query
             .outerjoin(Registration, Registration.user_id == User.id)
-            .filter(or_(
-                User.email.ilike(termo),
-                Registration.full_name.ilike(termo),
-                Registration.cpf.ilike(termo),
-                Registration.phone.ilike(termo),
-            ))
+            .filter(or_(*conditions))
         )
 
-    pagination = (
-        query
-        .order_by(User.created_at.desc())
-        .paginate(page=page, per_page=per_page, error_out=False)
+    pagination = keyset_paginate(
+        query, User,
+        after=after, before=before, per_page=per_page,
+        count_key=f"usuarios|{busca}",
     )
 
     return render_template(
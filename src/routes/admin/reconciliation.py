@@ -0,0 +1,59 @@
+from flask import abort, flash, redirect, render_template, request, url_for
+from flask_login import current_user
+from flask_wtf.csrf import ValidationError as CSRFValidationError
+from flask_wtf.csrf import generate_csrf, validate_csrf
+
+from src import app, database
+from src.decorators import can_review, payment_reviewer_required
+from src.services.audit import log_audit
+from src.services.reconciliation import StatementError, parse_statement, reconcile_statement
+
+
+@app.route("/admin/conciliacao", methods=["GET", "POST"])
+@payment_reviewer_required
+def admin_conciliacao():
+    """
+    Sobe o extrato (OFX/CSV) e mostra o que casou com inscrição Pix pendente. A
+    confirmação em si vai pela revisão em lote (admin_inscricoes_revisao_lote).
+    """
+    if not can_review():
+        abort(403)
+
+    result = None
+    filename = ""
+
+    if request.method == "POST":
+        try:
+            validate_csrf(request.form.get("csrf_token"))
+        except CSRFValidationError:
+            flash("Sessão expirada, recarregue a página e tente de novo.", "danger")
+            return redirect(url_for("admin_conciliacao"))
+
+        statement = request.files.get("statement")
+        if not statement or not statement.filename:
+            flash("Escolha o arquivo do extrato (OFX ou CSV).", "warning")
+            return redirect(url_for("admin_conciliacao"))
+
+        filename = statement.filename
+        try:
+            result = reconcile_statement(parse_statement(statement.read(), filename))
+        except StatementError as error:
+            flash(str(error), "danger")
+            return redirect(url_for("admin_conciliacao"))
+
+        log_audit(
+            actor_user_id=current_user.id,
+            action="reconcile_statement",
+            details=(
+                f"file={filename[:80]} matched={len(result['matched'])} "
+                f"ambiguous={len(result['ambiguous'])} unmatched={len(result['unmatched'])}"
+            ),
+        )
+        database.session.commit()
+
+    return render_template(
+        "admin/conciliacao.html",
+        result=result,
+        filename=filename,
+        csrf_token=generate_csrf(),
+    )
@@ -1,11 +1,17 @@
-from flask import abort, flash, redirect, render_template, request, url_for
+from flask import abort, flash, jsonify, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
+from flask_wtf.csrf import ValidationError as CSRFValidationError
+from flask_wtf.csrf import generate_csrf, validate_csrf
 
 from src import app
 from src.decorators import can_admin, can_review, payment_reviewer_required
 from src.forms import ReviewRegistrationForm
 from src.models import Registration
-from src.services.registration import review_registration, search_registrations
+from src.services.registration import (
+    bulk_review_registrations,
+    review_registration,
+    search_registrations,
+)
 
 
 @app.route("/admin/inscricoes")
@@ -17,11 +23,14 @@ def admin_inscricoes():
     status = request.args.get("status", "").strip()
     q = request.args.get("q", "").strip()
 
-    page = request.args.get("page", 1, type=int)
+    after = request.args.get("after", "")
+    before = request.args.get("before", "")
     per_page = request.args.get("per_page", 25, type=int)
     per_page = max(10, min(per_page, 100))  # trava entre 10 e 100
 
-    pagination = search_registrations(status=status, query_text=q, page=page, per_page=per_page)
+    pagination = search_registrations(
+        status=status, query_text=q, per_page=per_page, after=after, before=before,
+    )
 
     return render_template(
         "admin/inscricoes.html",
@@ -30,9 +39,65 @@ def admin_inscricoes():
         status=status,
         q=q,
         per_page=per_page,
+        csrf_token=generate_csrf(),
     )
 
 
+@app.route("/admin/inscricoes/revisao-em-lote", methods=["POST"])
+@login_required
+def admin_inscricoes_revisao_lote():
+    """
+    Mesma decisão pra várias inscrições marcadas na lista (campo `ids` repetido).
+    Pedido com Accept: application/json recebe {id: resultado}; o formulário da lista
+    volta pra ela com o resumo.
+    """
+    if not can_review():
+        abort(403)
+
+    wants_json = request.accept_mimetypes.best == "application/json"
+    back = redirect(url_for(
+        "admin_inscricoes",
+        status=request.form.get("status", ""),
+        q=request.form.get("q", ""),
+    ))
+
+    try:
+        validate_csrf(request.form.get("csrf_token"))
+    except CSRFValidationError:
+        if wants_json:
+            return jsonify({"error": "Sessão expirada, recarregue a página e tente de novo."}), 400
+        flash("Sessão expirada, recarregue a página e tente de novo.", "danger")
+        return back
+
+    try:
+        results = bulk_review_registrations(
+            request.form.getlist("ids", type=int),
+            decision=request.form.get("decision", ""),
+            note=(request.form.get("note") or "").strip()[:2000],
+            reviewer_id=current_user.id,
+        )
+    except ValueError as error:
+        if wants_json:
+            return jsonify({"error": str(error)}), 400
+        flash(str(error), "danger")
+        return back
+
+    if wants_json:
+        return jsonify({"results": {str(reg_id): result for reg_id, result in results.items()}})
+
+    updated = sum(1 for result in results.values() if result == "updated")
+    if not results:
+        flash("Nenhuma inscrição selecionada.", "warning")
+    else:
+        skipped = len(results) - updated
+        flash(
+            f"{updated} inscrição(ões) revisada(s)."
+            + (f" {skipped} ignorada(s) (já estavam assim ou não existem)." if skipped else ""),
+            "success",
+        )
+    return back
+
+
 @app.route("/admin/inscricoes/<int:reg_id>", methods=["GET", "POST"])
 @login_required
 def admin_inscricao_detalhe(reg_id):
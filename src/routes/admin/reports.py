@@ -1,9 +1,24 @@
-from flask import request, send_file
+from itertools import chain
+
+from flask import Response, flash, redirect, request, send_file, stream_with_context, url_for
 from flask_login import login_required
 
 from src import app
 from src.decorators import admin_required
+from src.services.reports.pix_slips import pending_pix_slip_rows, stream_pix_slips_pdf, stream_pix_slips_zip
+from src.services.reports.registrations_export import build_registrations_parquet, stream_registrations_csv
+from src.services.reports.registrations_summary import normalize_report_filters
 from src.services.reports.registrations_xlsx import build_registrations_workbook
+from src.services.reports.report_cache import cached_report
+
+
+def _report_filters() -> dict:
+    return normalize_report_filters(
+        request.args.get("status"),
+        request.args.get("payment_type"),
+        request.args.get("from"),
+        request.args.get("to"),
+    )
 
 
 @app.route("/admin/relatorio-inscritos.xlsx")
@@ -17,15 +32,78 @@ def admin_relatorio_inscritos_xlsx():
       - ?payment_type=pix
       - ?from=2026-02-01&to=2026-02-10 (YYYY-MM-DD)
     """
-    workbook = build_registrations_workbook(
-        status=(request.args.get("status") or "").strip(),
-        payment_type=(request.args.get("payment_type") or "").strip(),
-        date_from=(request.args.get("from") or "").strip(),
-        date_to=(request.args.get("to") or "").strip(),
-    )
+    path, etag = cached_report("xlsx", _report_filters(), build_registrations_workbook, ".xlsx")
     return send_file(
-        workbook,
+        path,
         as_attachment=True,
         download_name="relatorio_inscritos_completo.xlsx",
         mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        etag=etag,
+        conditional=True,
+    )
+
+
+@app.route("/admin/relatorio-inscritos.csv")
+@login_required
+@admin_required
+def admin_relatorio_inscritos_csv():
+    """Lista de inscritos em CSV (mesmas colunas e filtros do Excel), enviada enquanto
+    é lida do banco."""
+    return Response(
+        stream_with_context(stream_registrations_csv(**_report_filters())),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=relatorio_inscritos.csv"},
+    )
+
+
+@app.route("/admin/relatorio-inscritos.parquet")
+@login_required
+@admin_required
+def admin_relatorio_inscritos_parquet():
+    """Lista de inscritos em Parquet (mesmas colunas e filtros do Excel)."""
+    path, etag = cached_report("parquet", _report_filters(), build_registrations_parquet, ".parquet")
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name="relatorio_inscritos.parquet",
+        mimetype="application/vnd.apache.parquet",
+        etag=etag,
+        conditional=True,
+    )
+
+
+@app.route("/admin/boletos-pix.<any(zip, pdf):fmt>")
+@login_required
+@admin_required
+def admin_boletos_pix(fmt):
+    """
+    QR + copia-e-cola de todas as inscrições Pix aguardando pagamento:
+      - .zip: um PNG por inscrição + copia_e_cola.csv
+      - .pdf: boletos pra imprimir, 4 por folha A4
+    Montado em paralelo (ver services/reports/pix_slips.py) e enviado enquanto sai.
+    """
+    rows = pending_pix_slip_rows()
+    if not rows:
+        flash("Nenhuma inscrição Pix aguardando pagamento.", "info")
+        return redirect(url_for("admin_home"))
+
+    if fmt == "zip":
+        chunks, mimetype = stream_pix_slips_zip(rows), "application/zip"
+    else:
+        chunks, mimetype = stream_pix_slips_pdf(rows), "application/pdf"
+
+    # o primeiro pedaço sai antes da resposta: se o pool nem sobe (ou o primeiro lote
+    # quebra), o admin vê o erro em vez de baixar um arquivo vazio. Erro no meio do
+    # envio corta o download -- o navegador mostra como falha, não como arquivo pronto.
+    try:
+        first = next(chunks)
+    except Exception:
+        app.logger.exception("Boletos Pix (%s): falha ao gerar.", fmt)
+        flash("Não foi possível gerar os boletos agora. Tente de novo em instantes.", "danger")
+        return redirect(url_for("admin_home"))
+
+    return Response(
+        stream_with_context(chain([first], chunks)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=boletos_pix.{fmt}"},
     )
@@ -1,6 +1,18 @@
+import time
+from datetime import datetime
+
+import click
+from sqlalchemy import func, text
+
 from src import app, database
-from src.models import Role, User
+from src.models import Registration, Role, User
 from src.services.audit import log_audit
+from src.services.pix import QR_DEFAULT_BOX_SIZE, QR_MAX_BOX_SIZE, QR_MIN_BOX_SIZE
+from src.services.registration import rebuild_registration_counters
+from src.services.reports.pix_slips import pending_pix_slip_rows, stream_pix_slips_pdf, stream_pix_slips_zip
+from src.services.registration_search import setup_registration_search
+
+LEGACY_CREATED_AT = datetime(2000, 1, 1)
 
 
 @app.cli.command("seed_roles")
@@ -25,6 +37,37 @@ def seed_roles():
     print("Roles criadas/atualizadas.")
 
 
+@app.cli.command("export_pix_slips")
+@click.argument("output")
+@click.option("--box-size", default=QR_DEFAULT_BOX_SIZE, type=click.IntRange(QR_MIN_BOX_SIZE, QR_MAX_BOX_SIZE),
+              help="Pixels por módulo dos PNGs do ZIP.")
+def export_pix_slips(output, box_size):
+    """
+    flask export_pix_slips boletos.zip
+    flask export_pix_slips boletos.pdf
+
+    QR + copia-e-cola de todas as inscrições Pix aguardando pagamento, pra grupo e
+    material impresso. .zip = um PNG por inscrição + copia_e_cola.csv; .pdf = boletos
+    pra imprimir, 4 por folha A4. Os QRs saem em paralelo, um processo por CPU
+    (PIX_SLIP_WORKERS pra mudar).
+    """
+    if not output.lower().endswith((".zip", ".pdf")):
+        print("Uso: flask export_pix_slips arquivo.zip|arquivo.pdf")
+        return
+
+    rows = pending_pix_slip_rows()
+    if not rows:
+        print("Nenhuma inscrição Pix aguardando pagamento.")
+        return
+
+    started = time.perf_counter()
+    chunks = stream_pix_slips_zip(rows, box_size) if output.lower().endswith(".zip") else stream_pix_slips_pdf(rows)
+    with open(output, "wb") as target:
+        for chunk in chunks:
+            target.write(chunk)
+    print(f"{len(rows)} boletos em {output} ({time.perf_counter() - started:.1f}s).")
+
+
 @app.cli.command("create_cms_tables")
 def create_cms_tables():
     """
@@ -38,6 +81,71 @@ def create_cms_tables():
     print("Tabelas do CMS criadas/confirmadas.")
 
 
+@app.cli.command("create_registration_search")
+def create_registration_search():
+    """
+    flask create_registration_search
+
+    Prepara a busca de inscrições do admin: cria as colunas search_text, cpf_digits e
+    phone_digits em registrations (se ainda não existem), preenche todas as linhas e
+    cria os índices -- pg_trgm no Postgres, FTS5 (trigram) no SQLite local. Pode rodar
+    de novo sem problema.
+    """
+    result = setup_registration_search()
+    added = ", ".join(result["added_columns"]) or "nenhuma"
+    print(f"Colunas criadas: {added}. Inscrições preenchidas: {result['backfilled']}. "
+          f"Índices de busca ({result['dialect']}) criados/confirmados.")
+
+
+@app.cli.command("create_listing_indexes")
+def create_listing_indexes():
+    """
+    flask create_listing_indexes
+
+    Prepara users e registrations pra paginação por cursor do admin: preenche
+    created_at onde está vazio, passa a coluna pra NOT NULL (Postgres -- o SQLite
+    local não altera coluna) e cria os índices (created_at, id). create_all só cria
+    índice junto com tabela nova, então banco que já existia precisa deste comando
+    uma vez. Pode rodar de novo sem problema.
+    """
+    # o cursor compara (created_at, id): linha com created_at NULL nunca entra na
+    # comparação e sumiria da lista depois da primeira página. As antigas sem data
+    # ganham LEGACY_CREATED_AT (inscrição: a última alteração, se tiver) e vão pro fim.
+    filled = {}
+    for model in (User, Registration):
+        table = model.__table__
+        value = LEGACY_CREATED_AT
+        if model is Registration:
+            value = func.coalesce(table.c.updated_at, LEGACY_CREATED_AT)
+        result = database.session.execute(
+            table.update().where(table.c.created_at.is_(None)).values(created_at=value)
+        )
+        filled[table.name] = result.rowcount
+        if database.engine.dialect.name == "postgresql":
+            database.session.execute(text(f"ALTER TABLE {table.name} ALTER COLUMN created_at SET NOT NULL"))
+    database.session.commit()
+
+    for index in (*User.__table__.indexes, *Registration.__table__.indexes):
+        if index.name in ("ix_users_created_at_id", "ix_registrations_created_at_id"):
+            index.create(database.engine, checkfirst=True)
+    print("created_at preenchido: " + ", ".join(f"{name}={count}" for name, count in filled.items())
+          + ". Índices da paginação criados/confirmados.")
+
+
+@app.cli.command("rebuild_registration_counters")
+def rebuild_registration_counters_command():
+    """
+    flask rebuild_registration_counters
+
+    Liga (ou corrige) os contadores do dashboard do admin: conta as inscrições e grava
+    em registration_counters, que daí em diante é mantida a cada inscrição/revisão.
+    Rode `flask create_cms_tables` antes, pra tabela existir. Não precisa reiniciar o
+    app: os workers já mantêm a tabela desde que ela existe, mesmo vazia.
+    """
+    kpis = rebuild_registration_counters()
+    print("Contadores gravados: " + ", ".join(f"{key}={value}" for key, value in kpis.items()))
+
+
 @app.cli.command("make_super")
 def make_super():
     """
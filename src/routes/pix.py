@@ -1,21 +1,64 @@
-from flask import Response, abort, jsonify
+from flask import Response, abort, jsonify, request
 from flask_login import current_user, login_required
 
-from src import app
+from src import app, database
 from src.models import Registration
-from src.services.pix import VALID_INSTALLMENT_OPTIONS, generate_dynamic_qr_png, get_static_payload
+from src.services.pix import (
+    QR_MIMETYPES,
+    VALID_INSTALLMENT_OPTIONS,
+    generate_dynamic_qr,
+    get_static_payload,
+    normalize_qr_options,
+    pix_qr_etag,
+)
 
 
 @app.route("/pix/qr/<int:n>")
 @login_required
 def pix_qr_n(n):
-    reg = Registration.query.filter_by(user_id=current_user.id).first_or_404()
-
+    """
+    QR dinâmico da parcela n da inscrição do usuário. Querystring opcional:
+      ?format=svg|png (padrão png), ?size=2..20 (px por módulo, só PNG),
+      ?ec=L|M|Q|H (correção de erro, padrão M)
+    """
     if n not in VALID_INSTALLMENT_OPTIONS:
         abort(400)
 
-    png_bytes = generate_dynamic_qr_png(reg.id, n, reg.lot_value_cents)
-    return Response(png_bytes, mimetype="image/png")
+    try:
+        options = normalize_qr_options(
+            request.args.get("format", "png"),
+            request.args.get("size"),
+            request.args.get("ec", "M"),
+        )
+    except ValueError:
+        abort(400)
+
+    # só as duas colunas que entram no QR -- sem carregar a inscrição inteira
+    reg = (
+        database.session.query(Registration.id, Registration.lot_value_cents)
+        .filter(Registration.user_id == current_user.id)
+        .first()
+    )
+    if reg is None:
+        abort(404)
+
+    etag = pix_qr_etag(reg.id, n, reg.lot_value_cents, *options)
+    # o navegador já tem esse QR: 304 sem nem olhar o cache
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(
+            generate_dynamic_qr(reg.id, n, reg.lot_value_cents, *options),
+            mimetype=QR_MIMETYPES[options[0]],
+        )
+
+    response.set_etag(etag)
+    # private: é o QR de uma inscrição, nenhum cache compartilhado guarda. no-cache: a
+    # URL é a mesma pra todo mundo e o conteúdo depende de quem está logado -- celular
+    # ou computador da igreja usado por outra pessoa não pode mostrar o QR (txid, valor)
+    # de quem saiu. O navegador pergunta toda vez e, se nada mudou, a ETag devolve 304.
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @app.route("/pix/copia-cola/<int:n>")
@@ -11,6 +11,7 @@ from src.routes.portal.manage import (
     posts,
     settings,
     social_links,
+    uploads,
 )
 
 __all__ = [
@@ -26,4 +27,5 @@ __all__ = [
     "posts",
     "settings",
     "social_links",
+    "uploads",
 ]
@@ -88,14 +88,18 @@ def portal_manage_ministry_upload_image():
     if not image or not image.filename:
         return jsonify({"error": "Nenhuma imagem enviada."}), 400
 
-    url = upload_inline_image(
+    upload = upload_inline_image(
         image,
         request.form.get("description"),
         folder="cms/ministries/corpo",
         album="Ministérios",
         default_caption="Imagem inserida na descrição do ministério",
     )
-    return jsonify({"url": url})
+    return jsonify({
+        "url": upload["url"],
+        "job_id": upload["job_id"],
+        "status_url": url_for("portal_manage_upload_job_status", job_id=upload["job_id"]),
+    }), 202
 
 
 @app.route("/portal/painel/ministerios/<int:ministry_id>/ocultar", methods=["POST"])
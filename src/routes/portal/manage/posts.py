@@ -65,7 +65,8 @@ def portal_manage_post_edit(post_id):
 def portal_manage_post_upload_image():
     """Recebe upload de imagem inserida no corpo do artigo pelo editor (Quill),
     comprime, salva no B2 e registra na Galeria — em vez do padrão do Quill de
-    embutir a imagem inteira como base64 direto no HTML do artigo."""
+    embutir a imagem inteira como base64 direto no HTML do artigo. O envio roda em
+    segundo plano: responde 202 com a URL final e o status_url que o editor consulta."""
     try:
         validate_csrf(request.form.get("csrf_token"))
     except CSRFValidationError:
@@ -77,14 +78,18 @@ def portal_manage_post_upload_image():
 
     # UnidentifiedImageError/DecompressionBombError tratados globalmente
     # (src/__init__.py) — devolvem JSON aqui igual, sem precisar duplicar.
-    url = upload_inline_image(
+    upload = upload_inline_image(
         image,
         request.form.get("description"),
         folder="cms/posts/corpo",
         album="Artigos",
         default_caption="Imagem inserida em artigo",
     )
-    return jsonify({"url": url})
+    return jsonify({
+        "url": upload["url"],
+        "job_id": upload["job_id"],
+        "status_url": url_for("portal_manage_upload_job_status", job_id=upload["job_id"]),
+    }), 202
 
 
 @app.route("/portal/painel/artigos/<int:post_id>/ocultar", methods=["POST"])
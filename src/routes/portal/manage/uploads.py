@@ -0,0 +1,22 @@
+from flask import jsonify
+
+from src import app
+from src.controllers.b2_utils import get_b2_file_url
+from src.decorators import cms_manager_required
+from src.services.portal.upload_jobs import STATUS_DONE, get_job
+
+
+@app.route("/portal/painel/uploads/<job_id>")
+@cms_manager_required
+def portal_manage_upload_job_status(job_id):
+    """Status de um upload em segundo plano -- o editor (Quill) consulta isso até o job
+    terminar, antes de colocar a imagem no texto (ver quill_image_upload_handler)."""
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": "Upload não encontrado (expirou ou o servidor reiniciou)."}), 404
+
+    return jsonify({
+        "status": job["status"],
+        "url": get_b2_file_url(job["key"]) if job["status"] == STATUS_DONE else None,
+        "error": job["error"],
+    })
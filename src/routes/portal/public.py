@@ -4,6 +4,7 @@ from src import app
 from src.services.portal.banners import list_active_banners
 from src.services.portal.board import list_current_members
 from src.services.portal.downloads import list_active_downloads
+from src.services.portal.page_cache import cached_page
 from src.services.portal.photos import list_active_photos
 from src.services.portal.ministries import (
     get_active_ministry_by_slug,
@@ -24,6 +25,7 @@ from src.services.portal.sanitizer import html_to_meta_description
 
 
 @app.route("/portal")
+@cached_page
 def portal_home():
     posts = list_published_posts(limit=6)
     return render_template(
@@ -36,6 +38,7 @@ def portal_home():
 
 
 @app.route("/portal/artigos")
+@cached_page
 def portal_articles():
     page = request.args.get("page", 1, type=int)
     pagination = list_published_posts_paginated(page=page)
@@ -43,6 +46,7 @@ def portal_articles():
 
 
 @app.route("/portal/artigos/<slug>")
+@cached_page
 def portal_post_detail(slug):
     post = get_published_post_by_slug(slug)
     if not post:
@@ -70,6 +74,7 @@ def portal_post_detail(slug):
 
 
 @app.route("/portal/tags/<slug>")
+@cached_page
 def portal_tag(slug):
     page = request.args.get("page", 1, type=int)
     tag, pagination = get_posts_by_tag_slug(slug, page=page, per_page=12)
@@ -85,11 +90,13 @@ def portal_tag(slug):
 
 
 @app.route("/portal/ministerios")
+@cached_page
 def portal_ministries():
     return render_template("portal/ministries.html", ministries=list_active_ministries())
 
 
 @app.route("/portal/ministerios/<slug>")
+@cached_page
 def portal_ministry_detail(slug):
     ministry = get_active_ministry_by_slug(slug)
     if not ministry:
@@ -111,11 +118,13 @@ def portal_ministry_detail(slug):
 
 
 @app.route("/portal/diretoria")
+@cached_page
 def portal_diretoria():
     return render_template("portal/diretoria.html", members=list_current_members())
 
 
 @app.route("/portal/paginas/<slug>")
+@cached_page
 def portal_page_detail(slug):
     page = get_published_page_by_slug(slug)
     if not page:
@@ -130,12 +139,14 @@ def portal_page_detail(slug):
 
 
 @app.route("/portal/downloads")
+@cached_page
 def portal_downloads():
     downloads = list_active_downloads()
     return render_template("portal/downloads.html", downloads=downloads)
 
 
 @app.route("/portal/galeria")
+@cached_page
 def portal_galeria():
     photos = list_active_photos()
     return render_template("portal/galeria.html", photos=photos)
@@ -1,9 +1,7 @@
-from flask import Response, render_template, url_for
+from flask import Response, abort, request, url_for
 
 from src import app
-from src.models import Tag
-from src.services.portal.ministries import list_active_ministries
-from src.services.portal.posts import list_published_pages, list_published_posts
+from src.services.portal.sitemap import get_sitemap, get_sitemap_section
 
 
 @app.route("/robots.txt")
@@ -25,49 +23,22 @@ def robots_txt():
     return Response("\n".join(lines), mimetype="text/plain")
 
 
-@app.route("/sitemap.xml")
-def portal_sitemap():
-    urls = []
-
-    def add(endpoint, lastmod=None, changefreq="weekly", priority="0.5", **kwargs):
-        urls.append({
-            "loc": url_for(endpoint, _external=True, **kwargs),
-            "lastmod": lastmod.date().isoformat() if lastmod else None,
-            "changefreq": changefreq,
-            "priority": priority,
-        })
-
-    add("landing", changefreq="weekly", priority="0.8")
-    add("portal_home", changefreq="daily", priority="1.0")
-    add("portal_articles", changefreq="daily", priority="0.8")
-    add("portal_ministries", priority="0.6")
-    add("portal_downloads", priority="0.4")
-    add("portal_galeria", priority="0.4")
-    add("portal_diretoria", changefreq="monthly", priority="0.5")
+def _xml_response(body: bytes, etag: str):
+    response = Response(body, mimetype="application/xml")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return response.make_conditional(request)
 
-    for post in list_published_posts():
-        add(
-            "portal_post_detail", slug=post.slug,
-            lastmod=post.updated_at or post.created_at,
-            changefreq="monthly", priority="0.7",
-        )
 
-    for page in list_published_pages():
-        add(
-            "portal_page_detail", slug=page.slug,
-            lastmod=page.updated_at or page.created_at,
-            changefreq="monthly", priority="0.5",
-        )
-
-    for ministry in list_active_ministries():
-        add(
-            "portal_ministry_detail", slug=ministry.slug,
-            lastmod=ministry.updated_at,
-            changefreq="monthly", priority="0.5",
-        )
+@app.route("/sitemap.xml")
+def portal_sitemap():
+    # montado e guardado em src/services/portal/sitemap.py -- só refaz quando o CMS muda
+    return _xml_response(*get_sitemap())
 
-    for tag in Tag.query.all():
-        add("portal_tag", slug=tag.slug, changefreq="weekly", priority="0.3")
 
-    xml = render_template("portal/sitemap.xml", urls=urls)
-    return Response(xml, mimetype="application/xml")
+@app.route("/sitemaps/<name>.xml")
+def portal_sitemap_section(name):
+    section = get_sitemap_section(name)
+    if not section:
+        abort(404)
+    return _xml_response(*section)
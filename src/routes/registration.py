@@ -1,9 +1,15 @@
 from flask import flash, redirect, render_template, url_for
-from flask_login import login_required, login_user
+from flask_login import current_user, login_required, login_user
 
 from src import app
-from src.forms import RegisterAndSignupForm
-from src.services.registration import create_registration, email_already_registered
+from src.forms import RegisterAndSignupForm, UploadProofForm
+from src.services.proofs import store_proof
+from src.services.registration import (
+    STATUS_CONFIRMADA,
+    attach_registration_proof,
+    create_registration,
+    email_already_registered,
+)
 from src.services.settings import inscricoes_status
 
 
@@ -39,8 +45,42 @@ def inscricao():
     return render_template("convencao_jovem/registration/inscricao.html", form=form)
 
 
-@app.route("/comprovante")
+PAYMENT_CONTACT_URL = "https://wa.me/559284596369"
+
+
+@app.route("/comprovante", methods=["GET", "POST"])
 @login_required
 def enviar_comprovante():
-    # redireciona pro WhatsApp (se quiser)
-    return redirect("https://wa.me/559284596369")
+    reg = current_user.registration
+    if reg is None:
+        flash("Você ainda não tem inscrição.", "warning")
+        return redirect(url_for("painel"))
+
+    # crédito não tem comprovante pra mandar aqui -- continua pelo WhatsApp
+    if reg.payment_type != "pix":
+        return redirect(PAYMENT_CONTACT_URL)
+
+    if reg.status == STATUS_CONFIRMADA:
+        flash("Seu pagamento já foi confirmado, não precisa enviar comprovante.", "info")
+        return redirect(url_for("painel"))
+
+    form = UploadProofForm()
+
+    if form.validate_on_submit():
+        try:
+            key = store_proof(form.proof.data, reg.id)
+        except ValueError as error:
+            flash(str(error), "danger")
+        except Exception:
+            app.logger.exception("Falha ao enviar comprovante da inscrição %s.", reg.id)
+            flash("Não foi possível enviar o comprovante agora. Tente de novo em instantes.", "danger")
+        else:
+            attach_registration_proof(reg, key)
+            flash("Comprovante enviado! Agora é só aguardar a confirmação.", "success")
+            return redirect(url_for("painel"))
+
+    return render_template(
+        "convencao_jovem/upload_comprovante.html",
+        form=form,
+        reg=reg,
+    )
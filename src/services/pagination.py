@@ -0,0 +1,138 @@
+import base64
+import binascii
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+# Paginação por cursor (keyset) pras listas grandes do admin.
+#
+# O .paginate() do Flask-SQLAlchemy faz OFFSET + COUNT(*) em toda página: na página 500
+# o banco lê e joga fora 500 páginas antes de devolver 25 linhas, e ainda conta o
+# filtro inteiro de novo. Aqui a lista é ordenada por (created_at, id) decrescente e a
+# próxima página é "as linhas depois da última que eu vi" -- WHERE (created_at, id) <
+# (cursor) LIMIT n+1, que com o índice composto custa o mesmo em qualquer página.
+#
+# created_at precisa ser NOT NULL nas tabelas paginadas: NULL não entra na comparação
+# de tupla (sumiria da lista depois da primeira página) e nem vira cursor. users e
+# registrations ficam assim com `flask create_listing_indexes`, que preenche as linhas
+# antigas sem data.
+#
+# Não existe "ir pra página 37" (não tem número de página), só primeira / anterior /
+# próxima. O total é um COUNT guardado por KEYSET_COUNT_TTL segundos por filtro, em
+# memória do worker -- pode ficar um pouco atrás enquanto chegam inscrições, o que pra
+# um "N no total" na tela não faz diferença.
+KEYSET_COUNT_TTL = 60
+_COUNT_CACHE_MAX = 512
+
+_count_lock = threading.Lock()
+_count_cache: dict[str, tuple[float, int]] = {}
+
+
+class KeysetPage:
+    """Uma página da lista: os itens e os cursores pra montar os links de anterior/próxima."""
+
+    def __init__(self, items: list, per_page: int, total: int | None, next_cursor: str | None, prev_cursor: str | None):
+        self.items = items
+        self.per_page = per_page
+        self.total = total
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int] | None:
+    """(created_at, id) do cursor, ou None se veio vazio/adulterado -- aí mostra a primeira página."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, item_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def cached_count(query, cache_key: str) -> int:
+    """COUNT da consulta, guardado por KEYSET_COUNT_TTL segundos sob `cache_key`."""
+    now = time.monotonic()
+    with _count_lock:
+        cached = _count_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    total = query.order_by(None).count()
+
+    with _count_lock:
+        if len(_count_cache) >= _COUNT_CACHE_MAX:
+            for key in [key for key, (expires, _) in _count_cache.items() if expires <= now] or list(_count_cache):
+                del _count_cache[key]
+        _count_cache[cache_key] = (now + KEYSET_COUNT_TTL, total)
+    return total
+
+
+def keyset_paginate(query, model, *, after: str = "", before: str = "", per_page: int = 25,
+                    count_key: str | None = None) -> KeysetPage:
+    """
+    Página de `query` (já filtrada, sem order_by) em ordem de `model.created_at` /
+    `model.id` decrescente -- mais novo primeiro.
+
+    `after` = cursor da próxima página (linhas mais antigas que ele), `before` = cursor
+    da página anterior (mais novas). Sem nenhum dos dois, primeira página.
+    `count_key` identifica a lista + filtros no cache do total; sem ele, não conta
+    (total fica None).
+    """
+    base_query = query
+    key_columns = (model.created_at, model.id)
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before) if after_key is None else None
+
+    if before_key is not None:
+        # anda pra trás: pega as n+1 logo acima do cursor em ordem crescente e desvira
+        rows = (
+            query
+            .filter(tuple_(*key_columns) > tuple_(*before_key))
+            .order_by(model.created_at.asc(), model.id.asc())
+            .limit(per_page + 1)
+            .all()
+        )
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_next = True
+    else:
+        if after_key is not None:
+            query = query.filter(tuple_(*key_columns) < tuple_(*after_key))
+        rows = (
+            query
+            .order_by(model.created_at.desc(), model.id.desc())
+            .limit(per_page + 1)
+            .all()
+        )
+        has_next = len(rows) > per_page
+        items = rows[:per_page]
+        has_prev = after_key is not None
+
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if items and has_next else None
+    prev_cursor = encode_cursor(items[0].created_at, items[0].id) if items and has_prev else None
+
+    total = None
+    if count_key is not None:
+        if after_key is None and before_key is None and not has_next:
+            total = len(items)  # a lista inteira coube na primeira página -- nem precisa contar
+        else:
+            total = cached_count(base_query, count_key)
+
+    return KeysetPage(items, per_page, total, next_cursor, prev_cursor)
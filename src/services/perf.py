@@ -0,0 +1,136 @@
+import threading
+import time
+
+from flask import g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+
+from src import app, database
+
+# Instrumentação de SQL por requisição: conta as consultas, soma o tempo gasto no banco
+# e guarda a mais lenta. Sai em três lugares:
+#   - header Server-Timing (aparece na aba Network do DevTools, sem profiler nenhum) --
+#     só pra admin ou em debug;
+#   - uma linha de log por requisição (INFO; WARNING se passar de PERF_SLOW_REQUEST_MS);
+#   - /admin/perf, com o acumulado por endpoint desde que o worker subiu.
+# Os agregados vivem na memória do worker (gunicorn com 1 worker, ver Procfile).
+PERF_SLOW_REQUEST_MS = 500
+_STATEMENT_PREVIEW = 300  # corta o SQL guardado/logado -- IN (...) gigante não entra inteiro
+
+_lock = threading.Lock()
+_endpoints: dict[str, dict] = {}
+_started_at = time.time()
+
+
+# O início de cada consulta fica no execution context dela, não numa pilha em
+# conn.info: consulta que dá erro não chega no after_cursor_execute, e o valor empilhado
+# ficaria lá pra sempre (e desencontraria os tempos das próximas nessa conexão).
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._perf_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_perf_start", None)
+    if started is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    # consultas fora de requisição (fila de upload, CLI) não entram na conta
+    if not has_request_context() or "perf" not in g:
+        return
+
+    stats = g.perf
+    stats["queries"] += 1
+    stats["db_ms"] += elapsed_ms
+    if elapsed_ms > stats["slowest_ms"]:
+        stats["slowest_ms"] = elapsed_ms
+        stats["slowest_sql"] = " ".join(statement.split())[:_STATEMENT_PREVIEW]
+
+
+def _start_request():
+    g.perf = {
+        "started": time.perf_counter(),
+        "queries": 0,
+        "db_ms": 0.0,
+        "slowest_ms": 0.0,
+        "slowest_sql": "",
+    }
+
+
+def _record(endpoint: str, stats: dict, total_ms: float) -> None:
+    with _lock:
+        entry = _endpoints.setdefault(endpoint, {
+            "endpoint": endpoint,
+            "requests": 0,
+            "queries": 0,
+            "db_ms": 0.0,
+            "total_ms": 0.0,
+            "max_total_ms": 0.0,
+            "slowest_ms": 0.0,
+            "slowest_sql": "",
+        })
+        entry["requests"] += 1
+        entry["queries"] += stats["queries"]
+        entry["db_ms"] += stats["db_ms"]
+        entry["total_ms"] += total_ms
+        entry["max_total_ms"] = max(entry["max_total_ms"], total_ms)
+        if stats["slowest_ms"] > entry["slowest_ms"]:
+            entry["slowest_ms"] = stats["slowest_ms"]
+            entry["slowest_sql"] = stats["slowest_sql"]
+
+
+def _shows_server_timing() -> bool:
+    # tempo de banco e número de consultas de cada página dizem como o sistema é por
+    # dentro -- só pra quem já enxerga o /admin/perf (ou rodando em debug)
+    if app.debug:
+        return True
+    return current_user.is_authenticated and current_user.can_access_admin
+
+
+def _finish_request(response):
+    stats = g.pop("perf", None)
+    if stats is None:
+        return response
+
+    total_ms = (time.perf_counter() - stats["started"]) * 1000
+    if _shows_server_timing():
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats["db_ms"]:.1f};desc="{stats["queries"]} queries", app;dur={total_ms:.1f}',
+        )
+
+    endpoint = request.endpoint or "(sem rota)"
+    if endpoint != "static":
+        _record(endpoint, stats, total_ms)
+
+    log = app.logger.warning if total_ms >= PERF_SLOW_REQUEST_MS else app.logger.info
+    log(
+        "perf endpoint=%s method=%s status=%s total_ms=%.1f queries=%d db_ms=%.1f slowest_ms=%.1f slowest_sql=%r",
+        endpoint, request.method, response.status_code, total_ms,
+        stats["queries"], stats["db_ms"], stats["slowest_ms"], stats["slowest_sql"],
+    )
+    return response
+
+
+def init_perf_instrumentation() -> None:
+    with app.app_context():
+        engine = database.engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+def endpoint_stats() -> list[dict]:
+    """Agregados por endpoint desde o boot do worker, do que mais gasta banco pro que menos."""
+    with _lock:
+        rows = [dict(entry) for entry in _endpoints.values()]
+    for row in rows:
+        row["avg_queries"] = row["queries"] / row["requests"]
+        row["avg_db_ms"] = row["db_ms"] / row["requests"]
+        row["avg_total_ms"] = row["total_ms"] / row["requests"]
+    return sorted(rows, key=lambda row: row["db_ms"], reverse=True)
+
+
+def uptime_seconds() -> float:
+    return time.time() - _started_at
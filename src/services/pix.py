@@ -1,9 +1,12 @@
+import hashlib
+import os
 from decimal import ROUND_DOWN, Decimal
+from functools import lru_cache
 from io import BytesIO
 
 import qrcode
 
-from src.controllers.pix_emv import build_pix_payload
+from src.controllers.pix_emv import build_pix_payload, build_pix_payloads_bulk
 
 PIX_KEY = "17739576000178"
 MERCHANT_NAME = "CONVENCAO AMAZONICA"
@@ -11,6 +14,32 @@ MERCHANT_CITY = "MANAUS"
 
 VALID_INSTALLMENT_OPTIONS = (1, 2, 4)
 
+# QR dinâmico (/pix/qr/<n>): é função só de (inscrição, parcelas, valor do lote) + os
+# dados do recebedor acima. O participante recarrega o painel no celular toda hora --
+# em vez de refazer payload + PNG a cada vez, guarda os bytes num LRU do processo e,
+# se PIX_QR_CACHE_DIR estiver definido, também em disco (sobrevive a restart/deploy
+# no mesmo disco). A ETag sai das mesmas entradas, então o navegador que já tem o QR
+# leva 304 sem render nenhum.
+PIX_QR_CACHE_SIZE = 1024  # ~1KB cada
+PIX_QR_CACHE_DIR = os.environ.get("PIX_QR_CACHE_DIR") or None
+_QR_RECIPIENT = f"{PIX_KEY}|{MERCHANT_NAME}|{MERCHANT_CITY}"
+
+# Formatos do QR (?format=, ?size=, ?ec= no /pix/qr/<n>). SVG não tem resolução: fica
+# nítido em qualquer tela e sai ~3x mais rápido que o PNG (não rasteriza nada) -- o
+# tamanho em bytes é parecido com o do PNG de 1 bit, que já é pequeno. O PNG aceita o
+# tamanho do módulo em pixels (box_size) e os dois aceitam o nível de correção de erro.
+QR_MIMETYPES = {"png": "image/png", "svg": "image/svg+xml"}
+QR_ERROR_LEVELS = {
+    "L": qrcode.constants.ERROR_CORRECT_L,
+    "M": qrcode.constants.ERROR_CORRECT_M,
+    "Q": qrcode.constants.ERROR_CORRECT_Q,
+    "H": qrcode.constants.ERROR_CORRECT_H,
+}
+QR_DEFAULT_BOX_SIZE = 10  # o padrão do qrcode.make
+QR_MIN_BOX_SIZE = 2
+QR_MAX_BOX_SIZE = 20
+QR_BORDER = 4  # margem mínima da norma, em módulos
+
 STATIC_PIX_PAYLOADS = {
     1: "00020126500014BR.GOV.BCB.PIX0128convencaoamazonica@gmail.com5204000053039865406200.095802BR5925CONVENCAO REGIONAL AMAZON6006MANAUS622605224FUieu9XhujOBxKlhc4Fl0630428FD",
     2: "00020126500014BR.GOV.BCB.PIX0128convencaoamazonica@gmail.com5204000053039865406100.095802BR5925CONVENCAO REGIONAL AMAZON6006MANAUS622605226AO0b6MMKJb3EbxlKCgc5863046D2C",
@@ -26,23 +55,162 @@ def calculate_installment_amount(lot_value_cents: int, installments: int) -> Dec
     return parcela.quantize(Decimal("0.00"))
 
 
-def generate_dynamic_qr_png(registration_id: int, installments: int, lot_value_cents: int) -> bytes:
-    amount = calculate_installment_amount(lot_value_cents, installments)
-    txid = f"R{registration_id}N{installments}"[:25]  # alfanumérico
+def pix_qr_etag(
+    registration_id: int,
+    installments: int,
+    lot_value_cents: int,
+    fmt: str = "png",
+    box_size: int = QR_DEFAULT_BOX_SIZE,
+    error_level: str = "M",
+) -> str:
+    raw = f"{_QR_RECIPIENT}|{registration_id}|{installments}|{lot_value_cents}|{fmt}|{box_size}|{error_level}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
 
-    payload = build_pix_payload(
+def _dynamic_txid(registration_id: int, installments: int) -> str:
+    return f"R{registration_id}N{installments}"[:25]  # alfanumérico
+
+
+def dynamic_pix_payload(registration_id: int, installments: int, lot_value_cents: int) -> str:
+    """Copia-e-cola do QR dinâmico de uma inscrição (valor da parcela + txid dela)."""
+    return build_pix_payload(
         pix_key=PIX_KEY,
         merchant_name=MERCHANT_NAME,
         merchant_city=MERCHANT_CITY,
-        amount=str(amount),
-        txid=txid,
+        amount=str(calculate_installment_amount(lot_value_cents, installments)),
+        txid=_dynamic_txid(registration_id, installments),
     )
 
+
+def dynamic_pix_payloads(entries) -> list[str]:
+    """
+    dynamic_pix_payload pra muitas de uma vez -- `entries` é uma sequência de
+    (registration_id, installments, lot_value_cents), resposta na mesma ordem. Pra
+    pré-gerar os payloads de todas as inscrições (ou de todas as parcelas de uma) sem
+    montar os campos fixos do recebedor de novo a cada uma.
+    """
+    return build_pix_payloads_bulk(
+        [
+            (str(calculate_installment_amount(lot_value_cents, installments)),
+             _dynamic_txid(registration_id, installments))
+            for registration_id, installments, lot_value_cents in entries
+        ],
+        pix_key=PIX_KEY,
+        merchant_name=MERCHANT_NAME,
+        merchant_city=MERCHANT_CITY,
+    )
+
+
+def qr_runs(matrix):
+    """
+    (x, y, comprimento) de cada sequência de módulos escuros numa linha do QR -- um
+    retângulo por sequência em vez de um quadrado por módulo (SVG aqui, PDF dos
+    boletos em lote).
+    """
+    size = len(matrix)
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]:
+                x += 1
+            yield start, y, x - start
+
+
+def _qr_svg(matrix, box_size: int) -> bytes:
+    # tudo num <path> só -- o SvgPathImage do qrcode desenha um quadrado por módulo e
+    # sai 2x maior
+    size = len(matrix)
+    path = "".join(f"M{x} {y}h{length}v1h-{length}z" for x, y, length in qr_runs(matrix))
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size * box_size}" height="{size * box_size}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<path fill="#fff" d="M0 0h{size}v{size}H0z"/><path d="{path}"/></svg>'
+    ).encode()
+
+
+def _make_qr(payload: str, box_size: int, error_level: str) -> qrcode.QRCode:
+    qr = qrcode.QRCode(error_correction=QR_ERROR_LEVELS[error_level], box_size=box_size, border=QR_BORDER)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return qr
+
+
+def qr_matrix(payload: str, error_level: str = "M") -> list[list[bool]]:
+    """Módulos do QR, margem incluída (True = escuro), pra quem desenha por conta própria."""
+    return _make_qr(payload, 1, error_level).get_matrix()
+
+
+def render_qr(payload: str, fmt: str = "png", box_size: int = QR_DEFAULT_BOX_SIZE, error_level: str = "M") -> bytes:
+    """QR de um payload qualquer em PNG (box_size px por módulo) ou SVG."""
+    qr = _make_qr(payload, box_size, error_level)
+
+    if fmt == "svg":
+        return _qr_svg(qr.get_matrix(), box_size)
+
     buffer = BytesIO()
-    qrcode.make(payload).save(buffer, format="PNG")
-    buffer.seek(0)
+    qr.make_image().save(buffer, format="PNG")
     return buffer.getvalue()
 
 
+def normalize_qr_options(fmt: str = "png", box_size=None, error_level: str = "M") -> tuple[str, int, str]:
+    """
+    (formato, box_size, correção) válidos a partir do que veio na querystring --
+    ValueError se algum não existe. No SVG o box_size não muda nada, então vira o
+    padrão (mesma chave de cache pra qualquer ?size=).
+    """
+    fmt = (fmt or "png").lower()
+    error_level = (error_level or "M").upper()
+    if fmt not in QR_MIMETYPES or error_level not in QR_ERROR_LEVELS:
+        raise ValueError("Formato ou nível de correção inválido.")
+    if fmt == "svg" or box_size in (None, ""):
+        return fmt, QR_DEFAULT_BOX_SIZE, error_level
+    box_size = int(box_size)  # ValueError se não for número
+    if not QR_MIN_BOX_SIZE <= box_size <= QR_MAX_BOX_SIZE:
+        raise ValueError(f"Tamanho deve ficar entre {QR_MIN_BOX_SIZE} e {QR_MAX_BOX_SIZE}.")
+    return fmt, box_size, error_level
+
+
+@lru_cache(maxsize=PIX_QR_CACHE_SIZE)
+def generate_dynamic_qr(
+    registration_id: int,
+    installments: int,
+    lot_value_cents: int,
+    fmt: str = "png",
+    box_size: int = QR_DEFAULT_BOX_SIZE,
+    error_level: str = "M",
+) -> bytes:
+    """QR dinâmico da inscrição, do cache se já foi gerado. Opções já normalizadas
+    (normalize_qr_options)."""
+    def render():
+        payload = dynamic_pix_payload(registration_id, installments, lot_value_cents)
+        return render_qr(payload, fmt, box_size, error_level)
+
+    if not PIX_QR_CACHE_DIR:
+        return render()
+
+    etag = pix_qr_etag(registration_id, installments, lot_value_cents, fmt, box_size, error_level)
+    path = os.path.join(PIX_QR_CACHE_DIR, f"{etag}.{fmt}")
+    try:
+        with open(path, "rb") as cached:
+            return cached.read()
+    except FileNotFoundError:
+        pass
+
+    qr_bytes = render()
+    try:
+        os.makedirs(PIX_QR_CACHE_DIR, exist_ok=True)
+        partial = f"{path}.{os.getpid()}.part"
+        with open(partial, "wb") as target:
+            target.write(qr_bytes)
+        os.replace(partial, path)
+    except OSError:
+        pass  # disco cheio/sem permissão: segue só com o cache em memória
+    return qr_bytes
+
+
 def get_static_payload(installments: int) -> str | None:
     return STATIC_PIX_PAYLOADS.get(installments)
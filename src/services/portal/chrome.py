@@ -0,0 +1,110 @@
+import threading
+import time
+
+from sqlalchemy.orm import selectinload
+
+from src import database
+from src.models import Ministry, NavLink, SocialLink
+
+# O "chrome" do portal (menu, dropdown de ministérios, redes sociais e rodapé) aparece
+# em toda página renderizada -- inclusive admin e landing -- mas só muda quando alguém
+# mexe no CMS. Em vez de 5 consultas por render, monta um snapshot uma vez por worker e
+# reaproveita entre requisições. As escritas do CMS chamam invalidate_site_chrome() pra
+# edição aparecer na hora; o TTL cobre os outros workers do gunicorn, que não ficam
+# sabendo da invalidação feita em outro processo.
+CHROME_TTL_SECONDS = 60
+
+_FALLBACK_FOOTER = {"endereco": "", "telefone": ""}
+
+_lock = threading.Lock()
+_snapshot: dict | None = None
+_built_at = 0.0
+_generation = 0  # sobe a cada invalidação -- descarta um snapshot montado antes dela
+
+
+def _nav_link_entry(link: NavLink) -> dict:
+    # dict simples em vez do objeto ORM: o snapshot vive além da sessão da requisição
+    # que o montou, e o Jinja lê `link.label`/`link.children` de dict do mesmo jeito.
+    return {
+        "id": link.id,
+        "label": link.label,
+        "url": link.url,
+        "page_id": link.page_id,
+        "target_url": link.target_url,
+        "is_active": link.is_active,
+        "children": [_nav_link_entry(child) for child in link.children],
+    }
+
+
+def _active_nav_links() -> list[dict]:
+    links = (
+        NavLink.query
+        .options(
+            selectinload(NavLink.page),
+            selectinload(NavLink.children).selectinload(NavLink.page),
+        )
+        .filter_by(parent_id=None, is_active=True)
+        .order_by(NavLink.order)
+        .all()
+    )
+    return [_nav_link_entry(link) for link in links]
+
+
+def _active_social_links() -> list[dict]:
+    links = SocialLink.query.filter_by(is_active=True).order_by(SocialLink.order).all()
+    return [{"platform": link.platform, "url": link.url} for link in links]
+
+
+def _active_ministries_for_nav() -> list[dict]:
+    ministries = Ministry.query.filter_by(is_active=True).order_by(Ministry.name).all()
+    return [{"name": m.name, "slug": m.slug} for m in ministries]
+
+
+def _build_snapshot() -> tuple[dict, bool]:
+    """Devolve (snapshot, completo). Cada parte degrada sozinha pra vazio se a tabela
+    ainda não existir (cms_* só existe depois de `flask create_cms_tables`) -- mas aí o
+    snapshot não é guardado, pra uma falha passageira não ficar presa no cache."""
+    # import local: settings.py chama invalidate_site_chrome() daqui
+    from src.services.settings import get_footer_settings
+
+    parts = (
+        ("nav_links", _active_nav_links, []),
+        ("social_links", _active_social_links, []),
+        ("footer_settings", get_footer_settings, _FALLBACK_FOOTER),
+        ("nav_ministries", _active_ministries_for_nav, []),
+    )
+    snapshot = {}
+    complete = True
+    for name, loader, fallback in parts:
+        try:
+            snapshot[name] = loader()
+        except Exception:
+            database.session.rollback()
+            snapshot[name] = fallback
+            complete = False
+    return snapshot, complete
+
+
+def get_site_chrome() -> dict:
+    global _snapshot, _built_at
+
+    with _lock:
+        if _snapshot is not None and time.monotonic() - _built_at < CHROME_TTL_SECONDS:
+            return _snapshot
+        generation = _generation
+
+    snapshot, complete = _build_snapshot()
+    if complete:
+        with _lock:
+            if generation == _generation:
+                _snapshot = snapshot
+                _built_at = time.monotonic()
+    return snapshot
+
+
+def invalidate_site_chrome() -> None:
+    global _snapshot, _generation
+
+    with _lock:
+        _snapshot = None
+        _generation += 1
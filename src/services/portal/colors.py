@@ -1,76 +1,105 @@
-import colorsys
-
+import numpy as np
 from PIL import Image, ImageOps
 
-_PALETTE_SIZE = 12
+_THUMBNAIL_SIZE = 256
 _SATURATION_THRESHOLD = 0.35
+_VALUE_MIN = 0.15
+_VALUE_MAX = 0.97
+_BIN_BITS = 4  # 16 níveis por canal -> 4096 "caixas" de cor no histograma
+_MIN_BIN_DISTANCE = 48  # distância RGB mínima entre duas cores de destaque do top-k
 _FALLBACK_COLOR = "#f29422"  # var(--pt-orange) do portal.css -- usado se a extração falhar
 
 
-def _hsv(rgb):
-    r, g, b = rgb
-    return colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
+def _to_hex(rgb) -> str:
+    return "#{:02x}{:02x}{:02x}".format(*(int(round(c)) for c in rgb))
 
 
-def _quantize_dominant(pixels: list) -> tuple:
-    """Bota os pixels lado a lado numa imagem de 1 linha só (a posição não importa pra
-    quantize) e devolve a cor mais comum da paleta reduzida."""
-    sample = Image.new("RGB", (len(pixels), 1))
-    sample.putdata(pixels)
-    palette_image = sample.convert("P", palette=Image.ADAPTIVE, colors=_PALETTE_SIZE)
-    palette = palette_image.getpalette()
-    _, idx = sorted(palette_image.getcolors(), reverse=True)[0]
-    return tuple(palette[idx * 3: idx * 3 + 3])
+def _saturation_value(pixels: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """S e V do HSV pra cada pixel (N x 3, uint8), sem passar pixel a pixel pelo colorsys."""
+    rgb = pixels.astype(np.float32) / 255
+    max_c = rgb.max(axis=1)
+    min_c = rgb.min(axis=1)
+    saturation = np.divide(max_c - min_c, max_c, out=np.zeros_like(max_c), where=max_c > 0)
+    return saturation, max_c
 
 
-def extract_accent_color(file_storage) -> str:
+def _dominant_colors(pixels: np.ndarray, k: int) -> list[tuple]:
     """
-    Pega uma cor de destaque da imagem do banner, pra usar no botão "Acesse aqui" --
-    cada banner acaba com um botão na cor da própria imagem, em vez de sempre laranja.
+    Agrupa os pixels num histograma de cor grosso (4 bits por canal) e devolve até `k`
+    cores, da mais comum pra menos comum. Cada cor é a média real dos pixels da caixa
+    (não o centro dela), e caixas muito parecidas com uma já escolhida são puladas --
+    senão o top-3 de um banner vermelho vira três tons do mesmo vermelho.
+    """
+    shift = 8 - _BIN_BITS
+    q = (pixels >> shift).astype(np.int32)
+    bins = (q[:, 0] << (2 * _BIN_BITS)) | (q[:, 1] << _BIN_BITS) | q[:, 2]
+
+    n_bins = 1 << (3 * _BIN_BITS)
+    counts = np.bincount(bins, minlength=n_bins)
+    sums = np.stack(
+        [np.bincount(bins, weights=pixels[:, c], minlength=n_bins) for c in range(3)],
+        axis=1,
+    )
+
+    chosen: list[np.ndarray] = []
+    for idx in np.argsort(counts)[::-1]:
+        if counts[idx] == 0 or len(chosen) == k:
+            break
+        color = sums[idx] / counts[idx]
+        if all(np.linalg.norm(color - other) >= _MIN_BIN_DISTANCE for other in chosen):
+            chosen.append(color)
+    return [tuple(c) for c in chosen]
+
+
+def extract_accent_palette(file_storage, k: int = 1) -> list[str]:
+    """
+    Até `k` cores de destaque da imagem do banner, em "#rrggbb", da mais forte pra mais
+    fraca. Sempre devolve pelo menos uma cor (o laranja padrão, se a extração falhar).
 
     Quantizar a imagem inteira direto (fundo + tudo) não funciona bem quando o fundo é
     grande e neutro (parede, concreto, céu) e só uma parte menor da imagem tem cor viva:
-    a quantização "gasta" o orçamento de cores distinguindo tons quase iguais de cinza e
+    o agrupamento "gasta" o orçamento de cores distinguindo tons quase iguais de cinza e
     empurra toda a cor vibrante pra dentro de uma única cor borrada. Por isso, primeiro
-    filtra só os pixels saturados (a "cor viva" da imagem) e quantiza só esses -- assim o
+    filtra só os pixels saturados (a "cor viva" da imagem) e agrupa só esses -- assim o
     fundo neutro nunca disputa espaço na paleta. Sem pixel vivo o suficiente (imagem
     genuinamente sem cor, tipo preto e branco), cai pra cor mais comum dentro de uma
     faixa de claridade razoável.
+
+    Filtro e agrupamento rodam vetorizados em NumPy sobre a miniatura inteira de uma vez.
     """
     try:
         image = Image.open(file_storage)
+        # JPEG: decodifica já reduzido (bem mais rápido que abrir em tamanho cheio)
+        image.draft("RGB", (_THUMBNAIL_SIZE, _THUMBNAIL_SIZE))
         image = ImageOps.exif_transpose(image)
         if image.mode not in ("RGB", "L"):
             image = image.convert("RGB")
-        image.thumbnail((150, 150))
-        rgb_image = image.convert("RGB")
-        pixels = list(rgb_image.getdata())
+        image.thumbnail((_THUMBNAIL_SIZE, _THUMBNAIL_SIZE))
+        pixels = np.asarray(image.convert("RGB"), dtype=np.uint8).reshape(-1, 3)
 
-        vivid_pixels = [
-            p for p in pixels
-            if (lambda hsv: hsv[1] >= _SATURATION_THRESHOLD and 0.15 <= hsv[2] <= 0.97)(_hsv(p))
-        ]
+        saturation, value = _saturation_value(pixels)
+        in_value_range = (value >= _VALUE_MIN) & (value <= _VALUE_MAX)
+        vivid = pixels[(saturation >= _SATURATION_THRESHOLD) & in_value_range]
 
-        if len(vivid_pixels) >= max(50, len(pixels) * 0.01):
-            best_color = _quantize_dominant(vivid_pixels)
+        if len(vivid) >= max(50, len(pixels) * 0.01):
+            colors = _dominant_colors(vivid, k)
         else:
             # sem cor viva o suficiente -- pega a cor mais comum da imagem inteira que
             # não seja preto/branco puro (evita botão invisível ou texto branco ilegível)
-            palette_image = rgb_image.convert("P", palette=Image.ADAPTIVE, colors=_PALETTE_SIZE)
-            palette = palette_image.getpalette()
-            color_counts = sorted(palette_image.getcolors(), reverse=True)
-            best_color = None
-            for _, idx in color_counts:
-                candidate = tuple(palette[idx * 3: idx * 3 + 3])
-                if 0.15 <= _hsv(candidate)[2] <= 0.97:
-                    best_color = candidate
-                    break
-            if best_color is None:
-                _, idx = color_counts[0]
-                best_color = tuple(palette[idx * 3: idx * 3 + 3])
-
-        return "#{:02x}{:02x}{:02x}".format(*best_color)
+            colors = _dominant_colors(pixels[in_value_range], k) if in_value_range.any() else []
+            if not colors:
+                colors = _dominant_colors(pixels, k)
+
+        return [_to_hex(c) for c in colors] or [_FALLBACK_COLOR]
     except Exception:
-        return _FALLBACK_COLOR
+        return [_FALLBACK_COLOR]
     finally:
         file_storage.seek(0)  # devolve o cursor pro save_image_upload conseguir ler de novo
+
+
+def extract_accent_color(file_storage) -> str:
+    """
+    Pega uma cor de destaque da imagem do banner, pra usar no botão "Acesse aqui" --
+    cada banner acaba com um botão na cor da própria imagem, em vez de sempre laranja.
+    """
+    return extract_accent_palette(file_storage, k=1)[0]
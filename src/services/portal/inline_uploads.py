@@ -1,15 +1,22 @@
 from src.controllers.b2_utils import get_b2_file_url
 from src.services.portal.photos import track_image
-from src.services.portal.uploads import save_image_upload
+from src.services.portal.upload_jobs import enqueue_image_upload
 
 
-def upload_inline_image(image_file_storage, description: str, folder: str, album: str, default_caption: str) -> str:
+def upload_inline_image(image_file_storage, description: str, folder: str, album: str, default_caption: str) -> dict:
     """
     Comprime, envia ao B2 e registra na Galeria uma imagem inserida no corpo de
     um editor rico (Quill) — usado tanto por artigos quanto por ministérios, cada
     um com sua própria pasta/álbum pra não misturar na Galeria.
+
+    O trabalho pesado roda na fila de upload (ver upload_jobs.py): devolve na hora a
+    URL final e o id do job, que o editor consulta até a imagem estar no bucket. Só
+    entra na Galeria depois que o envio deu certo.
     """
-    key = save_image_upload(image_file_storage, folder=folder)
     caption = (description or "").strip() or default_caption
-    track_image(key, caption=caption, album=album)
-    return get_b2_file_url(key)
+    job = enqueue_image_upload(
+        image_file_storage,
+        folder=folder,
+        on_success=lambda key: track_image(key, caption=caption, album=album),
+    )
+    return {"url": get_b2_file_url(job["key"]), "job_id": job["id"]}
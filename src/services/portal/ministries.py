@@ -1,29 +1,13 @@
 from src import database
-from src.controllers.slugify import gerar_slug
 from src.models import Ministry, MinistryMandate, MinistryMandateMember, MinistrySocialLink
 from src.services.audit import log_audit
+from src.services.portal.chrome import invalidate_site_chrome
 from src.services.portal.photos import track_image
 from src.services.portal.sanitizer import sanitize_body
+from src.services.portal.slugs import assign_unique_slug
 from src.services.portal.uploads import save_image_upload
 
 
-def _slug_taken(slug: str, ignore_id: int | None) -> bool:
-    query = Ministry.query.filter_by(slug=slug)
-    if ignore_id:
-        query = query.filter(Ministry.id != ignore_id)
-    return query.first() is not None
-
-
-def _unique_slug(name: str, ignore_id: int | None = None) -> str:
-    base = gerar_slug(name) or "ministerio"
-    slug = base
-    suffix = 2
-    while _slug_taken(slug, ignore_id):
-        slug = f"{base}-{suffix}"
-        suffix += 1
-    return slug
-
-
 def list_ministries():
     return Ministry.query.order_by(Ministry.name).all()
 
@@ -44,13 +28,13 @@ def create_ministry(form, actor_user_id) -> Ministry:
     name = form.name.data.strip()
     ministry = Ministry(
         name=name,
-        slug=_unique_slug(name),
         description=sanitize_body(form.description.data),
         cover_image_key=cover_image_key,
     )
-    database.session.add(ministry)
+    assign_unique_slug(ministry, name, "ministerio")
     log_audit(actor_user_id=actor_user_id, action="cms_ministry_created", details=f"name={name}")
     database.session.commit()
+    invalidate_site_chrome()
 
     if cover_image_key:
         track_image(cover_image_key, caption=f"Capa: {name}", album="Ministérios")
@@ -61,7 +45,7 @@ def create_ministry(form, actor_user_id) -> Ministry:
 def update_ministry(ministry: Ministry, form, actor_user_id) -> Ministry:
     new_name = form.name.data.strip()
     if new_name != ministry.name:
-        ministry.slug = _unique_slug(new_name, ignore_id=ministry.id)
+        assign_unique_slug(ministry, new_name, "ministerio")
     ministry.name = new_name
     ministry.description = sanitize_body(form.description.data)
 
@@ -72,6 +56,7 @@ def update_ministry(ministry: Ministry, form, actor_user_id) -> Ministry:
 
     log_audit(actor_user_id=actor_user_id, action="cms_ministry_updated", details=f"ministry_id={ministry.id}")
     database.session.commit()
+    invalidate_site_chrome()
 
     if new_cover_key:
         track_image(new_cover_key, caption=f"Capa: {ministry.name}", album="Ministérios")
@@ -87,6 +72,7 @@ def set_ministry_active(ministry: Ministry, is_active: bool, actor_user_id) -> N
         details=f"ministry_id={ministry.id} is_active={is_active}",
     )
     database.session.commit()
+    invalidate_site_chrome()
 
 
 # ===== mandatos de liderança =====
@@ -1,6 +1,7 @@
 from src import database
 from src.models import NavLink
 from src.services.audit import log_audit
+from src.services.portal.chrome import invalidate_site_chrome
 
 
 def list_top_level_links():
@@ -27,6 +28,7 @@ def create_nav_link(form, actor_user_id) -> NavLink:
     database.session.add(link)
     log_audit(actor_user_id=actor_user_id, action="cms_nav_link_created", details=f"label={link.label}")
     database.session.commit()
+    invalidate_site_chrome()
     return link
 
 
@@ -60,6 +62,7 @@ def create_dropdown(label: str, order: int, children: list[dict], actor_user_id)
         details=f"label={parent.label} children={created}",
     )
     database.session.commit()
+    invalidate_site_chrome()
     return parent
 
 
@@ -77,6 +80,7 @@ def update_nav_link(link: NavLink, form, actor_user_id) -> NavLink:
 
     log_audit(actor_user_id=actor_user_id, action="cms_nav_link_updated", details=f"nav_link_id={link.id}")
     database.session.commit()
+    invalidate_site_chrome()
     return link
 
 
@@ -88,3 +92,4 @@ def set_nav_link_active(link: NavLink, is_active: bool, actor_user_id) -> None:
         details=f"nav_link_id={link.id} is_active={is_active}",
     )
     database.session.commit()
+    invalidate_site_chrome()
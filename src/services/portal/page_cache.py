@@ -0,0 +1,180 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from flask import make_response, request, session
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src import database
+from src.models import (
+    AppSetting,
+    Author,
+    Banner,
+    BoardMandate,
+    BoardMember,
+    Download,
+    Ministry,
+    MinistryMandate,
+    MinistryMandateMember,
+    MinistrySocialLink,
+    NavLink,
+    Photo,
+    Post,
+    SocialLink,
+    Tag,
+)
+
+# Cache de resposta das páginas públicas do portal. Quase todo acesso ao portal é de
+# leitor anônimo abrindo as mesmas poucas páginas (home, artigos, um artigo recente),
+# e o conteúdo só muda quando alguém salva alguma coisa no CMS -- então, em vez de
+# consultar e renderizar tudo de novo a cada hit, guarda o HTML pronto por URL e
+# reaproveita enquanto a "versão do conteúdo" não mudar.
+#
+# A versão é uma linha do app_settings (PORTAL_CONTENT_VERSION) que ganha um valor novo
+# no mesmo flush de qualquer escrita nos modelos do portal (ver _bump_on_cms_write) --
+# fica no banco, então vale pra todos os workers do gunicorn, e checar custa uma
+# consulta por chave primária em vez das ~10 de um render. Dela sai o ETag: navegador
+# com a versão atual leva 304 sem corpo nenhum. Sem Last-Modified -- a data da versão
+# não anda com a janela de PAGE_CACHE_MAX_AGE_SECONDS, e navegador que só manda
+# If-Modified-Since continuaria levando 304 depois que a janela virou.
+#
+# Só leitor anônimo e sem flash pendente usa o cache -- o topo do site mostra o nome de
+# quem está logado (base.html), e isso não pode vazar pra outra pessoa.
+CONTENT_VERSION_KEY = "PORTAL_CONTENT_VERSION"
+PAGE_CACHE_MAX_ENTRIES = 256  # LRU por worker -- query string inventada não enche a memória
+# teto de idade mesmo sem escrita no CMS: cobre o que não passa pelos modelos vigiados
+# (ex: nome de quem publicou, que vem de User). Entra no ETag como "janela" de tempo,
+# então vale igual pro cache do worker e pro do navegador.
+PAGE_CACHE_MAX_AGE_SECONDS = 10 * 60
+
+_CMS_MODELS = (
+    Author,
+    Banner,
+    BoardMandate,
+    BoardMember,
+    Download,
+    Ministry,
+    MinistryMandate,
+    MinistryMandateMember,
+    MinistrySocialLink,
+    NavLink,
+    Photo,
+    Post,
+    SocialLink,
+    Tag,
+)
+
+_lock = threading.Lock()
+_entries: OrderedDict[str, dict] = OrderedDict()
+
+
+def _is_cms_change(obj) -> bool:
+    if isinstance(obj, AppSetting):
+        # rodapé do portal mora no app_settings; a própria linha da versão não conta
+        return obj.key != CONTENT_VERSION_KEY
+    return isinstance(obj, _CMS_MODELS)
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_on_cms_write(session, flush_context, instances):
+    changed = list(session.new) + list(session.deleted) + [
+        obj for obj in session.dirty if session.is_modified(obj)
+    ]
+    if not any(_is_cms_change(obj) for obj in changed):
+        return
+
+    # valor aleatório em vez de contador: duas escritas simultâneas que leram o mesmo
+    # número não acabam gravando a mesma versão pra conteúdos diferentes
+    with session.no_autoflush:
+        setting = session.query(AppSetting).filter_by(key=CONTENT_VERSION_KEY).first()
+        if setting is None:
+            session.add(AppSetting(key=CONTENT_VERSION_KEY, value=uuid.uuid4().hex))
+        else:
+            setting.value = uuid.uuid4().hex
+
+
+def current_content_version() -> str | None:
+    """Versão do conteúdo do portal -- None se ainda não existe (nenhuma escrita no CMS
+    desde o deploy disto) ou se o banco falhou; aí a página não é cacheada."""
+    try:
+        setting = AppSetting.query.filter_by(key=CONTENT_VERSION_KEY).first()
+    except Exception:
+        database.session.rollback()
+        return None
+    if setting is None:
+        return None
+    return setting.value
+
+
+def _cacheable_request() -> bool:
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if current_user.is_authenticated:
+        return False
+    return not session.get("_flashes")
+
+
+def _conditional(response, etag: str):
+    response.set_etag(etag)
+    # navegador/CDN sempre revalida (barato: volta 304), e a resposta muda conforme o
+    # cookie de login
+    response.headers["Cache-Control"] = "public, no-cache"
+    response.vary.add("Cookie")
+    return response.make_conditional(request)
+
+
+def cached_page(view):
+    """Decorator das rotas públicas do portal -- ver comentário do topo do módulo.
+    Vai embaixo do @app.route. Só guarda resposta 200; 404 e afins passam direto."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _cacheable_request():
+            return view(*args, **kwargs)
+
+        version = current_content_version()
+        if version is None:
+            return view(*args, **kwargs)
+
+        cache_key = request.full_path
+        window = int(time.time() // PAGE_CACHE_MAX_AGE_SECONDS)
+        etag = hashlib.sha1(f"{version}:{window}:{cache_key}".encode()).hexdigest()
+
+        # já tem essa versão da página: nem olha o cache, responde 304 direto
+        if etag in request.if_none_match:
+            return _conditional(make_response("", 304), etag)
+
+        with _lock:
+            entry = _entries.get(cache_key)
+            if entry and entry["etag"] == etag:
+                _entries.move_to_end(cache_key)
+            else:
+                entry = None
+
+        if entry:
+            response = make_response(entry["body"], 200)
+            response.mimetype = entry["mimetype"]
+            return _conditional(response, etag)
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.direct_passthrough:
+            return response
+
+        with _lock:
+            _entries[cache_key] = {
+                "etag": etag,
+                "body": response.get_data(),
+                "mimetype": response.mimetype,
+            }
+            _entries.move_to_end(cache_key)
+            while len(_entries) > PAGE_CACHE_MAX_ENTRIES:
+                _entries.popitem(last=False)
+
+        return _conditional(response, etag)
+
+    return wrapper
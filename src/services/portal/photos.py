@@ -1,7 +1,7 @@
 from sqlalchemy import or_
 
 from src import database
-from src.controllers.b2_utils import delete_from_b2
+from src.controllers.b2_utils import RESPONSIVE_FORMATS, delete_from_b2, derived_image_key, responsive_widths
 from src.models import Banner, Ministry, Photo, Post
 from src.services.audit import log_audit
 from src.services.portal.uploads import save_image_upload
@@ -81,9 +81,15 @@ def find_photo_usages(photo: Photo) -> dict:
 def delete_photo(photo: Photo, actor_user_id) -> None:
     """
     Exclusão de verdade: apaga o arquivo do bucket e o registro no banco. Ao
-    contrário de ocultar (set_photo_active), isso não tem volta.
+    contrário de ocultar (set_photo_active), isso não tem volta. Leva junto as
+    variantes responsivas (srcset) geradas no upload, se a imagem tiver.
     """
     delete_from_b2(photo.image_key)
+    for width in responsive_widths(photo.image_key):
+        for fmt in RESPONSIVE_FORMATS:
+            variant_key = derived_image_key(photo.image_key, width, fmt)
+            if variant_key != photo.image_key:
+                delete_from_b2(variant_key)
 
     log_audit(
         actor_user_id=actor_user_id,
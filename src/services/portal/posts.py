@@ -1,30 +1,31 @@
 from datetime import datetime
 
+from sqlalchemy.orm import selectinload
+
 from src import database
-from src.controllers.slugify import gerar_slug
-from src.models import Ministry, Post, cms_post_tags
+from src.models import Ministry, Post, User, cms_post_tags
 from src.services.audit import log_audit
+from src.services.portal.chrome import invalidate_site_chrome
 from src.services.portal.photos import track_image
 from src.services.portal.sanitizer import sanitize_body
+from src.services.portal.slugs import assign_unique_slug
 from src.services.portal.tags import get_or_create_tags
 from src.services.portal.uploads import save_image_upload
 
 
-def _slug_taken(slug: str, ignore_id: int | None) -> bool:
-    query = Post.query.filter_by(slug=slug)
-    if ignore_id:
-        query = query.filter(Post.id != ignore_id)
-    return query.first() is not None
-
-
-def _unique_slug(title: str, ignore_id: int | None = None) -> str:
-    base = gerar_slug(title) or "post"
-    slug = base
-    suffix = 2
-    while _slug_taken(slug, ignore_id):
-        slug = f"{base}-{suffix}"
-        suffix += 1
-    return slug
+# Política de carregamento das listagens públicas. O card de artigo (post_card em
+# components/_macros.html) mostra o primeiro nome de quem publicou, que vem de
+# User -> Registration -- carregado preguiçoso, cada card disparava 2 consultas a mais.
+# Com selectinload, a listagem inteira custa um número fixo de consultas, não importa
+# quantos cards tenha. A página do artigo usa também autor, tags e ministério.
+POST_CARD_LOAD_OPTIONS = (
+    selectinload(Post.created_by).selectinload(User.registration),
+)
+POST_DETAIL_LOAD_OPTIONS = POST_CARD_LOAD_OPTIONS + (
+    selectinload(Post.author),
+    selectinload(Post.tags),
+    selectinload(Post.ministries),
+)
 
 
 def list_posts():
@@ -34,7 +35,7 @@ def list_posts():
 def list_published_posts(limit: int | None = None, exclude_ids: list | None = None):
     # post_type="artigo" (default do modelo) -- exclui páginas institucionais, que usam
     # o mesmo modelo Post mas não são "notícia" (ver list_pages/get_published_page_by_slug).
-    query = Post.query.filter_by(is_published=True, post_type="artigo")
+    query = Post.query.options(*POST_CARD_LOAD_OPTIONS).filter_by(is_published=True, post_type="artigo")
     if exclude_ids:
         query = query.filter(Post.id.notin_(exclude_ids))
     query = query.order_by(Post.created_at.desc())
@@ -50,6 +51,7 @@ def list_related_posts(post: Post, limit: int = 4):
     tag_ids = [t.id for t in post.tags]
     return (
         Post.query
+        .options(*POST_CARD_LOAD_OPTIONS)
         .join(cms_post_tags, Post.id == cms_post_tags.c.post_id)
         .filter(cms_post_tags.c.tag_id.in_(tag_ids))
         .filter(Post.id != post.id, Post.is_published.is_(True))
@@ -63,6 +65,7 @@ def list_related_posts(post: Post, limit: int = 4):
 def list_published_posts_paginated(page: int, per_page: int = 12):
     return (
         Post.query
+        .options(*POST_CARD_LOAD_OPTIONS)
         .filter_by(is_published=True, post_type="artigo")
         .order_by(Post.created_at.desc())
         .paginate(page=page, per_page=per_page, error_out=False)
@@ -70,7 +73,12 @@ def list_published_posts_paginated(page: int, per_page: int = 12):
 
 
 def get_published_post_by_slug(slug: str):
-    return Post.query.filter_by(slug=slug, is_published=True, post_type="artigo").first()
+    return (
+        Post.query
+        .options(*POST_DETAIL_LOAD_OPTIONS)
+        .filter_by(slug=slug, is_published=True, post_type="artigo")
+        .first()
+    )
 
 
 def get_posts_by_tag_slug(tag_slug: str, page: int, per_page: int):
@@ -82,6 +90,7 @@ def get_posts_by_tag_slug(tag_slug: str, page: int, per_page: int):
 
     pagination = (
         Post.query
+        .options(*POST_CARD_LOAD_OPTIONS)
         .join(cms_post_tags, Post.id == cms_post_tags.c.post_id)
         .filter(cms_post_tags.c.tag_id == tag.id, Post.is_published.is_(True), Post.post_type == "artigo")
         .order_by(Post.created_at.desc())
@@ -91,7 +100,11 @@ def get_posts_by_tag_slug(tag_slug: str, page: int, per_page: int):
 
 
 def list_posts_by_ministry(ministry: Ministry, limit: int | None = None):
-    query = Post.query.filter(Post.ministries.contains(ministry), Post.is_published.is_(True))
+    query = (
+        Post.query
+        .options(*POST_CARD_LOAD_OPTIONS)
+        .filter(Post.ministries.contains(ministry), Post.is_published.is_(True))
+    )
     query = query.order_by(Post.created_at.desc())
     if limit:
         query = query.limit(limit)
@@ -107,18 +120,18 @@ def create_post(form, created_by_user_id) -> Post:
     title = form.title.data.strip()
     post = Post(
         title=title,
-        slug=_unique_slug(title),
         summary=(form.summary.data or "").strip() or None,
         body=sanitize_body(form.body.data),
         category=(form.category.data or "").strip() or None,
         cover_image_key=cover_image_key,
-        tags=get_or_create_tags(form.tags.data),
         is_published=True,
         published_at=datetime.utcnow(),
         created_by_user_id=created_by_user_id,
     )
+    # slug antes das tags/ministério (ver assign_unique_slug)
+    assign_unique_slug(post, title, "post")
+    post.tags = get_or_create_tags(form.tags.data)
     post.ministry = _resolve_ministry(form.ministry_id.data)
-    database.session.add(post)
     log_audit(actor_user_id=created_by_user_id, action="cms_post_created", details=f"title={title}")
     database.session.commit()
 
@@ -135,7 +148,7 @@ def _resolve_ministry(ministry_id) -> Ministry | None:
 def update_post(post: Post, form, actor_user_id) -> Post:
     new_title = form.title.data.strip()
     if new_title != post.title:
-        post.slug = _unique_slug(new_title, ignore_id=post.id)
+        assign_unique_slug(post, new_title, "post")
     post.title = new_title
     post.summary = (form.summary.data or "").strip() or None
     post.body = sanitize_body(form.body.data)
@@ -168,6 +181,9 @@ def set_post_published(post: Post, is_published: bool, actor_user_id) -> None:
         details=f"post_id={post.id} is_published={is_published}",
     )
     database.session.commit()
+    if post.post_type == "pagina":
+        # item de menu pode apontar pra página (NavLink.page_id) -- muda o link exibido
+        invalidate_site_chrome()
 
 
 # ===== páginas institucionais (mesmo modelo Post, post_type="pagina") =====
@@ -193,7 +209,6 @@ def create_page(form, created_by_user_id) -> Post:
     title = form.title.data.strip()
     page = Post(
         title=title,
-        slug=_unique_slug(title),
         summary=(form.summary.data or "").strip() or None,
         body=sanitize_body(form.body.data),
         post_type="pagina",
@@ -202,7 +217,7 @@ def create_page(form, created_by_user_id) -> Post:
         published_at=datetime.utcnow(),
         created_by_user_id=created_by_user_id,
     )
-    database.session.add(page)
+    assign_unique_slug(page, title, "post")
     log_audit(actor_user_id=created_by_user_id, action="cms_page_created", details=f"title={title}")
     database.session.commit()
 
@@ -215,7 +230,7 @@ def create_page(form, created_by_user_id) -> Post:
 def update_page(page: Post, form, actor_user_id) -> Post:
     new_title = form.title.data.strip()
     if new_title != page.title:
-        page.slug = _unique_slug(new_title, ignore_id=page.id)
+        assign_unique_slug(page, new_title, "post")
     page.title = new_title
     page.summary = (form.summary.data or "").strip() or None
     page.body = sanitize_body(form.body.data)
@@ -227,6 +242,7 @@ def update_page(page: Post, form, actor_user_id) -> Post:
 
     log_audit(actor_user_id=actor_user_id, action="cms_page_updated", details=f"post_id={page.id}")
     database.session.commit()
+    invalidate_site_chrome()  # o slug pode ter mudado, e o menu linka pela página
 
     if new_cover_key:
         track_image(new_cover_key, caption=f"Capa: {page.title}", album="Páginas")
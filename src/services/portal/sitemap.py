@@ -0,0 +1,188 @@
+import hashlib
+import threading
+
+from flask import render_template, request, url_for
+
+from src import database
+from src.models import Ministry, Post, Tag
+from src.services.portal.page_cache import current_content_version
+
+# O sitemap é pedido por crawler o tempo todo, mas só muda quando alguém mexe no CMS.
+# Fica guardado pronto (bytes) por worker e só é refeito quando a versão do conteúdo
+# muda (a mesma do cache de páginas, ver page_cache.py). Mesmo aí, cada seção (artigos,
+# páginas, ministérios, tags) só é renderizada de novo se as linhas dela mudaram -- as
+# consultas pegam só as colunas que vão pro XML, não o objeto inteiro.
+#
+# O protocolo aceita até 50 mil URLs por arquivo. Passando de SITEMAP_CHUNK_SIZE no
+# total, /sitemap.xml vira um índice apontando pros arquivos de cada seção
+# (/sitemaps/artigos.xml, /sitemaps/artigos-2.xml, ...).
+SITEMAP_CHUNK_SIZE = 45_000  # margem abaixo do limite de 50 mil
+
+_lock = threading.Lock()
+_cache: dict = {"key": None, "files": {}, "root": None}
+_sections: dict[str, dict] = {}  # nome -> {"fingerprint", "chunks"} -- reaproveitado entre versões
+
+
+def _entry(endpoint, lastmod=None, changefreq="weekly", priority="0.5", **kwargs) -> dict:
+    return {
+        "loc": url_for(endpoint, _external=True, **kwargs),
+        "lastmod": lastmod.date().isoformat() if lastmod else None,
+        "changefreq": changefreq,
+        "priority": priority,
+    }
+
+
+def _fixed_rows() -> list:
+    return [
+        ("landing", "weekly", "0.8"),
+        ("portal_home", "daily", "1.0"),
+        ("portal_articles", "daily", "0.8"),
+        ("portal_ministries", "weekly", "0.6"),
+        ("portal_downloads", "weekly", "0.4"),
+        ("portal_galeria", "weekly", "0.4"),
+        ("portal_diretoria", "monthly", "0.5"),
+    ]
+
+
+def _fixed_urls(rows) -> list[dict]:
+    return [_entry(endpoint, changefreq=freq, priority=priority) for endpoint, freq, priority in rows]
+
+
+def _post_rows(post_type: str) -> list:
+    return (
+        database.session.query(Post.slug, Post.updated_at, Post.created_at)
+        .filter(Post.is_published.is_(True), Post.post_type == post_type)
+        .order_by(Post.id)
+        .all()
+    )
+
+
+def _article_urls(rows) -> list[dict]:
+    return [
+        _entry("portal_post_detail", slug=slug, lastmod=updated_at or created_at,
+               changefreq="monthly", priority="0.7")
+        for slug, updated_at, created_at in rows
+    ]
+
+
+def _page_urls(rows) -> list[dict]:
+    return [
+        _entry("portal_page_detail", slug=slug, lastmod=updated_at or created_at,
+               changefreq="monthly", priority="0.5")
+        for slug, updated_at, created_at in rows
+    ]
+
+
+def _ministry_rows() -> list:
+    return (
+        database.session.query(Ministry.slug, Ministry.updated_at)
+        .filter(Ministry.is_active.is_(True))
+        .order_by(Ministry.name)
+        .all()
+    )
+
+
+def _ministry_urls(rows) -> list[dict]:
+    return [
+        _entry("portal_ministry_detail", slug=slug, lastmod=updated_at,
+               changefreq="monthly", priority="0.5")
+        for slug, updated_at in rows
+    ]
+
+
+def _tag_rows() -> list:
+    return database.session.query(Tag.slug).order_by(Tag.id).all()
+
+
+def _tag_urls(rows) -> list[dict]:
+    return [_entry("portal_tag", slug=slug, changefreq="weekly", priority="0.3") for (slug,) in rows]
+
+
+# (nome do arquivo, consulta, rows -> urls) -- a ordem é a do sitemap final
+_SECTION_SPECS = (
+    ("geral", _fixed_rows, _fixed_urls),
+    ("artigos", lambda: _post_rows("artigo"), _article_urls),
+    ("paginas", lambda: _post_rows("pagina"), _page_urls),
+    ("ministerios", _ministry_rows, _ministry_urls),
+    ("tags", _tag_rows, _tag_urls),
+)
+
+
+def _fingerprint(host: str, rows) -> str:
+    digest = hashlib.sha1(host.encode())
+    for row in rows:
+        digest.update(repr(tuple(row)).encode())
+    return digest.hexdigest()
+
+
+def _section_chunks(name: str, load_rows, to_urls, host: str) -> list[list[dict]]:
+    rows = load_rows()
+    fingerprint = _fingerprint(host, rows)
+    cached = _sections.get(name)
+    if cached and cached["fingerprint"] == fingerprint:
+        return cached["chunks"]
+
+    urls = to_urls(rows)
+    chunks = [urls[i:i + SITEMAP_CHUNK_SIZE] for i in range(0, len(urls), SITEMAP_CHUNK_SIZE)] or [[]]
+    _sections[name] = {"fingerprint": fingerprint, "chunks": chunks}
+    return chunks
+
+
+def _render_urlset(urls: list[dict]) -> bytes:
+    return render_template("portal/sitemap.xml", urls=urls).encode("utf-8")
+
+
+def _build(host: str) -> tuple[bytes, dict[str, bytes]]:
+    section_chunks = [
+        (name, _section_chunks(name, load_rows, to_urls, host))
+        for name, load_rows, to_urls in _SECTION_SPECS
+    ]
+    total = sum(len(chunk) for _, chunks in section_chunks for chunk in chunks)
+
+    files = {}
+    for name, chunks in section_chunks:
+        for number, chunk in enumerate(chunks, start=1):
+            files[name if number == 1 else f"{name}-{number}"] = chunk
+
+    if total <= SITEMAP_CHUNK_SIZE:
+        root = _render_urlset([url for chunk in files.values() for url in chunk])
+        return root, {}
+
+    rendered = {name: _render_urlset(urls) for name, urls in files.items() if urls}
+    index = render_template(
+        "portal/sitemap_index.xml",
+        sitemaps=[url_for("portal_sitemap_section", name=name, _external=True) for name in rendered],
+    ).encode("utf-8")
+    return index, rendered
+
+
+def _with_etag(body: bytes) -> tuple[bytes, str]:
+    return body, hashlib.sha1(body).hexdigest()
+
+
+def _current(host: str) -> tuple[tuple[bytes, str], dict[str, tuple[bytes, str]]]:
+    key = (current_content_version(), host)
+
+    # monta dentro do lock: vários crawlers chegando juntos logo depois de uma edição
+    # esperam um único rebuild em vez de cada um fazer o seu
+    with _lock:
+        if _cache["key"] != key:
+            root, files = _build(host)
+            _cache.update(
+                key=key,
+                root=_with_etag(root),
+                files={name: _with_etag(body) for name, body in files.items()},
+            )
+        return _cache["root"], _cache["files"]
+
+
+def get_sitemap() -> tuple[bytes, str]:
+    """(XML de /sitemap.xml, ETag) -- urlset com tudo, ou o índice quando dividido."""
+    root, _ = _current(request.host_url)
+    return root
+
+
+def get_sitemap_section(name: str) -> tuple[bytes, str] | None:
+    """Um arquivo filho do índice -- None se o sitemap não está dividido ou o nome não existe."""
+    _, files = _current(request.host_url)
+    return files.get(name)
@@ -0,0 +1,76 @@
+import re
+
+from sqlalchemy.exc import IntegrityError
+
+from src import database
+from src.controllers.slugify import gerar_slug
+
+# Slug único de post/página/ministério: "culto-de-domingo", "culto-de-domingo-2"...
+#
+# Antes era um SELECT por tentativa (base, base-2, base-3...) -- com vinte "Culto de
+# domingo" eram vinte consultas pra criar o vigésimo primeiro. Agora uma consulta só
+# traz todos os slugs "base" e "base-N" já usados e a conta do primeiro livre é feita
+# aqui. Entre essa consulta e o INSERT outro cadastro pode pegar o mesmo slug: o
+# flush vai num SAVEPOINT e, se o banco recusar pelo unique do slug, calcula de novo
+# (a consulta nova já enxerga o outro) -- sem ficar sondando um por um.
+SLUG_ATTEMPTS = 5
+
+
+def next_free_slug(model, text: str, fallback: str, ignore_id: int | None = None) -> str:
+    """Primeiro slug livre de `text` na tabela de `model` (base, base-2, base-3...)."""
+    base = gerar_slug(text) or fallback
+    query = database.session.query(model.slug).filter(
+        (model.slug == base) | model.slug.startswith(f"{base}-", autoescape=True)
+    )
+    if ignore_id:
+        query = query.filter(model.id != ignore_id)
+
+    # a instância que vai receber o slug pode estar na sessão ainda sem ele -- o
+    # autoflush tentaria gravá-la antes da hora
+    with database.session.no_autoflush:
+        existing = [slug for (slug,) in query]
+
+    suffix_pattern = re.compile(rf"{re.escape(base)}-(\d+)")
+    taken = set()
+    for slug in existing:
+        if slug == base:
+            taken.add(1)
+        else:
+            match = suffix_pattern.fullmatch(slug)
+            if match:  # "base-especial" também cai no prefixo, mas não ocupa número
+                taken.add(int(match.group(1)))
+
+    if 1 not in taken:
+        return base
+    suffix = 2
+    while suffix in taken:
+        suffix += 1
+    return f"{base}-{suffix}"
+
+
+def _is_slug_conflict(error: IntegrityError) -> bool:
+    # Postgres: 'unique constraint "cms_posts_slug_key"'; SQLite: 'UNIQUE constraint
+    # failed: cms_posts.slug'
+    return "slug" in str(error.orig).lower()
+
+
+def assign_unique_slug(instance, text: str, fallback: str) -> str:
+    """
+    Põe em `instance.slug` o primeiro slug livre de `text` e grava (flush) -- a
+    instância entra na sessão se ainda não estava. O commit continua com quem chamou.
+    Instância nova: chamar antes de ligar os relacionamentos (tags, ministério), que o
+    savepoint grava o que já está pendente na sessão antes de abrir.
+    """
+    model = type(instance)
+    for _ in range(SLUG_ATTEMPTS):
+        instance.slug = next_free_slug(model, text, fallback, ignore_id=instance.id)
+        try:
+            with database.session.begin_nested():
+                database.session.add(instance)
+        except IntegrityError as error:
+            if not _is_slug_conflict(error):
+                raise
+            continue  # outro cadastro levou esse slug no meio do caminho
+        return instance.slug
+
+    raise RuntimeError(f"Não foi possível reservar um slug para {text!r}.")
@@ -1,6 +1,7 @@
 from src import database
 from src.models import SocialLink
 from src.services.audit import log_audit
+from src.services.portal.chrome import invalidate_site_chrome
 
 # ícones SVG inline (24x24, monocromático via currentColor) — sem CDN de biblioteca
 # de ícones só pra um punhado de logos fixas que nunca mudam.
@@ -36,6 +37,7 @@ def create_social_link(form, actor_user_id) -> SocialLink:
     database.session.add(link)
     log_audit(actor_user_id=actor_user_id, action="cms_social_link_created", details=f"platform={link.platform}")
     database.session.commit()
+    invalidate_site_chrome()
     return link
 
 
@@ -46,6 +48,7 @@ def update_social_link(link: SocialLink, form, actor_user_id) -> SocialLink:
 
     log_audit(actor_user_id=actor_user_id, action="cms_social_link_updated", details=f"social_link_id={link.id}")
     database.session.commit()
+    invalidate_site_chrome()
     return link
 
 
@@ -57,3 +60,4 @@ def set_social_link_active(link: SocialLink, is_active: bool, actor_user_id) ->
         details=f"social_link_id={link.id} is_active={is_active}",
     )
     database.session.commit()
+    invalidate_site_chrome()
@@ -1,3 +1,6 @@
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
 from src import database
 from src.controllers.slugify import gerar_slug
 from src.models import Tag
@@ -21,20 +24,73 @@ def parse_tag_names(raw: str) -> list[str]:
     return names
 
 
+def _dialect() -> str:
+    return database.session.get_bind().dialect.name
+
+
+def _insert_missing_tags(rows: list[dict]) -> None:
+    # outro post salvo ao mesmo tempo pode criar a mesma tag entre o SELECT e o INSERT:
+    # ON CONFLICT DO NOTHING deixa a dele e a consulta seguinte acha -- sem erro nem
+    # rollback da transação de quem está salvando
+    dialect = _dialect()
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        database.session.execute(insert(Tag).values(rows).on_conflict_do_nothing())
+        return
+
+    # outro banco: uma por vez num savepoint, e a que já existe fica como está
+    for row in rows:
+        try:
+            with database.session.begin_nested():
+                database.session.execute(database.insert(Tag).values(row))
+        except IntegrityError:
+            continue
+
+
+def get_or_create_tags_bulk(raws) -> list[list[Tag]]:
+    """
+    get_or_create_tags de vários posts de uma vez (importação em lote): recebe o texto
+    das tags de cada post e devolve as Tags de cada um, na mesma ordem. Custa um
+    SELECT ... IN com todos os slugs, um INSERT só com as que faltam e um SELECT das
+    criadas -- não importa quantos posts nem quantas tags.
+    """
+    wanted = []  # por post: slugs na ordem digitada, sem repetir
+    names = {}  # slug -> primeiro nome digitado, que é o que fica cadastrado
+    for raw in raws:
+        slugs = []
+        for name in parse_tag_names(raw):
+            slug = gerar_slug(name)
+            # "Jovens" e "jovens!" dão o mesmo slug: uma tag só no post
+            if slug and slug not in slugs:
+                slugs.append(slug)
+                names.setdefault(slug, name)
+        wanted.append(slugs)
+
+    tags = {}
+    if names:
+        tags = {tag.slug: tag for tag in Tag.query.filter(Tag.slug.in_(list(names)))}
+
+    missing = [slug for slug in names if slug not in tags]
+    if missing:
+        _insert_missing_tags([{"name": names[slug], "slug": slug} for slug in missing])
+        # pelo nome também: tag antiga com esse nome e slug diferente (renomeada) barra
+        # o INSERT pelo unique do nome -- aí usa ela
+        slug_by_name = {names[slug]: slug for slug in missing}
+        for tag in Tag.query.filter(or_(Tag.slug.in_(missing), Tag.name.in_(list(slug_by_name)))):
+            if tag.slug in names:
+                tags[tag.slug] = tag
+            else:
+                tags.setdefault(slug_by_name[tag.name], tag)
+
+    return [[tags[slug] for slug in slugs if slug in tags] for slugs in wanted]
+
+
 def get_or_create_tags(raw: str) -> list[Tag]:
     """Encontra pelo slug ou cria — evita 'Jovens' e 'jovens' virarem tags diferentes."""
-    tags = []
-    for name in parse_tag_names(raw):
-        slug = gerar_slug(name)
-        if not slug:
-            continue
-        tag = Tag.query.filter_by(slug=slug).first()
-        if not tag:
-            tag = Tag(name=name, slug=slug)
-            database.session.add(tag)
-            database.session.flush()
-        tags.append(tag)
-    return tags
+    return get_or_create_tags_bulk([raw])[0]
 
 
 def tags_to_text(tags) -> str:
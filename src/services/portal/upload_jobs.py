@@ -0,0 +1,159 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image
+
+from src import app, database
+from src.controllers.b2_utils import responsive_key_name, upload_to_b2
+from src.services.audit import log_audit
+from src.services.portal.uploads import (
+    IMAGE_MAX_DIMENSION,
+    image_display_width,
+    new_key_name,
+    render_image_set,
+    upload_extension,
+)
+
+# Fila de upload em segundo plano: a requisição só lê o arquivo pra memória, valida o
+# cabeçalho e devolve a key final na hora -- o Pillow (decode/resize/encode) e a ida ao
+# B2 rodam num pool pequeno de threads do próprio worker, em vez de segurar o worker do
+# gunicorn até o B2 responder.
+#
+# O estado dos jobs vive em memória, no processo que recebeu o upload: serve pro deploy
+# atual (gunicorn com 1 worker, ver Procfile). Com mais workers, a consulta de status
+# pode cair num processo que não conhece o job -- aí precisa de um estado compartilhado.
+#
+# Falha passageira do B2 (503, 429, rede) já é repetida dentro do upload_to_b2 (ver
+# _call_with_retry em b2_utils) -- o job não repete de novo por cima.
+UPLOAD_WORKERS = 2
+UPLOAD_JOB_TTL_SECONDS = 60 * 60  # jobs terminados somem do registro depois disso
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload-job")
+_jobs_lock = threading.Lock()
+_jobs: dict[str, dict] = {}
+
+
+def _set_job(job_id: str, **fields) -> None:
+    if fields.get("status") in (STATUS_DONE, STATUS_FAILED):
+        fields["finished_at"] = time.time()
+    with _jobs_lock:
+        _jobs[job_id].update(fields)
+
+
+def _prune_finished_jobs() -> None:
+    # só os terminados: job na fila ou rodando há mais de uma hora (fila cheia, B2
+    # lento) ainda vai terminar, e o editor continua perguntando por ele
+    limit = time.time() - UPLOAD_JOB_TTL_SECONDS
+    with _jobs_lock:
+        for job_id in [j for j, job in _jobs.items() if job["finished_at"] and job["finished_at"] < limit]:
+            del _jobs[job_id]
+
+
+def get_job(job_id: str) -> dict | None:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+
+def _record_failure(job_id: str, key: str, exc: Exception) -> None:
+    error = str(exc) or exc.__class__.__name__
+    _set_job(job_id, status=STATUS_FAILED, error=error)
+    # fica também na auditoria -- o registro em memória some com o TTL/restart do worker
+    try:
+        with app.app_context():
+            log_audit(action="cms_upload_failed", details=f"job_id={job_id} key={key} error={error[:200]}")
+            database.session.commit()
+    except Exception:
+        app.logger.exception("Upload %s: não deu pra registrar a falha na auditoria.", job_id)
+
+
+def _run_job(job_id: str, build_files, key_name: str, folder: str, on_success) -> None:
+    """Roda no pool. Erro de imagem (Pillow) ou de envio (que o upload_to_b2 já
+    tentou de novo) marca o job como falho e vai pra auditoria.
+
+    `build_files()` devolve [(key_name, arquivo), ...] -- a imagem principal e as
+    variantes responsivas, ou um arquivo só pra upload comum."""
+    key = f"{folder}/{key_name}" if folder else key_name
+    try:
+        _set_job(job_id, status=STATUS_RUNNING)
+        files = build_files()
+    except Exception as exc:
+        app.logger.exception("Upload %s: falha ao processar o arquivo.", job_id)
+        _record_failure(job_id, key, exc)
+        return
+
+    try:
+        for name, buffer in files:
+            upload_to_b2(name, buffer, folder=folder)
+    except Exception as exc:
+        app.logger.exception("Upload %s: falha ao enviar pro B2.", job_id)
+        _record_failure(job_id, key, exc)
+        return
+
+    if on_success:
+        # callback mexe no banco (ex: registrar na Galeria) -- precisa de app context
+        # próprio, a requisição que criou o job já terminou faz tempo.
+        try:
+            with app.app_context():
+                on_success(key)
+        except Exception:
+            app.logger.exception("Upload %s: arquivo enviado, mas o pós-processamento falhou.", job_id)
+
+    _set_job(job_id, status=STATUS_DONE)
+
+
+def _enqueue(build_files, key_name: str, folder: str, on_success=None) -> dict:
+    _prune_finished_jobs()
+
+    job_id = uuid.uuid4().hex
+    key = f"{folder}/{key_name}" if folder else key_name
+    job = {
+        "id": job_id,
+        "key": key,
+        "status": STATUS_PENDING,
+        "error": None,
+        "created_at": time.time(),
+        "finished_at": None,
+    }
+    with _jobs_lock:
+        _jobs[job_id] = job
+
+    _executor.submit(_run_job, job_id, build_files, key_name, folder, on_success)
+    return dict(job)
+
+
+def enqueue_image_upload(file_storage, folder: str, max_dimension: int = IMAGE_MAX_DIMENSION, on_success=None) -> dict:
+    """
+    Versão em segundo plano de save_image_upload: devolve o job (com a key final já
+    definida) sem esperar o resize nem o B2. Abre só o cabeçalho da imagem aqui, ainda
+    na requisição -- arquivo que não é imagem (ou bomba de descompressão) continua sendo
+    recusado na hora pelos handlers globais de src/__init__.py.
+
+    `on_success(key)` roda depois do envio, dentro de um app context -- ex: track_image.
+    """
+    data = file_storage.read()
+    with Image.open(BytesIO(data)) as header:
+        key_name = responsive_key_name(uuid.uuid4().hex, image_display_width(header, max_dimension))
+
+    return _enqueue(
+        lambda: render_image_set(BytesIO(data), key_name, max_dimension),
+        key_name,
+        folder,
+        on_success,
+    )
+
+
+def enqueue_upload(file_storage, folder: str, on_success=None) -> dict:
+    """Versão em segundo plano de save_upload (arquivo enviado como veio)."""
+    data = file_storage.read()
+    key_name = new_key_name(upload_extension(file_storage))
+    return _enqueue(lambda: [(key_name, BytesIO(data))], key_name, folder, on_success)
+
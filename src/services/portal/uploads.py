@@ -1,24 +1,106 @@
 import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
 from io import BytesIO
 
-from PIL import Image, ImageOps
+from PIL import ExifTags, Image, ImageOps
 
-from src.controllers.b2_utils import upload_to_b2
+from src.controllers.b2_utils import (
+    RESPONSIVE_FORMATS,
+    derived_image_key,
+    responsive_key_name,
+    responsive_widths,
+    upload_to_b2,
+)
 
 IMAGE_MAX_DIMENSION = 1600
 IMAGE_JPEG_QUALITY = 80
+IMAGE_WEBP_QUALITY = 75
+IMAGE_UPLOAD_THREADS = 6  # envios ao B2 em paralelo da imagem principal + variantes
 
+_upload_executor = ThreadPoolExecutor(max_workers=IMAGE_UPLOAD_THREADS, thread_name_prefix="image-upload")
 
-def save_upload(file_storage, folder: str) -> str:
-    """Envia um FileStorage pro B2 com um nome único e retorna a key salva."""
-    ext = ""
+
+def upload_extension(file_storage) -> str:
+    """'.pdf', '.png'... a partir do nome original, ou '' se não tiver extensão."""
     if file_storage.filename and "." in file_storage.filename:
-        ext = "." + file_storage.filename.rsplit(".", 1)[1].lower()
+        return "." + file_storage.filename.rsplit(".", 1)[1].lower()
+    return ""
+
+
+def new_key_name(ext: str) -> str:
+    return f"{uuid.uuid4().hex}{ext}"
 
-    key_name = f"{uuid.uuid4().hex}{ext}"
+
+def save_upload(file_storage, folder: str) -> str:
+    """Envia um FileStorage pro B2 com um nome único e retorna a key salva."""
+    key_name = new_key_name(upload_extension(file_storage))
     return upload_to_b2(key_name, file_storage, folder=folder)
 
 
+def _encode(image, fmt: str) -> BytesIO:
+    buffer = BytesIO()
+    if fmt == "webp":
+        image.save(buffer, format="WEBP", quality=IMAGE_WEBP_QUALITY, method=4)
+    else:
+        image.save(buffer, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+    buffer.seek(0)
+    return buffer
+
+
+def image_display_width(image, max_dimension: int = IMAGE_MAX_DIMENSION) -> int:
+    """
+    Largura que `image` (aberta, ainda sem decodificar) vai ter depois de girar pelo
+    EXIF e caber em max_dimension x max_dimension -- só o cabeçalho, sem Pillow pesado.
+    Vai no nome da key (responsive_key_name): é a maior largura do srcset.
+    """
+    width, height = image.size
+    if image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+        width, height = height, width  # foto de celular "deitada" no arquivo
+    if width <= max_dimension and height <= max_dimension:
+        return width
+    if width >= height:
+        return max_dimension
+    return max(1, width * max_dimension // height)
+
+
+def _prepared_image(image, key_name: str, max_dimension: int):
+    image = ImageOps.exif_transpose(image)  # corrige rotação de fotos de celular
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    # key com variantes: a largura do nome manda (foto em pé de 1600px de altura fica
+    # com a largura que a key diz, não com 1600)
+    widths = responsive_widths(key_name)
+    image.thumbnail((widths[-1] if widths else max_dimension, max_dimension), Image.LANCZOS)
+    return image
+
+
+def _image_variant_files(image, key_name: str) -> list[tuple[str, BytesIO]]:
+    """Variantes responsivas de `image` (já reduzida): WebP e JPEG em cada largura de
+    responsive_widths(key_name), menos o JPEG na largura máxima, que é a própria key."""
+    files = []
+    for width in responsive_widths(key_name):
+        # limita só a largura (o srcset descreve largura) -- todas ficam abaixo da
+        # largura da imagem, então nenhuma sai maior do que diz o rótulo
+        variant = image.copy()
+        variant.thumbnail((width, variant.height), Image.LANCZOS)
+        for fmt in RESPONSIVE_FORMATS:
+            variant_name = derived_image_key(key_name, width, fmt)
+            if variant_name != key_name:
+                files.append((variant_name, _encode(variant, fmt)))
+    return files
+
+
+def render_image_set(fileobj, key_name: str, max_dimension: int = IMAGE_MAX_DIMENSION) -> list[tuple[str, BytesIO]]:
+    """
+    Redimensiona pro tamanho máximo de exibição, recomprime como JPEG e gera as
+    variantes responsivas (WebP e JPEG em cada largura de RESPONSIVE_WIDTHS até a
+    largura da key). Devolve [(key_name, arquivo), ...] com a imagem principal primeiro.
+    """
+    image = _prepared_image(Image.open(fileobj), key_name, max_dimension)
+    return [(key_name, _encode(image, "jpg"))] + _image_variant_files(image, key_name)
+
+
 def save_image_upload(file_storage, folder: str, max_dimension: int = IMAGE_MAX_DIMENSION) -> str:
     """
     Como save_upload, mas pra imagens exibidas no site (capa de artigo, foto de
@@ -29,17 +111,19 @@ def save_image_upload(file_storage, folder: str, max_dimension: int = IMAGE_MAX_
     `max_dimension` é ajustável pra quem precisa de mais resolução que o padrão --
     o banner do carrossel, por exemplo, ocupa a largura inteira da tela (pode passar
     de 1600px em monitores grandes), então usa um teto maior pra não borrar.
-    """
-    image = Image.open(file_storage)
-    image = ImageOps.exif_transpose(image)  # corrige rotação de fotos de celular
-    if image.mode not in ("RGB", "L"):
-        image = image.convert("RGB")
-
-    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
 
-    buffer = BytesIO()
-    image.save(buffer, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
-    buffer.seek(0)
-
-    key_name = f"{uuid.uuid4().hex}.jpg"
-    return upload_to_b2(key_name, buffer, folder=folder)
+    Também envia as variantes menores (srcset, ~10 arquivos ao lado da key principal)
+    -- os templates montam o srcset e o <source> WebP só a partir da key, sem conferir
+    se os arquivos existem, e o navegador não volta pro src quando a variante dá 404.
+    Por isso a key só é devolvida (e salva por quem chamou) com tudo já no B2. Os
+    envios vão em paralelo: a espera é a do mais lento, não a soma dos onze.
+    """
+    key_name = responsive_key_name(uuid.uuid4().hex, image_display_width(Image.open(file_storage), max_dimension))
+    file_storage.seek(0)
+    uploads = [
+        _upload_executor.submit(upload_to_b2, name, buffer, folder=folder)
+        for name, buffer in render_image_set(file_storage, key_name, max_dimension)
+    ]
+    wait(uploads)  # se um falhar, o erro só sobe depois que os outros terminaram
+    keys = [upload.result() for upload in uploads]  # relança o erro de qualquer envio
+    return keys[0]  # a principal vem primeiro
@@ -0,0 +1,53 @@
+import uuid
+
+from PIL import Image, UnidentifiedImageError
+
+from src.controllers.b2_utils import proof_thumbnail_key, upload_stream_to_b2, upload_to_b2
+from src.services.portal.uploads import render_image_set
+
+# Comprovantes de Pix enviados pelo próprio participante no painel (antes iam por
+# WhatsApp e o revisor juntava na mão).
+#
+# Cada inscrição tem a sua pasta no B2 (comprovantes/<id da inscrição>/) e cada envio
+# ganha um uuid -- reenviar não sobrescreve o anterior, o caminho antigo fica na
+# auditoria. Foto passa pelo mesmo Pillow do CMS (render_image_set): gira pelo EXIF,
+# reduz pra PROOF_MAX_DIMENSION e vira JPEG -- a foto de 8MB do celular chega com
+# algumas centenas de KB, ainda legível. Junto vai uma miniatura ("<key>_thumb.jpg"),
+# que o admin mostra direto na revisão. PDF vai como veio, direto do arquivo
+# temporário do upload pro B2 (sem ler tudo pra memória), e não tem miniatura.
+PROOF_FOLDER = "comprovantes"
+PROOF_MAX_DIMENSION = 2000  # comprovante tem letra miúda -- mais que os 1600 do site
+PROOF_THUMB_DIMENSION = 320
+_PDF_MAGIC = b"%PDF-"
+
+
+def _is_pdf(file_storage) -> bool:
+    file_storage.stream.seek(0)
+    header = file_storage.stream.read(len(_PDF_MAGIC))
+    file_storage.stream.seek(0)
+    return header == _PDF_MAGIC
+
+
+def store_proof(file_storage, registration_id: int) -> str:
+    """
+    Envia o comprovante pro B2 e devolve a key salva. Confere pelo conteúdo, não pela
+    extensão: só aceita PDF de verdade ou imagem que o Pillow abre -- ValueError pro
+    resto (arquivo renomeado, corrompido, imagem gigante demais).
+    """
+    folder = f"{PROOF_FOLDER}/{registration_id}"
+
+    if _is_pdf(file_storage):
+        return upload_stream_to_b2(f"{uuid.uuid4().hex}.pdf", file_storage.stream, folder=folder,
+                                   content_type="application/pdf")
+
+    key_name = f"{uuid.uuid4().hex}.jpg"
+    try:
+        [(_, image)] = render_image_set(file_storage.stream, key_name, PROOF_MAX_DIMENSION)
+        # a miniatura sai da imagem já reduzida, não do original
+        [(_, thumbnail)] = render_image_set(image, proof_thumbnail_key(key_name), PROOF_THUMB_DIMENSION)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as exc:
+        raise ValueError("Arquivo não é um PDF ou imagem válida.") from exc
+
+    key = upload_to_b2(key_name, image, folder=folder)
+    upload_to_b2(proof_thumbnail_key(key_name), thumbnail, folder=folder)
+    return key
@@ -0,0 +1,264 @@
+import csv
+import io
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from src import database
+from src.controllers.validators import only_digits
+from src.models import Registration
+from src.services.pix import calculate_installment_amount
+from src.services.registration import STATUS_AGUARDANDO
+from src.utils.texto import normalizar_nome
+
+# Conciliação do extrato do banco (OFX ou CSV) com as inscrições Pix aguardando
+# confirmação -- o revisor sobe o extrato e recebe a lista de "esse crédito é dessa
+# inscrição", pronta pra confirmar em lote, em vez de bater linha por linha na mão.
+#
+# Dá pra casar porque todo valor de Pix termina em 0,09 (calculate_installment_amount)
+# e as parcelas são 1, 2 ou 4: um crédito de R$ 100,09 só pode ser parcela de quem
+# escolheu 2x. As inscrições pendentes viram índices em memória (uma consulta só) e
+# cada linha do extrato é resolvida com consultas a dicionário, na ordem:
+#   1. txid "R<id>N<parcelas>" (QR dinâmico, ver generate_dynamic_qr) na descrição;
+#   2. CPF do inscrito na descrição, com o valor batendo;
+#   3. nome do inscrito na descrição (sem acento), com o valor batendo -- nome completo
+#      ou primeiro + último nome, que é como muito banco corta;
+#   4. só o valor, se exatamente uma inscrição pendente espera esse valor.
+# Mais de uma inscrição possível = "ambígua", fica pro revisor. Nada é confirmado aqui:
+# o resultado só alimenta a revisão em lote (bulk_review_registrations).
+TXID_PATTERN = re.compile(r"R(\d+)N([124])\b")
+_CPF_PATTERN = re.compile(r"\d{3}\.?\d{3}\.?\d{3}-?\d{2}")
+_MAX_NAME_WORDS = 12  # descrição longa: só as primeiras palavras entram na busca por nome
+
+MATCH_TXID = "txid"
+MATCH_CPF = "cpf"
+MATCH_NAME = "nome"
+MATCH_AMOUNT = "valor"
+
+# nomes de coluna aceitos no CSV (já sem acento e minúsculos) -- cada banco exporta
+# de um jeito
+_CSV_DATE_COLUMNS = ("data", "data lancamento", "data movimento", "date", "dt")
+_CSV_AMOUNT_COLUMNS = ("valor", "valor r", "valor rs", "amount", "credito", "entrada")
+_CSV_DESCRIPTION_COLUMNS = ("descricao", "historico", "lancamento", "memo", "detalhes", "description", "nome")
+_CSV_ID_COLUMNS = ("id", "identificador", "documento", "fitid", "id transacao", "codigo")
+
+
+class StatementError(ValueError):
+    """Extrato que não dá pra ler (formato desconhecido, sem coluna de valor...)."""
+
+
+def _parse_amount(text: str) -> Decimal | None:
+    """'1.234,56', '1234.56', 'R$ 100,09', '-50,09' -> Decimal (None se não for número)."""
+    value = re.sub(r"[^\d,.\-]", "", text or "")
+    if "," in value:
+        value = value.replace(".", "").replace(",", ".")  # formato brasileiro
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return None
+
+
+def _parse_date(text: str):
+    text = (text or "").strip()
+    for fmt, size in (("%Y%m%d", 8), ("%d/%m/%Y", 10), ("%Y-%m-%d", 10), ("%d/%m/%y", 8)):
+        try:
+            return datetime.strptime(text[:size], fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _ofx_field(block: str, tag: str) -> str:
+    # OFX 1.x é SGML: <TAG>valor sem fechar; OFX 2.x fecha. Os dois caem aqui.
+    match = re.search(rf"<{tag}>([^<\r\n]*)", block, re.IGNORECASE)
+    return match.group(1).strip() if match else ""
+
+
+def _parse_ofx(text: str) -> list[dict]:
+    lines = []
+    for block in re.findall(r"<STMTTRN>(.*?)(?=</STMTTRN>|<STMTTRN>|</BANKTRANLIST>)", text, re.IGNORECASE | re.DOTALL):
+        lines.append({
+            "id": _ofx_field(block, "FITID"),
+            "date": _parse_date(_ofx_field(block, "DTPOSTED")),
+            "amount": _parse_amount(_ofx_field(block, "TRNAMT")),
+            "description": " ".join(filter(None, (_ofx_field(block, "NAME"), _ofx_field(block, "MEMO")))),
+        })
+    return lines
+
+
+def _find_column(header: list[str], names: tuple) -> int | None:
+    normalized = [normalizar_nome(column) for column in header]
+    for name in names:
+        if name in normalized:
+            return normalized.index(name)
+    return None
+
+
+def _parse_csv(text: str) -> list[dict]:
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=";,\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(io.StringIO(text), dialect)
+
+    header = next(reader, None) or []
+    amount_col = _find_column(header, _CSV_AMOUNT_COLUMNS)
+    if amount_col is None:
+        raise StatementError("CSV sem coluna de valor (esperava \"Valor\", \"Amount\"...).")
+    date_col = _find_column(header, _CSV_DATE_COLUMNS)
+    description_col = _find_column(header, _CSV_DESCRIPTION_COLUMNS)
+    id_col = _find_column(header, _CSV_ID_COLUMNS)
+
+    def cell(row, col):
+        return row[col] if col is not None and col < len(row) else ""
+
+    lines = []
+    for number, row in enumerate(reader, start=2):
+        if not any(row):
+            continue
+        lines.append({
+            "id": cell(row, id_col) or f"linha {number}",
+            "date": _parse_date(cell(row, date_col)),
+            "amount": _parse_amount(cell(row, amount_col)),
+            "description": cell(row, description_col) or " ".join(row),
+        })
+    return lines
+
+
+def parse_statement(data: bytes, filename: str = "") -> list[dict]:
+    """Linhas do extrato: [{"id", "date", "amount" (Decimal ou None), "description"}]."""
+    for encoding in ("utf-8-sig", "latin-1"):
+        try:
+            text = data.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+
+    if filename.lower().endswith(".ofx") or "<STMTTRN>" in text.upper():
+        lines = _parse_ofx(text)
+    else:
+        lines = _parse_csv(text)
+    if not lines:
+        raise StatementError("Nenhum lançamento encontrado no extrato.")
+    return lines
+
+
+def _expected_amounts(row) -> set[Decimal]:
+    # a parcela escolhida e, pra quem parcelou, o valor cheio (pagou tudo de uma vez)
+    installments = int(row.installments or 1)
+    amounts = {calculate_installment_amount(row.lot_value_cents, installments)}
+    if installments > 1:
+        amounts.add(calculate_installment_amount(row.lot_value_cents, 1))
+    return amounts
+
+
+def _name_keys(normalized_name: str) -> set[str]:
+    words = normalized_name.split()
+    keys = {" ".join(words)} if words else set()
+    if len(words) >= 2:
+        keys.add(f"{words[0]} {words[-1]}")
+    return keys
+
+
+class _PendingIndex:
+    """As inscrições Pix pendentes indexadas por id, valor, (valor, CPF) e (valor, nome)."""
+
+    def __init__(self, rows):
+        self.by_id = {}
+        self.by_amount: dict[Decimal, list] = {}
+        self.by_amount_cpf: dict[tuple, list] = {}
+        self.by_amount_name: dict[tuple, list] = {}
+        for row in rows:
+            self.by_id[row.id] = row
+            for amount in _expected_amounts(row):
+                self.by_amount.setdefault(amount, []).append(row)
+                if row.cpf_digits:
+                    self.by_amount_cpf.setdefault((amount, row.cpf_digits), []).append(row)
+                for key in _name_keys(normalizar_nome(row.full_name)):
+                    self.by_amount_name.setdefault((amount, key), []).append(row)
+
+    def name_candidates(self, amount: Decimal, description: str) -> list:
+        # todo trecho contínuo de palavras da descrição (e o primeiro + último de cada
+        # trecho) é uma chave possível -- custo pelo tamanho da descrição, não pelo
+        # número de inscrições
+        words = normalizar_nome(description).split()[:_MAX_NAME_WORDS]
+        found = {}
+        for start in range(len(words)):
+            for end in range(start + 1, len(words)):
+                for key in (" ".join(words[start:end + 1]), f"{words[start]} {words[end]}"):
+                    for row in self.by_amount_name.get((amount, key), ()):
+                        found[row.id] = row
+        return list(found.values())
+
+
+def _load_pending_index() -> _PendingIndex:
+    rows = database.session.execute(
+        database.select(
+            Registration.id, Registration.full_name, Registration.cpf_digits,
+            Registration.installments, Registration.lot_value_cents, Registration.proof_file_path,
+        )
+        .where(Registration.payment_type == "pix", Registration.status == STATUS_AGUARDANDO)
+    ).all()
+    return _PendingIndex(rows)
+
+
+def _match_line(line: dict, index: _PendingIndex) -> tuple[str | None, list]:
+    """(como casou, inscrições candidatas) de uma linha do extrato."""
+    amount = line["amount"]
+    description = line["description"] or ""
+
+    txid = TXID_PATTERN.search(f"{line['id']} {description}")
+    if txid and int(txid.group(1)) in index.by_id:
+        return MATCH_TXID, [index.by_id[int(txid.group(1))]]
+
+    for cpf in _CPF_PATTERN.findall(description):
+        rows = index.by_amount_cpf.get((amount, only_digits(cpf)))
+        if rows:
+            return MATCH_CPF, rows
+
+    rows = index.name_candidates(amount, description)
+    if rows:
+        return MATCH_NAME, rows
+
+    rows = index.by_amount.get(amount, [])
+    return (MATCH_AMOUNT, rows) if rows else (None, [])
+
+
+def reconcile_statement(lines: list[dict]) -> dict:
+    """
+    Casa as linhas do extrato com as inscrições pendentes. Devolve:
+      "matched"   -- [{"line", "method", "registration"}] uma inscrição só por linha
+      "ambiguous" -- [{"line", "method", "candidates"}] mais de uma possível
+      "unmatched" -- linhas de crédito terminando em 0,09 que não acharam ninguém
+      "ignored"   -- débitos e valores sem o sufixo 0,09 (não são inscrição)
+      "proposals" -- [{"registration", "lines", "paid", "complete"}] por inscrição, o que
+                     ir pra confirmação; "complete" = o que entrou cobre o lote inteiro
+    """
+    index = _load_pending_index()
+    result = {"matched": [], "ambiguous": [], "unmatched": [], "ignored": [], "proposals": []}
+    proposals: dict[int, dict] = {}
+
+    for line in lines:
+        amount = line["amount"]
+        if amount is None or amount <= 0 or amount % 1 != Decimal("0.09"):
+            result["ignored"].append(line)
+            continue
+
+        method, rows = _match_line(line, index)
+        if not rows:
+            result["unmatched"].append(line)
+        elif len(rows) > 1:
+            result["ambiguous"].append({"line": line, "method": method, "candidates": rows})
+        else:
+            row = rows[0]
+            result["matched"].append({"line": line, "method": method, "registration": row})
+            proposal = proposals.setdefault(row.id, {"registration": row, "lines": [], "paid": Decimal("0")})
+            proposal["lines"].append(line)
+            proposal["paid"] += amount
+
+    for proposal in proposals.values():
+        full_price = calculate_installment_amount(proposal["registration"].lot_value_cents, 1)
+        proposal["complete"] = proposal["paid"] >= full_price  # parcelas somam um pouco mais que o 1x
+        result["proposals"].append(proposal)
+    result["proposals"].sort(key=lambda proposal: (not proposal["complete"], proposal["registration"].full_name or ""))
+    return result
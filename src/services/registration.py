@@ -1,10 +1,13 @@
 from datetime import datetime
+from types import SimpleNamespace
 
-from sqlalchemy import func, or_
+from sqlalchemy import and_, case, func, insert, inspect, text, update
 
 from src import database
-from src.models import Registration, User
+from src.models import AuditLog, Registration, RegistrationCounter, User
 from src.services.audit import log_audit
+from src.services.pagination import keyset_paginate
+from src.services.registration_search import registration_search_filter
 
 STATUS_AGUARDANDO = "AGUARDANDO_CONFIRMACAO"
 STATUS_CONFIRMADA = "CONFIRMADA"
@@ -41,22 +44,29 @@ def create_registration(form) -> tuple[User, Registration]:
 
     database.session.add(user)
     database.session.add(registration)
+    _apply_kpi_change(set(), _kpi_keys_for(registration))
     log_audit(action="user_signup_and_register", details=f"email={user.email}")
     database.session.commit()
 
     return user, registration
 
 
-def review_registration(registration: Registration, decision: str, note: str, reviewer_id: int) -> None:
-    registration.status = decision
-    registration.status_message = (
+def _review_message(decision: str) -> str:
+    return (
         "Inscrição confirmada. Seja bem-vindo(a)!"
         if decision == STATUS_CONFIRMADA
         else "Inscrição negada. Entre em contato para ajustes."
     )
+
+
+def review_registration(registration: Registration, decision: str, note: str, reviewer_id: int) -> None:
+    kpis_before = _kpi_keys_for(registration)
+    registration.status = decision
+    registration.status_message = _review_message(decision)
     registration.review_note = note or None
     registration.reviewed_by_user_id = reviewer_id
     registration.reviewed_at = datetime.utcnow()
+    _apply_kpi_change(kpis_before, _kpi_keys_for(registration))
 
     log_audit(
         actor_user_id=reviewer_id,
@@ -66,53 +76,261 @@ def review_registration(registration: Registration, decision: str, note: str, re
     database.session.commit()
 
 
-def search_registrations(status: str, query_text: str, page: int, per_page: int):
+def attach_registration_proof(registration: Registration, key: str) -> None:
+    """Grava o comprovante já enviado pro B2 (ver services/proofs.py) e volta a
+    inscrição pra fila de revisão -- inclusive se estava negada, que é justamente quem
+    reenvia."""
+    kpis_before = _kpi_keys_for(registration)
+    previous_key = registration.proof_file_path
+    registration.proof_file_path = key
+    registration.proof_uploaded_at = datetime.utcnow()
+    if registration.status != STATUS_CONFIRMADA:
+        registration.status = STATUS_AGUARDANDO
+        registration.status_message = "Comprovante enviado. Aguardando confirmação do pagamento."
+    _apply_kpi_change(kpis_before, _kpi_keys_for(registration))
+
+    log_audit(
+        actor_user_id=registration.user_id,
+        action="upload_proof",
+        details=f"registration_id={registration.id} key={key} previous={previous_key or '-'}",
+    )
+    database.session.commit()
+
+
+BULK_REVIEW_MAX = 1000
+
+
+def bulk_review_registrations(registration_ids, decision: str, note: str, reviewer_id: int) -> dict[int, str]:
+    """
+    Revisão em lote (dia de confirmar os Pix): mesma decisão pra várias inscrições numa
+    transação só -- um SELECT travando as linhas, um UPDATE com IN (...), um INSERT de
+    várias linhas na auditoria e um commit, em vez de um POST/commit por inscrição.
+
+    Devolve {id: resultado} pra cada id pedido:
+      "updated"   -- revisada agora
+      "unchanged" -- já estava com essa decisão (não mexe em quem revisou nem quando)
+      "not_found" -- não existe
+    """
+    if decision not in (STATUS_CONFIRMADA, STATUS_NEGADA):
+        raise ValueError(f"Decisão inválida: {decision}")
+
+    ids = list(dict.fromkeys(int(reg_id) for reg_id in registration_ids))
+    if len(ids) > BULK_REVIEW_MAX:
+        raise ValueError(f"No máximo {BULK_REVIEW_MAX} inscrições por vez.")
+    if not ids:
+        return {}
+
+    # FOR UPDATE: uma revisão individual no meio não escapa da conta dos contadores
+    current = {
+        row.id: row
+        for row in database.session.execute(
+            database.select(
+                Registration.id, Registration.status,
+                Registration.payment_type, Registration.proof_file_path,
+            )
+            .where(Registration.id.in_(ids))
+            .with_for_update()
+        )
+    }
+
+    results = {}
+    to_update = []
+    for reg_id in ids:
+        row = current.get(reg_id)
+        if row is None:
+            results[reg_id] = "not_found"
+        elif row.status == decision:
+            results[reg_id] = "unchanged"
+        else:
+            results[reg_id] = "updated"
+            to_update.append(row)
+
+    if not to_update:
+        database.session.rollback()  # solta as travas
+        return results
+
+    now = datetime.utcnow()
+    updated = database.session.execute(
+        update(Registration)
+        .where(Registration.id.in_([row.id for row in to_update]))
+        .values(
+            status=decision,
+            status_message=_review_message(decision),
+            review_note=note or None,
+            reviewed_by_user_id=reviewer_id,
+            reviewed_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if updated.rowcount != len(to_update):
+        # as linhas estavam travadas desde o SELECT: contagem diferente é erro, não corrida
+        database.session.rollback()
+        raise RuntimeError(f"Revisão em lote atualizou {updated.rowcount} de {len(to_update)} inscrições.")
+
+    deltas: dict[str, int] = {}
+    for row in to_update:
+        before = _kpi_keys_for(row)
+        after = _kpi_keys_for(SimpleNamespace(**{**row._asdict(), "status": decision}))
+        for key in before ^ after:
+            deltas[key] = deltas.get(key, 0) + (1 if key in after else -1)
+    _apply_kpi_deltas(deltas)
+
+    database.session.execute(insert(AuditLog), [
+        {
+            "actor_user_id": reviewer_id,
+            "action": "review_registration",
+            "details": f"registration_id={row.id} decision={decision} bulk=1",
+            "created_at": now,
+        }
+        for row in to_update
+    ])
+    database.session.commit()
+    return results
+
+
+def search_registrations(status: str, query_text: str, per_page: int, after: str = "", before: str = ""):
+    """Página da lista de inscrições do admin (keyset -- ver services/pagination.py)."""
     query = Registration.query
 
     if status:
         query = query.filter(Registration.status == status)
 
     if query_text:
-        like = f"%{query_text}%"
-        query = query.filter(or_(
-            Registration.full_name.ilike(like),
-            Registration.cpf.ilike(like),
-            Registration.phone.ilike(like),
-            Registration.iap_local.ilike(like),
-        ))
+        condition = registration_search_filter(query_text)
+        if condition is not None:
+            query = query.filter(condition)
 
-    query = query.order_by(Registration.created_at.desc())
-    return query.paginate(page=page, per_page=per_page, error_out=False)
+    return keyset_paginate(
+        query, Registration,
+        after=after, before=before, per_page=per_page,
+        count_key=f"inscricoes|{status}|{query_text}",
+    )
 
 
-def _count_by_status(status: str) -> int:
-    return (
-        database.session.query(func.count(Registration.id))
-        .filter(Registration.status == status)
-        .scalar()
-        or 0
-    )
+# Indicadores do dashboard do /admin. Numa única consulta agrupada (COUNT com CASE), em
+# vez de uma COUNT(*) por número -- e, se a tabela registration_counters estiver
+# preenchida (`flask rebuild_registration_counters`), nem isso: o dashboard lê as 5
+# linhas de contador, que create_registration/review_registration mantêm na mesma
+# transação da escrita. Toda escrita que muda status/tipo de pagamento/comprovante de
+# uma inscrição precisa passar por _apply_kpi_change pra os contadores não desandarem.
+#
+# Ligado = a tabela tem as linhas. A escrita não precisa saber disso: com a tabela
+# vazia o UPDATE value = value + delta não acha linha e não faz nada, então todo
+# worker passa a contar no instante em que `flask rebuild_registration_counters`
+# grava as linhas, sem reiniciar. Só a existência da tabela é conferida antes -- por
+# fora da sessão, que um erro de "tabela não existe" dentro dela derrubaria a
+# transação de quem chamou (a inscrição sendo criada junto).
+KPI_KEYS = ("total", "aguardando", "confirmadas", "negadas", "pendentes_comprovante")
 
+_counters_table_seen = False  # só o "existe" fica guardado: a tabela não some com o app rodando
 
-def get_kpis() -> dict:
-    pendentes_comprovante = (
-        database.session.query(func.count(Registration.id))
-        .filter(
-            Registration.payment_type == "pix",
-            Registration.status == STATUS_AGUARDANDO,
-            Registration.proof_file_path.isnot(None),
+
+def _kpi_keys_for(registration: Registration | None) -> set[str]:
+    """Em quais indicadores essa inscrição entra (None = inscrição que não existe)."""
+    if registration is None:
+        return set()
+    keys = {"total"}
+    status_key = {
+        STATUS_AGUARDANDO: "aguardando",
+        STATUS_CONFIRMADA: "confirmadas",
+        STATUS_NEGADA: "negadas",
+    }.get(registration.status)
+    if status_key:
+        keys.add(status_key)
+    if (
+        registration.payment_type == "pix"
+        and registration.status == STATUS_AGUARDANDO
+        and registration.proof_file_path
+    ):
+        keys.add("pendentes_comprovante")
+    return keys
+
+
+def _counters_table_exists() -> bool:
+    global _counters_table_seen
+    if not _counters_table_seen:
+        # inspect abre a própria conexão do pool: não toca na transação da sessão
+        _counters_table_seen = inspect(database.engine).has_table(RegistrationCounter.__tablename__)
+    return _counters_table_seen
+
+
+def _apply_kpi_change(before: set[str], after: set[str]) -> None:
+    """Soma/subtrai nos contadores a diferença entre os indicadores de antes e depois
+    de uma escrita. UPDATE value = value + delta: duas revisões ao mesmo tempo não se
+    atropelam. Não faz commit -- vai junto com a transação de quem chamou."""
+    _apply_kpi_deltas({key: 1 if key in after else -1 for key in before ^ after})
+
+
+def _apply_kpi_deltas(deltas: dict[str, int]) -> None:
+    """Mesma coisa com os deltas já somados -- escrita em lote faz um UPDATE por
+    indicador, não um por inscrição."""
+    if not _counters_table_exists():
+        return
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        database.session.execute(
+            update(RegistrationCounter)
+            .where(RegistrationCounter.key == key)
+            .values(value=RegistrationCounter.value + delta)
         )
-        .scalar()
-        or 0
-    )
 
-    return {
-        "total": database.session.query(func.count(Registration.id)).scalar() or 0,
-        "aguardando": _count_by_status(STATUS_AGUARDANDO),
-        "confirmadas": _count_by_status(STATUS_CONFIRMADA),
-        "negadas": _count_by_status(STATUS_NEGADA),
-        "pendentes_comprovante": pendentes_comprovante,
-    }
+
+def _count_kpis() -> dict:
+    row = database.session.query(
+        func.count(Registration.id),
+        func.count(case((Registration.status == STATUS_AGUARDANDO, 1))),
+        func.count(case((Registration.status == STATUS_CONFIRMADA, 1))),
+        func.count(case((Registration.status == STATUS_NEGADA, 1))),
+        func.count(case((
+            and_(
+                Registration.payment_type == "pix",
+                Registration.status == STATUS_AGUARDANDO,
+                # '' é sem comprovante, igual ao _kpi_keys_for -- senão o contador se
+                # afasta da contagem quando uma dessas inscrições recebe comprovante
+                Registration.proof_file_path.isnot(None),
+                Registration.proof_file_path != "",
+            ),
+            1,
+        ))),
+    ).one()
+    return dict(zip(KPI_KEYS, row))
+
+
+def get_kpis() -> dict:
+    if _counters_table_exists():
+        counters = dict(database.session.query(RegistrationCounter.key, RegistrationCounter.value).all())
+        if all(key in counters for key in KPI_KEYS):
+            return {key: counters[key] for key in KPI_KEYS}
+    return _count_kpis()
+
+
+def rebuild_registration_counters() -> dict:
+    """Recalcula os contadores a partir da tabela (liga os contadores, se ainda não
+    estavam). Trava a escrita nos contadores antes de contar, pra nenhuma inscrição nova
+    escapar entre a contagem e a gravação."""
+    # Na primeira vez a tabela está vazia e FOR UPDATE não trava linha nenhuma: quem
+    # criasse inscrição no meio não acharia contador pra somar e o +1 sumia de vez.
+    #   - Postgres: EXCLUSIVE deixa o dashboard ler, mas o UPDATE de contador de quem
+    #     está criando/revisando espera o commit daqui -- e se alguém já tinha feito o
+    #     UPDATE, o LOCK espera ele terminar, aí a inscrição dele já entra na contagem;
+    #   - SQLite (local): o banco tem um escritor por vez -- escrever as linhas antes de
+    #     contar já segura todo mundo até o commit.
+    if database.engine.dialect.name == "postgresql":
+        database.session.execute(text(f"LOCK TABLE {RegistrationCounter.__tablename__} IN EXCLUSIVE MODE"))
+    existing = {c.key: c for c in RegistrationCounter.query.with_for_update().all()}
+    for key in KPI_KEYS:
+        if key not in existing:
+            existing[key] = RegistrationCounter(key=key, value=0)
+            database.session.add(existing[key])
+    database.session.flush()
+    database.session.execute(update(RegistrationCounter).values(value=RegistrationCounter.value))
+
+    kpis = _count_kpis()
+    for key, value in kpis.items():
+        existing[key].value = value
+    database.session.commit()
+    return kpis
 
 
 def get_recent_registrations(limit: int = 8):
@@ -0,0 +1,182 @@
+import re
+
+from sqlalchemy import bindparam, inspect, or_, text
+
+from src import database
+from src.controllers.validators import only_digits
+from src.models import Registration
+from src.utils.texto import normalizar_nome
+
+# Busca de inscrições do admin (lista de inscrições e /admin/usuarios).
+#
+# Antes era um OR de quatro ILIKE '%q%' direto nas colunas originais: varredura da
+# tabela inteira a cada busca, e ainda errava "Joao" x "João" e CPF/telefone com ou sem
+# máscara. Agora compara contra as colunas "sombra" do Registration (search_text,
+# cpf_digits, phone_digits -- ver models.py), que já guardam o texto normalizado.
+#
+# Índices, criados por `flask create_registration_search`:
+#   - Postgres: pg_trgm (GIN) nas três colunas -- serve pro LIKE '%q%' normal, então a
+#     consulta é a mesma de sempre e o planner escolhe o índice sozinho;
+#   - SQLite (rodando local): tabela FTS5 com tokenizer trigram, sincronizada por
+#     trigger -- o equivalente do pg_trgm, consultado com MATCH.
+# Sem os índices criados, a busca continua funcionando (LIKE nas colunas sombra), só
+# sem índice.
+FTS_TABLE = "registrations_fts"
+_TRIGRAM = 3  # trigram não acha nada com menos de 3 caracteres -- aí vai de LIKE
+
+_PG_TRGM_INDEXES = {
+    "ix_registrations_search_text_trgm": "search_text",
+    "ix_registrations_cpf_digits_trgm": "cpf_digits",
+    "ix_registrations_phone_digits_trgm": "phone_digits",
+}
+
+_sqlite_fts_ready = None  # descoberto na primeira busca -- a tabela não some com o app rodando
+
+
+def _dialect() -> str:
+    return database.session.get_bind().dialect.name
+
+
+def _has_sqlite_fts() -> bool:
+    global _sqlite_fts_ready
+    if _sqlite_fts_ready is None:
+        _sqlite_fts_ready = bool(database.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first())
+    return _sqlite_fts_ready
+
+
+def _fts_phrase(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def registration_search_filter(query_text: str):
+    """
+    Condição SQL de "inscrição bate com a busca" -- nome/local sem acento, CPF ou
+    telefone (só dígitos, com ou sem máscara na busca). None se a busca ficar vazia
+    depois de normalizar (ex: só pontuação).
+    """
+    termo = normalizar_nome(query_text)
+    # CPF/telefone só quando a busca não tem letra -- senão "joão 1" viraria "todo CPF
+    # com 1 no meio"
+    digitos = "" if re.search(r"[a-z]", termo) else only_digits(query_text)
+    if not termo and not digitos:
+        return None
+
+    if _dialect() == "sqlite" and len(termo) >= _TRIGRAM and _has_sqlite_fts():
+        clauses = [f"search_text : {_fts_phrase(termo)}"]
+        if len(digitos) >= _TRIGRAM:
+            clauses.append(f"cpf_digits : {_fts_phrase(digitos)}")
+            clauses.append(f"phone_digits : {_fts_phrase(digitos)}")
+        return Registration.id.in_(
+            text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_query")
+            .bindparams(fts_query=" OR ".join(clauses))
+        )
+
+    conditions = []
+    if termo:
+        conditions.append(Registration.search_text.like(f"%{termo}%"))
+    if digitos:
+        conditions.append(Registration.cpf_digits.like(f"%{digitos}%"))
+        conditions.append(Registration.phone_digits.like(f"%{digitos}%"))
+    return or_(*conditions)
+
+
+def _add_missing_columns() -> list[str]:
+    existing = {column["name"] for column in inspect(database.engine).get_columns("registrations")}
+    added = []
+    for name in ("search_text", "cpf_digits", "phone_digits"):
+        if name not in existing:
+            column_type = Registration.__table__.c[name].type.compile(dialect=database.engine.dialect)
+            database.session.execute(text(f"ALTER TABLE registrations ADD COLUMN {name} {column_type}"))
+            added.append(name)
+    return added
+
+
+def _backfill_search_columns() -> int:
+    table = Registration.__table__
+    rows = database.session.execute(
+        database.select(table.c.id, table.c.full_name, table.c.iap_local, table.c.cpf,
+                        table.c.phone, table.c.updated_at)
+    ).all()
+    if not rows:
+        return 0
+
+    # UPDATE direto na tabela (sem passar pelo ORM) e repetindo o updated_at de cada
+    # linha -- preencher coluna de busca não é "a inscrição mudou"
+    database.session.execute(
+        table.update()
+        .where(table.c.id == bindparam("row_id"))
+        .values(
+            search_text=bindparam("new_search_text"),
+            cpf_digits=bindparam("new_cpf_digits"),
+            phone_digits=bindparam("new_phone_digits"),
+            updated_at=bindparam("same_updated_at"),
+        ),
+        [
+            {
+                "row_id": row.id,
+                "new_search_text": normalizar_nome(f"{row.full_name or ''} {row.iap_local or ''}"),
+                "new_cpf_digits": only_digits(row.cpf),
+                "new_phone_digits": only_digits(row.phone),
+                "same_updated_at": row.updated_at,
+            }
+            for row in rows
+        ],
+    )
+    return len(rows)
+
+
+def _create_postgres_indexes() -> None:
+    database.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for index_name, column in _PG_TRGM_INDEXES.items():
+        database.session.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON registrations USING gin ({column} gin_trgm_ops)"
+        ))
+
+
+def _create_sqlite_fts() -> None:
+    global _sqlite_fts_ready
+    statements = [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            search_text, cpf_digits, phone_digits,
+            content='registrations', content_rowid='id', tokenize='trigram'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON registrations BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, search_text, cpf_digits, phone_digits)
+            VALUES (new.id, new.search_text, new.cpf_digits, new.phone_digits);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON registrations BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text, cpf_digits, phone_digits)
+            VALUES ('delete', old.id, old.search_text, old.cpf_digits, old.phone_digits);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON registrations BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text, cpf_digits, phone_digits)
+            VALUES ('delete', old.id, old.search_text, old.cpf_digits, old.phone_digits);
+            INSERT INTO {FTS_TABLE}(rowid, search_text, cpf_digits, phone_digits)
+            VALUES (new.id, new.search_text, new.cpf_digits, new.phone_digits);
+        END""",
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ]
+    for statement in statements:
+        database.session.execute(text(statement))
+    _sqlite_fts_ready = True
+
+
+def setup_registration_search() -> dict:
+    """
+    Cria as colunas sombra (se a tabela é anterior a elas), preenche todas as linhas e
+    cria os índices do banco atual. Pode rodar de novo sem problema.
+    """
+    added = _add_missing_columns()
+    backfilled = _backfill_search_columns()
+
+    dialect = _dialect()
+    if dialect == "postgresql":
+        _create_postgres_indexes()
+    elif dialect == "sqlite":
+        _create_sqlite_fts()
+
+    database.session.commit()
+    return {"added_columns": added, "backfilled": backfilled, "dialect": dialect}
@@ -0,0 +1,327 @@
+import csv
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src import database
+from src.controllers.slugify import gerar_slug
+from src.models import Registration
+from src.services.pix import (
+    QR_DEFAULT_BOX_SIZE,
+    calculate_installment_amount,
+    dynamic_pix_payloads,
+    qr_matrix,
+    qr_runs,
+    render_qr,
+)
+from src.services.registration import STATUS_AGUARDANDO
+
+# Boletos Pix em lote: o QR dinâmico e o copia-e-cola de cada inscrição Pix aguardando
+# pagamento, num ZIP (um PNG por inscrição + CSV com os copia-e-cola) ou num PDF pra
+# imprimir (4 boletos por folha A4, com linha de corte). Pra inscrição de grupo e
+# material impresso.
+#
+# O que pesa é o QR -- o qrcode monta a matriz em Python puro, alguns ms por inscrição,
+# e milhares em série seguram o download por minutos. As inscrições vão em pedaços de
+# SLIP_CHUNK_SIZE pra um ProcessPoolExecutor: cada processo monta os payloads do pedaço
+# de uma vez (dynamic_pix_payloads) e desenha os QRs; o processo da requisição só junta
+# os pedaços na ordem e vai mandando o arquivo enquanto os outros ainda trabalham.
+#
+# O pool é um só por processo, criado no primeiro download e reaproveitado, e os
+# filhos saem de um forkserver -- nunca de fork do worker do gunicorn, que já roda as
+# threads da fila de upload (o filho de um fork pode nascer preso num lock que uma
+# dessas threads segurava). O forkserver importa o app uma vez (preload) e não tem
+# thread nenhuma; os filhos nascem dele já prontos.
+#
+# O PDF é escrito na mão (igual o EMV do Pix): texto nas fontes padrão do PDF e o QR
+# como retângulos vetoriais, as mesmas sequências do SVG (qr_runs) -- nada é
+# rasterizado, cada boleto tem ~2KB e sai na hora; os offsets (xref) vão no fim.
+SLIP_CHUNK_SIZE = 64
+SLIP_WORKERS = int(os.environ.get("PIX_SLIP_WORKERS") or 0) or os.cpu_count() or 1
+_STREAM_FLUSH_BYTES = 64 * 1024
+
+SLIP_CSV_COLUMNS = ["ID", "Nome", "Parcelas", "Valor da parcela (R$)", "Arquivo do QR", "Pix copia e cola"]
+
+# folha A4 em pontos, dividida em 2x2 boletos (A6)
+_PAGE_WIDTH, _PAGE_HEIGHT = 595.28, 841.89
+_SLIP_WIDTH, _SLIP_HEIGHT = _PAGE_WIDTH / 2, _PAGE_HEIGHT / 2
+_SLIPS_PER_PAGE = 4
+_QR_SIZE = 170  # pontos (~6cm)
+_PAYLOAD_LINE_CHARS = 62  # Courier 6.5pt na largura do boleto
+
+
+def pending_pix_slip_rows() -> list[tuple]:
+    """(id, nome, parcelas, valor do lote em centavos) das inscrições Pix aguardando
+    confirmação, por nome."""
+    rows = database.session.execute(
+        database.select(
+            Registration.id, Registration.full_name, Registration.installments, Registration.lot_value_cents,
+        )
+        .where(Registration.payment_type == "pix", Registration.status == STATUS_AGUARDANDO)
+        .order_by(Registration.full_name, Registration.id)
+    ).all()
+    # tuplas simples: vão por pickle pros processos
+    return [(row.id, row.full_name or "", int(row.installments or 1), row.lot_value_cents) for row in rows]
+
+
+def _payloads(rows) -> list[str]:
+    return dynamic_pix_payloads([(reg_id, installments, lot) for reg_id, _, installments, lot in rows])
+
+
+def _amount_label(row) -> str:
+    _, _, installments, lot_value_cents = row
+    return str(calculate_installment_amount(lot_value_cents, installments)).replace(".", ",")
+
+
+# ===== processos =====
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+def _mp_context():
+    # spawn onde não existe forkserver (Windows/macOS local): aí cada filho importa o
+    # src inteiro, banco e Supabase junto -- mais lento pra subir, mas só na primeira vez.
+    # Os filhos não tocam no banco.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _slip_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SLIP_WORKERS, mp_context=_mp_context())
+        return _pool
+
+
+def _discard_pool(broken: ProcessPoolExecutor) -> None:
+    # filho morto (falta de memória, kill) quebra o pool inteiro -- o próximo download
+    # cria outro
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _fan_out(worker, rows: list, *args):
+    """Resultados de worker(pedaço, início do pedaço, *args), um por linha, na ordem de rows."""
+    chunks = [(rows[start:start + SLIP_CHUNK_SIZE], start) for start in range(0, len(rows), SLIP_CHUNK_SIZE)]
+    if SLIP_WORKERS == 1 or len(chunks) <= 1:
+        # um pedaço só não paga a ida e volta pro pool
+        for chunk, start in chunks:
+            yield from worker(chunk, start, *args)
+        return
+
+    pool = _slip_pool()
+    futures = []
+    try:
+        futures = [pool.submit(worker, chunk, start, *args) for chunk, start in chunks]
+        for future in futures:
+            yield from future.result()
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    finally:
+        # download cancelado no meio: os pedaços que ninguém vai ler nem começam (o pool
+        # fica, pro próximo)
+        for future in futures:
+            future.cancel()
+
+
+def _render_png_chunk(rows, start, box_size):
+    return [(payload, render_qr(payload, "png", box_size)) for payload in _payloads(rows)]
+
+
+def _render_pdf_chunk(rows, start):
+    return [
+        (payload, zlib.compress(_slip_content(row, payload, start + offset)))
+        for offset, (row, payload) in enumerate(zip(rows, _payloads(rows)))
+    ]
+
+
+class _ChunkSink:
+    """Arquivo só de escrita que segura os bytes até o gerador mandar pra frente (o
+    ZipFile aceita saída sem seek e grava os tamanhos depois de cada arquivo)."""
+
+    def __init__(self):
+        self._parts = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        self.size = 0
+        return data
+
+
+# ===== ZIP =====
+
+def _qr_filename(row) -> str:
+    reg_id, full_name, installments, _ = row
+    return f"qr/{reg_id:05d}-{gerar_slug(full_name)[:40] or 'inscricao'}-{installments}x.png"
+
+
+def stream_pix_slips_zip(rows: list, box_size: int = QR_DEFAULT_BOX_SIZE):
+    """Gerador de pedaços do ZIP: qr/<id>-<nome>-<parcelas>x.png de cada linha de
+    pending_pix_slip_rows e copia_e_cola.csv no fim."""
+    sink = _ChunkSink()
+    listing = io.StringIO()
+    writer = csv.writer(listing)
+    listing.write("\ufeff")
+    writer.writerow(SLIP_CSV_COLUMNS)
+
+    with zipfile.ZipFile(sink, "w") as archive:
+        for row, (payload, png) in zip(rows, _fan_out(_render_png_chunk, rows, box_size)):
+            filename = _qr_filename(row)
+            archive.writestr(filename, png, compress_type=zipfile.ZIP_STORED)  # PNG já é comprimido
+            writer.writerow([row[0], row[1], row[2], _amount_label(row), filename, payload])
+            if sink.size >= _STREAM_FLUSH_BYTES:
+                yield sink.drain()
+
+        archive.writestr("copia_e_cola.csv", listing.getvalue().encode("utf-8"), compress_type=zipfile.ZIP_DEFLATED)
+    yield sink.drain()
+
+
+# ===== PDF =====
+
+def _pdf_text(value: str) -> bytes:
+    # fontes padrão com WinAnsiEncoding: cp1252 cobre os acentos do português
+    data = value.encode("cp1252", "replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _text(font: bytes, size: float, x: float, y: float, value: str) -> bytes:
+    return b"BT /%s %.1f Tf %.2f %.2f Td %s Tj ET\n" % (font, size, x, y, _pdf_text(value))
+
+
+def _slip_content(row, payload: str, index: int) -> bytes:
+    """Conteúdo (operadores do PDF) do boleto na posição `index` do documento."""
+    reg_id, full_name, installments, _ = row
+    slot = index % _SLIPS_PER_PAGE
+    left = (slot % 2) * _SLIP_WIDTH
+    bottom = (1 - slot // 2) * _SLIP_HEIGHT
+    top = _SLIP_HEIGHT
+
+    parts = [b"q 1 0 0 1 %.2f %.2f cm\n" % (left, bottom)]
+    # linha de corte
+    parts.append(b"q [4 4] 0 d 0.5 w 0.6 G 0 0 %.2f %.2f re S Q\n" % (_SLIP_WIDTH, _SLIP_HEIGHT))
+
+    parts.append(_text(b"F2", 11, 24, top - 36, "Convenção Amazônica — Pagamento via Pix"))
+    parts.append(_text(b"F2", 10, 24, top - 56, full_name[:48]))
+    parts.append(_text(b"F1", 9, 24, top - 70, f"Inscrição #{reg_id} · {installments}x de R$ {_amount_label(row)}"))
+
+    matrix = qr_matrix(payload)
+    scale = _QR_SIZE / len(matrix)
+    qr_left = (_SLIP_WIDTH - _QR_SIZE) / 2
+    qr_top = top - 82
+    # escala negativa no y: linha 0 da matriz fica em cima, igual no SVG
+    parts.append(b"q %.4f 0 0 %.4f %.2f %.2f cm\n" % (scale, -scale, qr_left, qr_top))
+    parts.append(b"".join(b"%d %d %d 1 re\n" % run for run in qr_runs(matrix)))
+    parts.append(b"f Q\n")
+
+    y = qr_top - _QR_SIZE - 18
+    parts.append(_text(b"F1", 8, 24, y, "Pix copia e cola:"))
+    for start in range(0, len(payload), _PAYLOAD_LINE_CHARS):
+        y -= 9
+        parts.append(_text(b"F3", 6.5, 24, y, payload[start:start + _PAYLOAD_LINE_CHARS]))
+
+    parts.append(_text(b"F1", 7, 24, 28, "Depois de pagar, envie o comprovante pelo seu painel."))
+    parts.append(b"Q\n")
+    return b"".join(parts)
+
+
+class _PdfWriter:
+    """PDF mínimo escrito em sequência: cada objeto sai assim que fica pronto e a
+    tabela de offsets (xref) vai no fim -- dá pra mandar enquanto monta."""
+
+    def __init__(self, sink):
+        self._sink = sink
+        self._offset = 0
+        self._offsets = {}
+        self._next_number = 1
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data: bytes):
+        self._sink.write(data)
+        self._offset += len(data)
+
+    def reserve(self) -> int:
+        number = self._next_number
+        self._next_number += 1
+        return number
+
+    def add(self, body: bytes, number: int | None = None) -> int:
+        number = number or self.reserve()
+        self._offsets[number] = self._offset
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        return number
+
+    def add_stream(self, compressed: bytes) -> int:
+        return self.add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(compressed), compressed))
+
+    def close(self, root: int):
+        xref = self._offset
+        count = self._next_number
+        entries = b"".join(b"%010d 00000 n \n" % self._offsets[number] for number in range(1, count))
+        self._write(
+            b"xref\n0 %d\n0000000000 65535 f \n%s" % (count, entries)
+            + b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, root, xref)
+        )
+
+
+def stream_pix_slips_pdf(rows: list):
+    """Gerador de pedaços do PDF: um boleto por linha de pending_pix_slip_rows, quatro
+    por folha A4."""
+    sink = _ChunkSink()
+    pdf = _PdfWriter(sink)
+    catalog, pages = pdf.reserve(), pdf.reserve()
+    fonts = [
+        pdf.add(b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % name)
+        for name in (b"Helvetica", b"Helvetica-Bold", b"Courier")
+    ]
+    resources = b"<< /Font << /F1 %d 0 R /F2 %d 0 R /F3 %d 0 R >> >>" % tuple(fonts)
+
+    kids, contents = [], []
+
+    def add_page():
+        kids.append(pdf.add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] /Resources %s /Contents [%s] >>"
+            % (pages, _PAGE_WIDTH, _PAGE_HEIGHT, resources, b" ".join(b"%d 0 R" % number for number in contents))
+        ))
+        contents.clear()
+
+    for _, compressed in _fan_out(_render_pdf_chunk, rows):
+        # cada boleto é um stream separado; a página junta os quatro em /Contents
+        contents.append(pdf.add_stream(compressed))
+        if len(contents) == _SLIPS_PER_PAGE:
+            add_page()
+        if sink.size >= _STREAM_FLUSH_BYTES:
+            yield sink.drain()
+    if contents:
+        add_page()
+
+    pdf.add(
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), len(kids)),
+        number=pages,
+    )
+    pdf.add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages, number=catalog)
+    pdf.close(root=catalog)
+    yield sink.drain()
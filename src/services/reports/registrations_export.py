@@ -0,0 +1,105 @@
+import csv
+import io
+import tempfile
+
+from src import database
+from src.models import Registration
+from src.services.reports.registrations_summary import registration_filter_conditions
+from src.services.reports.registrations_xlsx import REGISTRATION_COLUMNS, registration_row
+
+# Exportações "cruas" da lista de inscrições (CSV e Parquet), pra logística carregar em
+# outras ferramentas. Mesmas colunas e mesmos filtros do Excel, mas sem estilo nenhum:
+# as linhas vêm do banco por um cursor do lado do servidor (stream_results), em lotes,
+# e saem direto pra resposta (CSV) ou pra um arquivo temporário (Parquet) -- nada da
+# lista inteira fica em memória.
+STREAM_BATCH_SIZE = 1000
+PARQUET_ROW_GROUP_SIZE = 10_000
+
+# colunas numéricas no Parquet (o resto vai como texto, igual aparece no Excel);
+# "" do Excel vira nulo
+_PARQUET_INT_COLUMNS = {"ID", "Parcelas", "Idade", "Revisado por (user_id)"}
+_PARQUET_FLOAT_COLUMNS = {"Valor Lote (R$)"}
+
+
+def _iter_rows(status: str, payment_type: str, date_from: str, date_to: str):
+    table = Registration.__table__
+    statement = (
+        database.select(table)
+        .where(*registration_filter_conditions(status, payment_type, date_from, date_to))
+        .order_by(table.c.created_at.desc())
+        .execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)
+    )
+    for row in database.session.execute(statement):
+        yield registration_row(row)
+
+
+def stream_registrations_csv(*, status: str = "", payment_type: str = "", date_from: str = "", date_to: str = ""):
+    """Gerador de pedaços do CSV (UTF-8 com BOM, pro Excel abrir os acentos certo)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    buffer.write("\ufeff")
+    writer.writerow(REGISTRATION_COLUMNS)
+
+    for count, values in enumerate(_iter_rows(status, payment_type, date_from, date_to), start=1):
+        writer.writerow(values)
+        if count % STREAM_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _parquet_schema(pa):
+    fields = []
+    for name in REGISTRATION_COLUMNS:
+        if name in _PARQUET_INT_COLUMNS:
+            fields.append(pa.field(name, pa.int64()))
+        elif name in _PARQUET_FLOAT_COLUMNS:
+            fields.append(pa.field(name, pa.float64()))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def _parquet_value(name: str, value):
+    if name in _PARQUET_INT_COLUMNS or name in _PARQUET_FLOAT_COLUMNS:
+        return None if value == "" else value
+    return "" if value is None else str(value)
+
+
+def build_registrations_parquet(*, status: str = "", payment_type: str = "", date_from: str = "", date_to: str = ""):
+    """
+    Monta o .parquet num arquivo temporário (um row group a cada
+    PARQUET_ROW_GROUP_SIZE linhas) e devolve o arquivo aberto, no começo -- igual o
+    build_registrations_workbook. O formato guarda o índice no fim do arquivo, então
+    não dá pra mandar pro cliente antes de terminar.
+    """
+    # import local: pyarrow é pesado e só essa exportação usa
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(pa)
+    output = tempfile.TemporaryFile()
+    columns = {name: [] for name in REGISTRATION_COLUMNS}
+
+    def flush(writer):
+        writer.write_table(pa.table(columns, schema=schema))
+        for values in columns.values():
+            values.clear()
+
+    with pq.ParquetWriter(output, schema, compression="snappy") as writer:
+        pending = 0
+        for values in _iter_rows(status, payment_type, date_from, date_to):
+            for name, value in zip(REGISTRATION_COLUMNS, values):
+                columns[name].append(_parquet_value(name, value))
+            pending += 1
+            if pending == PARQUET_ROW_GROUP_SIZE:
+                flush(writer)
+                pending = 0
+        if pending:
+            flush(writer)
+
+    output.seek(0)
+    return output
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+from sqlalchemy import and_, func
+
+from src import database
+from src.models import Registration
+
+# Agregados do relatório de inscrições (abas de resumo do Excel e o que mais precisar
+# dos mesmos números), calculados no banco com GROUP BY -- nenhuma inscrição é
+# carregada pra memória só pra ser contada. Os filtros são os mesmos da lista
+# detalhada (registration_filter_conditions), então os totais sempre batem com ela.
+
+
+def _parse_date(value: str):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_report_filters(status: str, payment_type: str, date_from: str, date_to: str) -> dict:
+    """Filtros da querystring num formato único -- "pix " e "PIX", ou data inválida e
+    data vazia, dão o mesmo relatório (e a mesma chave no cache de relatórios)."""
+    parsed_from = _parse_date((date_from or "").strip())
+    parsed_to = _parse_date((date_to or "").strip())
+    return {
+        "status": (status or "").strip().upper(),
+        "payment_type": (payment_type or "").strip().lower(),
+        "date_from": parsed_from.strftime("%Y-%m-%d") if parsed_from else "",
+        "date_to": parsed_to.strftime("%Y-%m-%d") if parsed_to else "",
+    }
+
+
+def registration_filter_conditions(status: str, payment_type: str, date_from: str, date_to: str) -> list:
+    conditions = []
+
+    if status:
+        conditions.append(Registration.status == status)
+    if payment_type:
+        conditions.append(Registration.payment_type == payment_type)
+
+    parsed_from = _parse_date(date_from)
+    parsed_to = _parse_date(date_to)
+    if parsed_from:
+        conditions.append(Registration.created_at >= parsed_from)
+    if parsed_to:
+        # inclui o dia final (até 23:59:59)
+        conditions.append(
+            Registration.created_at < datetime(parsed_to.year, parsed_to.month, parsed_to.day, 23, 59, 59)
+        )
+
+    return conditions
+
+
+def _grouped(column, conditions: list, label_fn) -> dict:
+    """{rótulo: qtd} agrupando por `column` no banco. Valores que viram o mesmo rótulo
+    (ex: "pix"/"credito"/"cartao" -> "Pix"/"Crédito") são somados."""
+    rows = (
+        database.session.query(column, func.count(Registration.id))
+        .filter(*conditions)
+        .group_by(column)
+        .all()
+    )
+    counts: dict = {}
+    for value, count in rows:
+        label = label_fn(value)
+        counts[label] = counts.get(label, 0) + count
+    return counts
+
+
+def _text_label(value) -> str:
+    return (value or "").strip() or "—"
+
+
+def registration_summary(*, status: str = "", payment_type: str = "", date_from: str = "", date_to: str = "") -> dict:
+    """
+    Todos os recortes do relatório, já com os rótulos das planilhas -- dict simples de
+    str/int, serve direto pra JSON também:
+      total, by_status, by_pay, by_inst, by_kids, by_transport, by_proof (só Pix),
+      by_iap, by_lot
+    """
+    conditions = registration_filter_conditions(status, payment_type, date_from, date_to)
+    pix_only = conditions + [Registration.payment_type == "pix"]
+
+    return {
+        "total": database.session.query(func.count(Registration.id)).filter(*conditions).scalar() or 0,
+        "by_status": _grouped(Registration.status, conditions, lambda v: (v or "").strip()),
+        "by_pay": _grouped(Registration.payment_type, conditions, lambda v: "Pix" if v == "pix" else "Crédito"),
+        "by_inst": _grouped(Registration.installments, conditions, lambda v: f"{int(v or 1)}x"),
+        "by_kids": _grouped(Registration.has_kids_u5, conditions, lambda v: "SIM" if v else "NÃO"),
+        "by_transport": _grouped(Registration.transport, conditions, lambda v: "Ônibus" if v == "onibus" else "Carro"),
+        # '' conta como sem comprovante, igual ao "SIM"/"NÃO" de cada linha da planilha
+        "by_proof": _grouped(
+            and_(Registration.proof_file_path.isnot(None), Registration.proof_file_path != ""),
+            pix_only,
+            lambda v: "SIM" if v else "NÃO",
+        ),
+        "by_iap": _grouped(Registration.iap_local, conditions, _text_label),
+        "by_lot": _grouped(Registration.lot_name, conditions, _text_label),
+    }
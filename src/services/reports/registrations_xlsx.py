@@ -1,18 +1,26 @@
+import tempfile
 from datetime import datetime
-from io import BytesIO
 
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
-from openpyxl.utils import get_column_letter
+import xlsxwriter
 
 from src.models import Registration
-
-TITLE_FONT = Font(bold=True, size=14)
-SECTION_FONT = Font(bold=True, size=12)
-HEADER_FONT = Font(bold=True, size=11, color="FFFFFF")
-HEADER_FILL = PatternFill("solid", fgColor="111827")  # quase preto (dark)
-_THIN_SIDE = Side(style="thin", color="2D3748")
-BORDER = Border(left=_THIN_SIDE, right=_THIN_SIDE, top=_THIN_SIDE, bottom=_THIN_SIDE)
+from src.services.reports.registrations_summary import registration_filter_conditions, registration_summary
+
+# Relatório em modo streaming (xlsxwriter com constant_memory): cada linha vai pro disco
+# assim que a próxima começa, e as inscrições vêm do banco em lotes (yield_per) em vez
+# de todas de uma vez -- exportar 50 mil inscrições usa a mesma memória que exportar 50.
+# Os estilos são formatos nomeados criados uma vez por arquivo (ver _Styles), não um
+# objeto de borda/alinhamento por célula.
+#
+# Os números das abas de resumo vêm de GROUP BY no banco (registrations_summary.py) --
+# as inscrições só são lidas uma vez, pra escrever a aba "Inscritos".
+FETCH_BATCH_SIZE = 1000
+
+_TITLE_FONT = {"bold": True, "font_size": 14}
+_SECTION_FONT = {"bold": True, "font_size": 12}
+_HEADER = {"bold": True, "font_size": 11, "font_color": "#FFFFFF", "bg_color": "#111827", "valign": "vcenter"}
+_BORDER = {"border": 1, "border_color": "#2D3748"}
+_CELL = {**_BORDER, "valign": "top", "text_wrap": True}
 
 REGISTRATION_COLUMNS = [
     "ID", "Nome", "CPF", "Telefone", "IAP", "Transporte", "Lote",
@@ -28,6 +36,7 @@ REGISTRATION_COLUMN_WIDTHS = {
     "M": 16,  "N": 32, "O": 8,  "P": 18, "Q": 22, "R": 22,
     "S": 18,  "T": 18, "U": 18, "V": 28, "W": 18, "X": 18,
 }
+_MONEY_COLUMN = REGISTRATION_COLUMNS.index("Valor Lote (R$)")
 
 
 # ===== formatação =====
@@ -48,86 +57,46 @@ def _safe_text(value):
     return (value or "").strip() if isinstance(value, str) else (value if value is not None else "")
 
 
-def _parse_date(value: str):
-    try:
-        return datetime.strptime(value, "%Y-%m-%d")
-    except (TypeError, ValueError):
-        return None
-
-
-def _count_by(items, key_fn) -> dict:
-    counts: dict = {}
-    for item in items:
-        key = key_fn(item)
-        counts[key] = counts.get(key, 0) + 1
-    return counts
-
-
 def _sort_count_dict(counts: dict) -> list:
     return sorted(counts.items(), key=lambda pair: (-pair[1], str(pair[0])))
 
 
 # ===== estilo =====
 
-def _style_header_row(worksheet, row: int = 1) -> None:
-    for col in range(1, worksheet.max_column + 1):
-        cell = worksheet.cell(row=row, column=col)
-        cell.font = HEADER_FONT
-        cell.fill = HEADER_FILL
-        cell.alignment = Alignment(vertical="center")
-        cell.border = BORDER
-
+class _Styles:
+    """Formatos do arquivo, criados uma vez e reaproveitados em todas as células."""
 
-def _apply_table_style(worksheet, start_row, start_col, end_row, end_col, freeze_panes="A2", auto_filter=True) -> None:
-    worksheet.freeze_panes = freeze_panes
-    if auto_filter:
-        worksheet.auto_filter.ref = (
-            f"{get_column_letter(start_col)}{start_row}:{get_column_letter(end_col)}{end_row}"
-        )
-    for row in range(start_row, end_row + 1):
-        for col in range(start_col, end_col + 1):
-            cell = worksheet.cell(row=row, column=col)
-            cell.border = BORDER
-            cell.alignment = Alignment(vertical="top", wrap_text=True)
+    def __init__(self, workbook):
+        self.title = workbook.add_format(_TITLE_FONT)
+        self.section = workbook.add_format(_SECTION_FONT)
+        self.header = workbook.add_format({**_HEADER, **_BORDER})
+        self.bordered = workbook.add_format(_BORDER)
+        self.cell = workbook.add_format(_CELL)
+        self.money = workbook.add_format({**_CELL, "num_format": "0.00"})
 
 
 def _set_widths(worksheet, widths: dict) -> None:
     for col_letter, width in widths.items():
-        worksheet.column_dimensions[col_letter].width = width
+        worksheet.set_column(f"{col_letter}:{col_letter}", width)
 
 
-def _make_count_sheet(workbook, title, pairs, col1="Categoria", col2="Qtd"):
-    sheet = workbook.create_sheet(title)
-    sheet.append([col1, col2])
-    _style_header_row(sheet, 1)
-    for key, value in pairs:
-        sheet.append([key, value])
-    _set_widths(sheet, {"A": 36, "B": 10})
-    _apply_table_style(sheet, 1, 1, sheet.max_row, 2, freeze_panes="A2", auto_filter=True)
-    return sheet
+def _make_count_sheet(worksheet, styles, pairs, col1="Categoria", col2="Qtd") -> None:
+    _set_widths(worksheet, {"A": 36, "B": 10})
+    worksheet.write_row(0, 0, [col1, col2], styles.header)
+    row = 0
+    for row, pair in enumerate(pairs, start=1):
+        worksheet.write_row(row, 0, pair, styles.cell)
+    worksheet.freeze_panes(1, 0)
+    worksheet.autofilter(0, 0, row, 1)
 
 
 # ===== consulta =====
 
 def _query_registrations(status: str, payment_type: str, date_from: str, date_to: str):
-    query = Registration.query
-
-    if status:
-        query = query.filter(Registration.status == status)
-    if payment_type:
-        query = query.filter(Registration.payment_type == payment_type)
-
-    parsed_from = _parse_date(date_from)
-    parsed_to = _parse_date(date_to)
-    if parsed_from:
-        query = query.filter(Registration.created_at >= parsed_from)
-    if parsed_to:
-        # inclui o dia final (até 23:59:59)
-        query = query.filter(
-            Registration.created_at < datetime(parsed_to.year, parsed_to.month, parsed_to.day, 23, 59, 59)
-        )
-
-    return query.order_by(Registration.created_at.desc()).all()
+    query = Registration.query.filter(*registration_filter_conditions(status, payment_type, date_from, date_to))
+    # em lotes: no Postgres vira cursor do lado do servidor, o resultado não é puxado
+    # inteiro pra memória
+    return query.order_by(Registration.created_at.desc()).yield_per(FETCH_BATCH_SIZE)
 
 
 def _describe_filters(status: str, payment_type: str, date_from: str, date_to: str) -> list[str]:
@@ -145,22 +114,22 @@ def _describe_filters(status: str, payment_type: str, date_from: str, date_to: s
 
 # ===== abas =====
 
-def _build_resumo_sheet(workbook, regs, filtros, by_status, by_pay, by_kids, by_proof) -> None:
-    ws = workbook.create_sheet("Resumo")
-    ws["A1"] = "Relatório de Inscrições — Tempo de Resplandecer"
-    ws["A1"].font = TITLE_FONT
-
-    ws["A3"] = "Gerado em:"
-    ws["B3"] = datetime.now().strftime("%d/%m/%Y %H:%M")
+def _build_resumo_sheet(ws, styles, total, filtros, by_status, by_pay, by_kids, by_proof) -> None:
+    _set_widths(ws, {"A": 36, "B": 16})
+    ws.write(0, 0, "Relatório de Inscrições — Tempo de Resplandecer", styles.title)
 
-    ws["A4"] = "Filtros:"
-    ws["B4"] = ", ".join(filtros) if filtros else "—"
+    # a planilha fica no cache de relatórios (report_cache) enquanto nenhuma inscrição
+    # muda: baixar de novo depois devolve esta mesma, com este mesmo horário
+    ws.write_row(2, 0, [
+        "Gerado em:", datetime.now().strftime("%d/%m/%Y %H:%M"),
+        "Nenhuma inscrição mudou desde então -- downloads seguintes devolvem esta mesma planilha.",
+    ])
+    ws.write_row(3, 0, ["Filtros:", ", ".join(filtros) if filtros else "—"])
 
-    ws["A6"] = "KPIs"
-    ws["A6"].font = SECTION_FONT
+    ws.write(5, 0, "KPIs", styles.section)
 
     kpi_rows = [
-        ("Total de inscrições", len(regs)),
+        ("Total de inscrições", total),
         ("Confirmadas", by_status.get("CONFIRMADA", 0)),
         ("Aguardando confirmação", by_status.get("AGUARDANDO_CONFIRMACAO", 0)),
         ("Negadas", by_status.get("NEGADA", 0)),
@@ -172,122 +141,113 @@ def _build_resumo_sheet(workbook, regs, filtros, by_status, by_pay, by_kids, by_
         ("Pix sem comprovante (NÃO)", by_proof.get("NÃO", 0)),
     ]
 
-    ws["A7"] = "Métrica"
-    ws["B7"] = "Valor"
-    for coord in ("A7", "B7"):
-        ws[coord].font = HEADER_FONT
-        ws[coord].fill = HEADER_FILL
-        ws[coord].border = BORDER
-
-    row = 8
-    for name, value in kpi_rows:
-        ws.cell(row=row, column=1, value=name).border = BORDER
-        ws.cell(row=row, column=2, value=value).border = BORDER
+    ws.write_row(6, 0, ["Métrica", "Valor"], styles.header)
+    for row, values in enumerate(kpi_rows, start=7):
+        ws.write_row(row, 0, values, styles.bordered)
+
+
+def registration_row(r) -> list:
+    """Uma inscrição na ordem de REGISTRATION_COLUMNS. `r` pode ser o objeto do ORM ou
+    uma linha crua do select (mesmos nomes de coluna) -- os exports CSV/Parquet usam assim."""
+    return [
+        r.id,
+        r.full_name,
+        r.cpf,
+        r.phone,
+        r.iap_local,
+        "Ônibus" if r.transport == "onibus" else "Carro",
+        r.lot_name,
+        _money_from_cents(r.lot_value_cents),
+        "Pix" if r.payment_type == "pix" else "Crédito",
+        int(r.installments or 1),
+        r.status,
+        _safe_text(r.status_message),
+        _yn(r.has_kids_u5),
+        _safe_text(r.kids_u5_names),
+        r.age if r.age is not None else "",
+        _yn(r.is_church_member),
+        _yn(r.agree_no_refund),
+        ("SIM" if r.proof_file_path else "NÃO") if r.payment_type == "pix" else "N/A",
+        _fmt_dt(r.proof_uploaded_at) if r.payment_type == "pix" else "",
+        r.reviewed_by_user_id or "",
+        _fmt_dt(r.reviewed_at),
+        _safe_text(r.review_note),
+        _fmt_dt(r.created_at),
+        _fmt_dt(r.updated_at),
+    ]
+
+
+def _build_inscritos_sheet(ws, styles, regs) -> None:
+    _set_widths(ws, REGISTRATION_COLUMN_WIDTHS)
+    ws.write_row(0, 0, REGISTRATION_COLUMNS, styles.header)
+
+    row = 0
+    for r in regs:
         row += 1
+        values = registration_row(r)
+        ws.write_row(row, 0, values, styles.cell)
+        # formata coluna de dinheiro
+        ws.write_number(row, _MONEY_COLUMN, values[_MONEY_COLUMN], styles.money)
 
-    _set_widths(ws, {"A": 36, "B": 16})
+    ws.freeze_panes(1, 0)
+    ws.autofilter(0, 0, row, len(REGISTRATION_COLUMNS) - 1)
 
 
-def _build_inscritos_sheet(workbook, regs) -> None:
-    ws = workbook.create_sheet("Inscritos")
-    ws.append(REGISTRATION_COLUMNS)
-    _style_header_row(ws, 1)
+def _build_pagamentos_sheet(ws, styles, by_pay: dict, by_inst: dict) -> None:
+    _set_widths(ws, {"A": 20, "B": 10, "D": 14, "E": 10})
 
-    for r in regs:
-        ws.append([
-            r.id,
-            r.full_name,
-            r.cpf,
-            r.phone,
-            r.iap_local,
-            "Ônibus" if r.transport == "onibus" else "Carro",
-            r.lot_name,
-            _money_from_cents(r.lot_value_cents),
-            "Pix" if r.payment_type == "pix" else "Crédito",
-            int(r.installments or 1),
-            r.status,
-            _safe_text(r.status_message),
-            _yn(r.has_kids_u5),
-            _safe_text(r.kids_u5_names),
-            r.age if r.age is not None else "",
-            _yn(r.is_church_member),
-            _yn(r.agree_no_refund),
-            ("SIM" if r.proof_file_path else "NÃO") if r.payment_type == "pix" else "N/A",
-            _fmt_dt(r.proof_uploaded_at) if r.payment_type == "pix" else "",
-            r.reviewed_by_user_id or "",
-            _fmt_dt(r.reviewed_at),
-            _safe_text(r.review_note),
-            _fmt_dt(r.created_at),
-            _fmt_dt(r.updated_at),
-        ])
-
-    # formata coluna de dinheiro
-    for row in range(2, ws.max_row + 1):
-        ws[f"H{row}"].number_format = "0.00"
+    # constant_memory: escreve linha por linha, as duas tabelas lado a lado juntas
+    # (tipo em A:B, parcelas em D:E, com o título "Parcelas" na linha 1)
+    pay_rows = [["Tipo", "Qtd"], ["Pix", by_pay.get("Pix", 0)], ["Crédito", by_pay.get("Crédito", 0)]]
+    inst_rows = [["Parcelas", "Qtd"]] + [list(pair) for pair in _sort_count_dict(by_inst)]
 
-    _set_widths(ws, REGISTRATION_COLUMN_WIDTHS)
-    _apply_table_style(ws, 1, 1, ws.max_row, ws.max_column, freeze_panes="A2", auto_filter=True)
-
-
-def _build_pagamentos_sheet(workbook, by_pay: dict, by_inst: dict) -> None:
-    ws = workbook.create_sheet("Pagamentos")
-    ws.append(["Tipo", "Qtd"])
-    ws.append(["Pix", by_pay.get("Pix", 0)])
-    ws.append(["Crédito", by_pay.get("Crédito", 0)])
-    _style_header_row(ws, 1)
-    _apply_table_style(ws, 1, 1, ws.max_row, 2, freeze_panes="A2", auto_filter=False)
-    _set_widths(ws, {"A": 20, "B": 10})
-
-    # tabela por parcelas
-    ws["D1"] = "Parcelas"
-    ws["D1"].font = SECTION_FONT
-
-    ws.cell(row=2, column=4, value="Parcelas").font = HEADER_FONT
-    ws.cell(row=2, column=5, value="Qtd").font = HEADER_FONT
-    ws.cell(row=2, column=4).fill = HEADER_FILL
-    ws.cell(row=2, column=5).fill = HEADER_FILL
-    ws.cell(row=2, column=4).border = BORDER
-    ws.cell(row=2, column=5).border = BORDER
-
-    row = 3
-    for key, value in _sort_count_dict(by_inst):
-        ws.cell(row=row, column=4, value=key).border = BORDER
-        ws.cell(row=row, column=5, value=value).border = BORDER
-        row += 1
+    for row in range(max(len(pay_rows), len(inst_rows) + 1)):
+        if row < len(pay_rows):
+            ws.write_row(row, 0, pay_rows[row], styles.header if row == 0 else styles.cell)
+        if row == 0:
+            ws.write(0, 3, "Parcelas", styles.section)
+        elif row - 1 < len(inst_rows):
+            ws.write_row(row, 3, inst_rows[row - 1], styles.header if row == 1 else styles.bordered)
 
-    _set_widths(ws, {"D": 14, "E": 10})
+    ws.freeze_panes(1, 0)
 
 
 # ===== entrypoint =====
 
-def build_registrations_workbook(*, status: str = "", payment_type: str = "", date_from: str = "", date_to: str = "") -> BytesIO:
-    regs = _query_registrations(status, payment_type, date_from, date_to)
-
-    by_status = _count_by(regs, lambda r: _safe_text(r.status))
-    by_pay = _count_by(regs, lambda r: "Pix" if r.payment_type == "pix" else "Crédito")
-    by_inst = _count_by(regs, lambda r: f"{int(r.installments or 1)}x")
-    by_kids = _count_by(regs, lambda r: "SIM" if r.has_kids_u5 else "NÃO")
-    by_transport = _count_by(regs, lambda r: "Ônibus" if r.transport == "onibus" else "Carro")
-    by_proof = _count_by(
-        [r for r in regs if r.payment_type == "pix"],
-        lambda r: "SIM" if r.proof_file_path else "NÃO",
+def build_registrations_workbook(*, status: str = "", payment_type: str = "", date_from: str = "", date_to: str = ""):
+    """
+    Monta o .xlsx num arquivo temporário em disco e devolve o arquivo aberto, no
+    começo -- quem chama manda pro send_file, que lê em pedaços e fecha no fim (o
+    arquivo temporário some ao fechar).
+    """
+    output = tempfile.TemporaryFile()
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    styles = _Styles(workbook)
+
+    # abas criadas já na ordem final do arquivo
+    resumo = workbook.add_worksheet("Resumo")
+    inscritos = workbook.add_worksheet("Inscritos")
+    status_ws = workbook.add_worksheet("Status")
+    pagamentos = workbook.add_worksheet("Pagamentos")
+    kids = workbook.add_worksheet("Kids U5")
+    iap = workbook.add_worksheet("IAP")
+    lotes = workbook.add_worksheet("Lotes")
+    transporte = workbook.add_worksheet("Transporte")
+
+    summary = registration_summary(status=status, payment_type=payment_type, date_from=date_from, date_to=date_to)
+
+    _build_resumo_sheet(
+        resumo, styles, summary["total"], _describe_filters(status, payment_type, date_from, date_to),
+        summary["by_status"], summary["by_pay"], summary["by_kids"], summary["by_proof"],
     )
-    by_iap = _count_by(regs, lambda r: _safe_text(r.iap_local) or "—")
-    by_lot = _count_by(regs, lambda r: _safe_text(r.lot_name) or "—")
-
-    workbook = Workbook()
-    workbook.remove(workbook.active)
-
-    _build_resumo_sheet(workbook, regs, _describe_filters(status, payment_type, date_from, date_to), by_status, by_pay, by_kids, by_proof)
-    _build_inscritos_sheet(workbook, regs)
-    _make_count_sheet(workbook, "Status", _sort_count_dict(by_status), "Status", "Qtd")
-    _build_pagamentos_sheet(workbook, by_pay, by_inst)
-    _make_count_sheet(workbook, "Kids U5", _sort_count_dict(by_kids), "Tem filhos até 5?", "Qtd")
-    _make_count_sheet(workbook, "IAP", _sort_count_dict(by_iap), "IAP", "Qtd")
-    _make_count_sheet(workbook, "Lotes", _sort_count_dict(by_lot), "Lote", "Qtd")
-    _make_count_sheet(workbook, "Transporte", _sort_count_dict(by_transport), "Transporte", "Qtd")
-
-    output = BytesIO()
-    workbook.save(output)
+    _build_inscritos_sheet(inscritos, styles, _query_registrations(status, payment_type, date_from, date_to))
+    _make_count_sheet(status_ws, styles, _sort_count_dict(summary["by_status"]), "Status", "Qtd")
+    _build_pagamentos_sheet(pagamentos, styles, summary["by_pay"], summary["by_inst"])
+    _make_count_sheet(kids, styles, _sort_count_dict(summary["by_kids"]), "Tem filhos até 5?", "Qtd")
+    _make_count_sheet(iap, styles, _sort_count_dict(summary["by_iap"]), "IAP", "Qtd")
+    _make_count_sheet(lotes, styles, _sort_count_dict(summary["by_lot"]), "Lote", "Qtd")
+    _make_count_sheet(transporte, styles, _sort_count_dict(summary["by_transport"]), "Transporte", "Qtd")
+
+    workbook.close()
     output.seek(0)
     return output
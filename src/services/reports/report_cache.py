@@ -0,0 +1,122 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import func
+
+from src import database
+from src.models import Registration
+
+# Cache em disco dos relatórios gerados (Excel/Parquet). O botão de baixar o Excel é
+# clicado várias vezes seguidas sem nenhuma inscrição mudar no meio -- aí devolve o
+# arquivo já pronto em vez de montar tudo de novo.
+#
+# A chave é (tipo do relatório, filtros normalizados, versão dos dados). A versão é
+# COUNT(*) + MAX(updated_at) de registrations: qualquer inscrição nova, revisada ou
+# apagada muda um dos dois. A mesma chave serve de ETag -- download repetido com o
+# arquivo já no navegador volta 304.
+#
+# Tamanho total limitado a REPORT_CACHE_MAX_BYTES; passando disso, apaga os menos
+# usados (cada acerto renova o mtime do arquivo). Fica no disco local do container:
+# some num redeploy, o que só custa gerar de novo.
+REPORT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "iap-report-cache")
+REPORT_CACHE_MAX_BYTES = 200 * 1024 * 1024
+# arquivo usado há menos que isso não é apagado, mesmo passando do limite: quem acabou
+# de pegar o caminho em cached_report ainda vai abrir pro send_file
+REPORT_CACHE_MIN_AGE_SECONDS = 5 * 60
+
+_locks_guard = threading.Lock()
+_build_locks: dict[str, list] = {}  # chave -> [lock, quantos seguram/esperam]
+
+
+def registrations_data_version() -> str:
+    total, last_update = database.session.query(
+        func.count(Registration.id), func.max(Registration.updated_at)
+    ).one()
+    return f"{total}:{last_update.isoformat() if last_update else '-'}"
+
+
+def _cache_key(kind: str, filters: dict) -> str:
+    parts = [kind, registrations_data_version()] + [f"{name}={filters[name]}" for name in sorted(filters)]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+@contextmanager
+def _build_lock(key: str):
+    # a entrada só sai do dicionário quando ninguém mais segura nem espera esse lock --
+    # tirar antes deixaria quem chegou depois criar outro e montar o mesmo arquivo junto
+    with _locks_guard:
+        entry = _build_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _build_locks[key]
+
+
+def _evict(keep: str) -> None:
+    recent = time.time() - REPORT_CACHE_MIN_AGE_SECONDS
+    entries = []
+    for name in os.listdir(REPORT_CACHE_DIR):
+        if name.endswith(".part"):
+            continue  # outro download ainda escrevendo
+        path = os.path.join(REPORT_CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in sorted(entries):
+        if total <= REPORT_CACHE_MAX_BYTES:
+            break
+        if os.path.basename(path).startswith(keep) or mtime > recent:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def cached_report(kind: str, filters: dict, build, suffix: str) -> tuple[str, str]:
+    """
+    (caminho do arquivo, ETag) do relatório `kind` com esses filtros -- do cache se a
+    versão dos dados não mudou, senão chama `build(**filters)` (que devolve um arquivo
+    aberto, no começo) e guarda o resultado.
+    """
+    os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+    key = _cache_key(kind, filters)
+    path = os.path.join(REPORT_CACHE_DIR, f"{key}{suffix}")
+
+    # um download por vez monta cada chave; quem chega junto espera e pega o pronto
+    with _build_lock(key):
+        if os.path.exists(path):
+            os.utime(path)  # marca como usado agora (LRU)
+            return path, key
+
+        # arquivo temporário próprio: outro worker (o lock é só deste processo) pode
+        # estar montando a mesma chave ao mesmo tempo
+        with tempfile.NamedTemporaryFile(dir=REPORT_CACHE_DIR, prefix=f".{key}-", suffix=".part",
+                                         delete=False) as target:
+            partial = target.name
+            try:
+                with build(**filters) as source:
+                    shutil.copyfileobj(source, target)
+            except BaseException:
+                target.close()
+                os.remove(partial)
+                raise
+        os.replace(partial, path)  # atômico: ninguém lê arquivo pela metade
+
+    _evict(keep=key)
+    return path, key
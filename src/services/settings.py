@@ -1,5 +1,6 @@
 from src import database
 from src.models import AppSetting
+from src.services.portal.chrome import invalidate_site_chrome
 
 FOOTER_ENDERECO_KEY = "PORTAL_FOOTER_ENDERECO"
 FOOTER_TELEFONE_KEY = "PORTAL_FOOTER_TELEFONE"
@@ -34,3 +35,4 @@ def update_footer_settings(endereco: str, telefone: str) -> None:
     set_setting(FOOTER_ENDERECO_KEY, (endereco or "").strip())
     set_setting(FOOTER_TELEFONE_KEY, (telefone or "").strip())
     database.session.commit()
+    invalidate_site_chrome()
@@ -0,0 +1,75 @@
+import contextlib
+import os
+import tempfile
+
+import pytest
+
+# o app lê a configuração do ambiente ao importar `src` -- banco SQLite descartável e
+# credenciais de mentira (o cliente do Supabase só valida o formato, não conecta)
+_DB_DIR = tempfile.mkdtemp(prefix="iap-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["SECRET_KEY"] = "test"
+os.environ["SUPABASE_DB_URL"] = "https://test.supabase.co"
+os.environ["SUPABASE_KEY"] = "eyJhbGciOiJIUzI1NiJ9.e30.test"
+
+
+@pytest.fixture
+def app():
+    from src import app as flask_app
+    from src import database
+
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with flask_app.app_context():
+        database.create_all()
+        yield flask_app
+        database.session.remove()
+        database.drop_all()
+
+
+@pytest.fixture
+def db(app):
+    from src import database
+
+    return database
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_queries(db):
+    """`with count_queries() as queries: ...` -- queries["n"] = comandos SQL executados."""
+    from sqlalchemy import event
+
+    @contextlib.contextmanager
+    def counter():
+        queries = {"n": 0}
+
+        def before(*args):
+            queries["n"] += 1
+
+        event.listen(db.engine, "before_cursor_execute", before)
+        try:
+            yield queries
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before)
+
+    return counter
+
+
+@pytest.fixture
+def login(client):
+    """login(user_id) -- as próximas requisições do `client` vêm desse usuário."""
+    from flask import g
+
+    def login_as(user_id: int):
+        with client.session_transaction() as session:
+            session["_user_id"] = str(user_id)
+            session["_fresh"] = True
+        # o app context do teste fica aberto entre as requisições e o Flask-Login guarda
+        # o usuário carregado em g -- sem isso a próxima ainda veria o anterior
+        g.pop("_login_user", None)
+
+    return login_as
@@ -0,0 +1,66 @@
+from io import BytesIO
+
+import pytest
+from PIL import ExifTags, Image
+
+from src.controllers.b2_utils import get_b2_file_url, get_b2_image_srcset, responsive_key_name, responsive_widths
+from src.services.portal import uploads
+
+
+def _jpeg(width: int, height: int, orientation: int | None = None) -> BytesIO:
+    exif = Image.Exif()
+    if orientation:
+        exif[ExifTags.Base.Orientation] = orientation
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, format="JPEG", exif=exif)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize("size, orientation, expected", [
+    ((800, 600), None, 800),       # menor que o teto: fica como está
+    ((3200, 2400), None, 1600),    # deitada: a largura bate no teto
+    ((1200, 2400), None, 800),     # em pé: quem bate no teto é a altura
+    ((2400, 1200), 6, 800),        # deitada no arquivo, em pé depois do EXIF
+])
+def test_key_carries_the_real_width(size, orientation, expected):
+    with Image.open(_jpeg(*size, orientation)) as header:
+        width = uploads.image_display_width(header, 1600)
+    key_name = responsive_key_name("x", width)
+
+    files = dict(uploads.render_image_set(_jpeg(*size, orientation), key_name, 1600))
+
+    assert width == expected
+    assert Image.open(files[key_name]).width == expected
+    for name, buffer in files.items():
+        if "_w" in name:
+            label = int(name.rsplit("_w", 1)[1].split(".")[0])
+            assert Image.open(buffer).width == label <= expected
+    assert max(responsive_widths(key_name)) == expected
+
+
+def test_save_image_upload_returns_only_after_every_variant(app, monkeypatch):
+    sent = []
+    monkeypatch.setattr(uploads, "upload_to_b2", lambda name, buffer, folder="": sent.append(name) or f"{folder}/{name}")
+
+    key = uploads.save_image_upload(_jpeg(1000, 500), folder="cms/posts")
+
+    assert key.startswith("cms/posts/") and key.endswith("_rs1000.jpg")
+    # tudo que o srcset / <source> WebP vai apontar já está no B2
+    srcset_files = {get_b2_file_url(key).rsplit("/", 1)[1]} | {
+        url.rsplit("/", 1)[1].split(" ")[0]
+        for fmt in ("jpg", "webp") for url in get_b2_image_srcset(key, fmt).split(", ")
+    }
+    assert srcset_files <= set(sent)
+
+
+def test_failed_variant_upload_returns_no_key(app, monkeypatch):
+    def flaky_upload(name, buffer, folder=""):
+        if name.endswith("_w320.webp"):
+            raise ConnectionError("B2 fora do ar")
+        return f"{folder}/{name}"
+
+    monkeypatch.setattr(uploads, "upload_to_b2", flaky_upload)
+
+    with pytest.raises(ConnectionError):
+        uploads.save_image_upload(_jpeg(1000, 500), folder="cms/posts")
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+from src.models import User
+from src.services.pagination import keyset_paginate
+
+
+def _all_pages(per_page: int) -> list[int]:
+    seen, after = [], ""
+    while True:
+        page = keyset_paginate(User.query, User, after=after, per_page=per_page)
+        seen += [user.id for user in page.items]
+        if not page.has_next:
+            return seen
+        after = page.next_cursor
+
+
+def test_listing_command_fills_null_created_at(app, db, monkeypatch):
+    # banco antigo: users.created_at ainda aceita NULL
+    monkeypatch.setattr(User.__table__.c.created_at, "nullable", True)
+    User.__table__.drop(db.engine)
+    User.__table__.create(db.engine)
+    start = datetime(2024, 1, 1)
+    rows = [{"email": f"u{n}@teste.com", "password_hash": "x", "created_at": None if n % 2 else start + timedelta(days=n)}
+            for n in range(7)]
+    db.session.execute(User.__table__.insert(), rows)
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["create_listing_indexes"])
+    db.session.remove()
+
+    assert result.exit_code == 0, result.output
+    assert "users=3" in result.output
+    ids = _all_pages(per_page=2)
+    assert sorted(ids) == [user.id for user in User.query.order_by(User.id)]
+    # as sem data vão pro fim da lista
+    assert [db.session.get(User, user_id).created_at.year for user_id in ids[-3:]] == [2000] * 3
@@ -0,0 +1,19 @@
+from src.models import Author
+from src.services.portal import page_cache
+
+
+def test_cached_page_expires_for_if_modified_since_clients(client, db, monkeypatch):
+    db.session.add(Author(name="Autor"))  # escrita no CMS: cria a versão do conteúdo
+    db.session.commit()
+    now = page_cache.time.time()
+
+    first = client.get("/portal/artigos")
+    assert first.status_code == 200
+    assert first.headers.get("ETag")
+    # só o ETag carrega a janela de tempo -- Last-Modified ficaria parado na data da versão
+    assert "Last-Modified" not in first.headers
+
+    # janela seguinte: cliente que só manda If-Modified-Since também leva a página nova
+    monkeypatch.setattr(page_cache.time, "time", lambda: now + page_cache.PAGE_CACHE_MAX_AGE_SECONDS)
+    later = client.get("/portal/artigos", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert later.status_code == 200
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from src.models import Role, User
+from src.services import perf
+
+
+@pytest.fixture
+def one_second_clock(monkeypatch):
+    """Cada leitura do relógio do perf anda 1s: toda consulta medida leva 1000ms."""
+    ticks = iter(range(1, 10_000))
+    monkeypatch.setattr(perf, "time", SimpleNamespace(perf_counter=lambda: float(next(ticks)), time=perf.time.time))
+
+
+def test_queries_after_a_failed_statement_are_timed(app, db, one_second_clock):
+    with app.test_request_context("/"):
+        perf._start_request()
+
+        with pytest.raises(OperationalError):
+            db.session.execute(text("SELECT * FROM tabela_que_nao_existe"))
+        db.session.rollback()
+        db.session.execute(text("SELECT 1"))
+        db.session.execute(text("SELECT 2"))
+
+        stats = g.perf
+        assert stats["queries"] == 2  # a que falhou não conta
+        assert stats["db_ms"] == 2000.0  # e o início dela não vaza pro tempo das outras
+        assert stats["slowest_ms"] == 1000.0
+        assert stats["slowest_sql"] == "SELECT 1"
+
+
+def test_server_timing_only_for_admins(client, db, login):
+    assert "Server-Timing" not in client.get("/login").headers
+
+    admin = User(email="admin@teste.com", password_hash="x", roles=[Role(name="SUPER", is_super=True)])
+    db.session.add(admin)
+    db.session.commit()
+    login(admin.id)
+
+    assert client.get("/login").headers["Server-Timing"].startswith("db;dur=")
@@ -0,0 +1,73 @@
+import random
+import string
+
+import pytest
+
+from src.controllers.pix_emv import _clean_key, _crc16_ccitt, build_pix_payload, build_pix_payloads_bulk
+from src.services.pix import STATIC_PIX_PAYLOADS
+
+PIX_KEY = "17739576000178"
+MERCHANT_NAME = "CONVENCAO AMAZONICA"
+MERCHANT_CITY = "MANAUS"
+
+# (registration_id, parcelas, valor) -> payload gerado pela implementação anterior (CRC
+# bit a bit); o CRC por tabela e o montador em lote têm que dar exatamente isso
+GOLDEN_DYNAMIC = {
+    (1, 1, "200.09"): "00020126360014br.gov.bcb.pix0114177395760001785204000053039865406200.095802BR5919CONVENCAO AMAZONICA6006MANAUS62080504R1N16304D4DD",
+    (42, 2, "100.09"): "00020126360014br.gov.bcb.pix0114177395760001785204000053039865406100.095802BR5919CONVENCAO AMAZONICA6006MANAUS62090505R42N263040692",
+    (1234, 4, "50.09"): "00020126360014br.gov.bcb.pix011417739576000178520400005303986540550.095802BR5919CONVENCAO AMAZONICA6006MANAUS62110507R1234N46304513E",
+    (7, 1, None): "00020126360014br.gov.bcb.pix0114177395760001785204000053039865802BR5919CONVENCAO AMAZONICA6006MANAUS62080504R7N16304AA69",
+}
+
+
+def _reference_crc16(payload: str) -> str:
+    # a implementação anterior, bit a bit -- referência da tabela
+    crc = 0xFFFF
+    for char in payload:
+        crc ^= ord(char) << 8
+        for _ in range(8):
+            crc = (crc << 1) ^ 0x1021 if crc & 0x8000 else crc << 1
+            crc &= 0xFFFF
+    return f"{crc:04X}"
+
+
+@pytest.mark.parametrize("installments", sorted(STATIC_PIX_PAYLOADS))
+def test_static_payload_crc(installments):
+    # payloads gerados fora daqui (pelo banco): o CRC embutido tem que bater
+    payload = STATIC_PIX_PAYLOADS[installments]
+    assert _crc16_ccitt(payload[:-4]) == payload[-4:]
+
+
+def test_crc_table_matches_bitwise_reference():
+    rng = random.Random(42)
+    for _ in range(500):
+        text = "".join(rng.choices(string.printable, k=rng.randint(0, 200)))
+        assert _crc16_ccitt(text) == _reference_crc16(text)
+        assert _crc16_ccitt(text.encode()) == _reference_crc16(text)
+
+
+@pytest.mark.parametrize(("key", "expected"), list(GOLDEN_DYNAMIC.items()))
+def test_dynamic_payload_unchanged(key, expected):
+    reg_id, installments, amount = key
+    payload = build_pix_payload(PIX_KEY, MERCHANT_NAME, MERCHANT_CITY, amount, f"R{reg_id}N{installments}")
+    assert payload == expected
+
+
+def test_bulk_matches_one_by_one():
+    items = [(amount, f"R{reg_id}N{installments}") for reg_id, installments, amount in GOLDEN_DYNAMIC]
+    assert build_pix_payloads_bulk(items, PIX_KEY, MERCHANT_NAME, MERCHANT_CITY) == list(GOLDEN_DYNAMIC.values())
+    assert build_pix_payloads_bulk([], PIX_KEY, MERCHANT_NAME, MERCHANT_CITY) == []
+
+
+@pytest.mark.parametrize(("key", "expected"), [
+    ("17739576000178", "17739576000178"),
+    ("17.739.576/0001-78", "17739576000178"),
+    ("123.456.789-09", "12345678909"),
+    (" 123.456.789-09 ", "12345678909"),
+    # antes tudo virava só dígitos: e-mail sumia, telefone perdia o +
+    ("convencaoamazonica@gmail.com", "convencaoamazonica@gmail.com"),
+    ("+5592999990000", "+5592999990000"),
+    ("123e4567-e89b-12d3-a456-426614174000", "123e4567-e89b-12d3-a456-426614174000"),
+])
+def test_clean_key(key, expected):
+    assert _clean_key(key) == expected
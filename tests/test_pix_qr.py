@@ -0,0 +1,40 @@
+from src.models import Registration, User
+
+
+def _registered_user(db, n: int, lot_value_cents: int = 20000) -> User:
+    user = User(email=f"qr{n}@teste.com", password_hash="x")
+    db.session.add(Registration(
+        user=user, full_name=f"Pessoa {n}", cpf=f"qr-{n}", phone="92999990000", iap_local="IAP",
+        transport="onibus", payment_type="pix", installments=2, lot_value_cents=lot_value_cents,
+    ))
+    db.session.commit()
+    return user
+
+
+def test_qr_is_revalidated_and_never_reused_across_users(client, db, login):
+    first, second = _registered_user(db, 1), _registered_user(db, 2)
+
+    login(first.id)
+    response = client.get("/pix/qr/2")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    etag = response.headers["ETag"]
+    assert client.get("/pix/qr/2", headers={"If-None-Match": etag}).status_code == 304
+
+    # mesmo navegador, outra pessoa logada: a cópia guardada não serve
+    login(second.id)
+    other = client.get("/pix/qr/2", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["ETag"] != etag
+    assert other.data != response.data
+
+
+def test_qr_etag_follows_lot_value(client, db, login):
+    user = _registered_user(db, 1)
+    login(user.id)
+    etag = client.get("/pix/qr/1").headers["ETag"]
+
+    user.registration.lot_value_cents = 18000
+    db.session.commit()
+
+    assert client.get("/pix/qr/1", headers={"If-None-Match": etag}).status_code == 200
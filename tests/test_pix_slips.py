@@ -0,0 +1,58 @@
+import pytest
+
+from src.models import Registration, Role, User
+from src.services.reports import pix_slips
+
+
+def _admin(db) -> User:
+    admin = User(email="admin@teste.com", password_hash="x", roles=[Role(name="SUPER", is_super=True)])
+    db.session.add(admin)
+    for n in range(5):
+        db.session.add(Registration(
+            user=User(email=f"boleto{n}@teste.com", password_hash="x"), full_name=f"Pessoa {n}", cpf=f"b-{n}",
+            phone="92999990000", iap_local="IAP", transport="onibus", payment_type="pix", installments=2,
+            lot_value_cents=20000,
+        ))
+    db.session.commit()
+    return admin
+
+
+@pytest.fixture
+def slip_pool(monkeypatch):
+    # vários pedaços, mais de um processo: o download passa pelo pool de verdade
+    monkeypatch.setattr(pix_slips, "SLIP_CHUNK_SIZE", 2)
+    monkeypatch.setattr(pix_slips, "SLIP_WORKERS", 2)
+    monkeypatch.setattr(pix_slips, "_pool", None)
+    yield
+    if pix_slips._pool is not None:
+        pix_slips._pool.shutdown(cancel_futures=True)
+
+
+def test_admin_slips_stream_from_a_reused_pool_without_fork(client, db, login, slip_pool):
+    login(_admin(db).id)
+
+    response = client.get("/admin/boletos-pix.pdf")
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.data.startswith(b"%PDF-") and response.data.rstrip().endswith(b"%%EOF")
+    assert response.data.count(b"/Type /Page ") == 2  # 5 boletos, 4 por folha
+
+    pool = pix_slips._pool
+    assert pool._mp_context.get_start_method() != "fork"
+    assert client.get("/admin/boletos-pix.zip").status_code == 200
+    assert pix_slips._pool is pool  # o segundo download usa o mesmo pool
+
+
+def test_failed_slips_build_is_shown_to_the_admin(client, db, login, slip_pool, monkeypatch):
+    class BrokenPool:
+        def submit(self, *args):
+            raise RuntimeError("pool não subiu")
+
+    monkeypatch.setattr(pix_slips, "_slip_pool", BrokenPool)
+    login(_admin(db).id)
+
+    response = client.get("/admin/boletos-pix.pdf")
+
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        assert ("danger", "Não foi possível gerar os boletos agora. Tente de novo em instantes.") in session["_flashes"]
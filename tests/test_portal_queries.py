@@ -0,0 +1,95 @@
+import pytest
+
+from src.models import Author, Ministry, Post, Registration, Tag, User
+from src.services.portal.chrome import invalidate_site_chrome
+
+# As listagens do portal carregam autor/tags/ministério/quem publicou com
+# POST_CARD_LOAD_OPTIONS / POST_DETAIL_LOAD_OPTIONS (services/portal/posts.py): o número
+# de consultas de uma página não pode crescer com o número de posts, tags ou autores.
+
+
+def _add_posts(db, count: int, tags_per_post: int = 2, prefix: str = "p"):
+    posts = []
+    for i in range(count):
+        user = User(email=f"{prefix}{i}@teste.com", password_hash="x")
+        db.session.add(Registration(
+            user=user, full_name=f"Fulano {prefix}{i}", cpf=f"{prefix}-{i}", phone="92999990000",
+            iap_local="IAP", transport="onibus", payment_type="pix", installments=1,
+        ))
+        post = Post(
+            title=f"Post {prefix}{i}", slug=f"post-{prefix}{i}", body="<p>x</p>",
+            author=Author(name=f"Autor {prefix}{i}"), created_by=user,
+            tags=[Tag(name=f"{prefix}{i}-t{j}", slug=f"{prefix}{i}-t{j}") for j in range(tags_per_post)],
+            ministries=[Ministry(name=f"Ministério {prefix}{i}", slug=f"ministerio-{prefix}{i}")],
+        )
+        db.session.add(post)
+        posts.append(post)
+    db.session.commit()
+    return posts
+
+
+def _warm_up(client, db):
+    # primeira página do processo monta caches que não dependem dos posts (topo,
+    # configurações) -- fica fora da conta. Outra URL: a medida tem que ser um render de
+    # verdade, não o cache de página
+    _add_posts(db, 1, prefix="w")
+    assert client.get("/portal/ministerios").status_code == 200
+
+
+def _queries_for(client, count_queries, url: str) -> int:
+    # escrita no CMS já invalida o cache de página; o topo/rodapé é cache à parte
+    invalidate_site_chrome()
+    with count_queries() as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return queries["n"]
+
+
+@pytest.mark.parametrize("url", ["/portal/artigos", "/portal"])
+def test_listing_query_count_does_not_grow_with_posts(client, db, count_queries, url):
+    _warm_up(client, db)
+
+    _add_posts(db, 1, prefix="a")
+    few = _queries_for(client, count_queries, url)
+
+    _add_posts(db, 11, tags_per_post=4, prefix="b")  # página cheia: 12 cards
+    many = _queries_for(client, count_queries, url)
+
+    assert many == few
+
+
+def test_tag_page_query_count_does_not_grow_with_posts(client, db, count_queries):
+    shared = Tag(name="Compartilhada", slug="compartilhada")
+    for post in _add_posts(db, 2, prefix="a"):
+        post.tags.append(shared)
+    db.session.commit()
+    _warm_up(client, db)
+    few = _queries_for(client, count_queries, "/portal/tags/compartilhada")
+
+    for post in _add_posts(db, 10, tags_per_post=3, prefix="b"):
+        post.tags.append(shared)
+    db.session.commit()
+    many = _queries_for(client, count_queries, "/portal/tags/compartilhada")
+
+    assert many == few
+
+
+def test_post_detail_query_count_does_not_grow_with_related_posts(client, db, count_queries):
+    shared = Tag(name="Compartilhada", slug="compartilhada")
+    [post] = _add_posts(db, 1, prefix="alvo")
+    post.tags.append(shared)
+    for other in _add_posts(db, 1, prefix="a"):
+        other.tags.append(shared)
+    db.session.commit()
+    url = f"/portal/artigos/{post.slug}"
+    _warm_up(client, db)
+    few = _queries_for(client, count_queries, url)
+
+    # mais tags no post, 4 relacionados e 4 recentes, cada um com autor/tags próprios
+    post.tags.extend(Tag(name=f"extra{j}", slug=f"extra{j}") for j in range(5))
+    for other in _add_posts(db, 8, tags_per_post=3, prefix="b"):
+        other.tags.append(shared)
+    db.session.commit()
+    many = _queries_for(client, count_queries, url)
+
+    assert many == few
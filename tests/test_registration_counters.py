@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from src.models import Registration, RegistrationCounter, User
+from src.services import registration as registration_service
+from src.services.registration import (
+    STATUS_AGUARDANDO,
+    STATUS_CONFIRMADA,
+    _count_kpis,
+    attach_registration_proof,
+    bulk_review_registrations,
+    create_registration,
+    get_kpis,
+    rebuild_registration_counters,
+    review_registration,
+)
+
+
+@pytest.fixture(autouse=True)
+def _forget_counters_table(monkeypatch):
+    # cada teste recria o banco: o "a tabela existe" guardado no processo não vale
+    monkeypatch.setattr(registration_service, "_counters_table_seen", False)
+
+
+def _form(n: int, payment_type: str = "pix"):
+    values = {
+        "email": f"pessoa{n}@teste.com", "password": "12345678", "full_name": f"Pessoa {n}",
+        "cpf": f"000.000.000-{n:02d}", "phone": "(92) 99999-0000", "iap_local": "IAP Centro",
+        "transport": "onibus", "payment_type": payment_type, "installments": "1", "age": 30,
+        "has_kids_u5": "nao", "kids_u5_names": "", "is_church_member": "sim", "agree_no_refund": True,
+    }
+    return SimpleNamespace(**{name: SimpleNamespace(data=value) for name, value in values.items()})
+
+
+@pytest.fixture
+def without_counters_table(db):
+    RegistrationCounter.__table__.drop(db.engine)
+    yield
+    RegistrationCounter.__table__.create(db.engine)
+
+
+def test_create_registration_without_counters_table(db, without_counters_table):
+    create_registration(_form(1))
+    db.session.remove()
+
+    assert User.query.count() == 1
+    assert Registration.query.count() == 1
+    assert get_kpis() == _count_kpis()
+
+
+def test_bulk_review_without_counters_table(db, monkeypatch):
+    ids = [create_registration(_form(n))[1].id for n in range(3)]
+    RegistrationCounter.__table__.drop(db.engine)
+    monkeypatch.setattr(registration_service, "_counters_table_seen", False)
+
+    results = bulk_review_registrations(ids, STATUS_CONFIRMADA, "", reviewer_id=None)
+    db.session.remove()
+
+    assert results == {reg_id: "updated" for reg_id in ids}
+    assert {r.status for r in Registration.query.all()} == {STATUS_CONFIRMADA}
+    RegistrationCounter.__table__.create(db.engine)
+
+
+def test_counters_follow_writes_after_rebuild_without_restart(db):
+    # tabela existe mas vazia (contadores desligados): escrever não pode falhar
+    first = create_registration(_form(1))[1]
+    assert get_kpis() == _count_kpis()
+
+    rebuild_registration_counters()
+    # mesmo processo, logo depois do rebuild: as escritas já entram nos contadores
+    second = create_registration(_form(2))[1]
+    review_registration(first, STATUS_CONFIRMADA, "", reviewer_id=None)
+    bulk_review_registrations([second.id], STATUS_CONFIRMADA, "", reviewer_id=None)
+    create_registration(_form(3, payment_type="credito"))
+
+    counters = {c.key: c.value for c in RegistrationCounter.query.all()}
+    assert counters == _count_kpis()
+    assert counters["confirmadas"] == 2
+    assert counters["aguardando"] == 1
+    assert Registration.query.filter_by(status=STATUS_AGUARDANDO).count() == 1
+
+
+def test_first_rebuild_writes_counters_before_counting(db):
+    # tabela vazia na primeira vez: sem escrever antes, nada segura quem cria inscrição
+    # entre a contagem e a gravação (e o +1 dele se perde)
+    create_registration(_form(1))
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(" ".join(statement.split()))
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        rebuild_registration_counters()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    first_write = next(i for i, sql in enumerate(statements)
+                       if sql.startswith(("INSERT INTO registration_counters", "UPDATE registration_counters")))
+    count = next(i for i, sql in enumerate(statements) if "FROM registrations" in sql)
+    assert first_write < count
+    assert {c.key: c.value for c in RegistrationCounter.query.all()} == _count_kpis()
+
+
+def test_empty_proof_path_counts_the_same_in_rebuild_and_deltas(db):
+    registration = create_registration(_form(1))[1]
+    registration.proof_file_path = ""
+    db.session.commit()
+    rebuild_registration_counters()
+
+    attach_registration_proof(registration, "comprovantes/1/a.jpg")
+
+    assert get_kpis() == _count_kpis()
+    assert get_kpis()["pendentes_comprovante"] == 1
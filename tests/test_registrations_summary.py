@@ -0,0 +1,14 @@
+from src.models import Registration, User
+from src.services.reports.registrations_summary import registration_summary
+
+
+def test_empty_proof_path_counts_as_no_proof(db):
+    for n, proof in enumerate([None, "", "comprovantes/1/a.jpg"]):
+        db.session.add(Registration(
+            user=User(email=f"resumo{n}@teste.com", password_hash="x"), full_name=f"Pessoa {n}", cpf=f"r-{n}",
+            phone="92999990000", iap_local="IAP", transport="onibus", payment_type="pix", installments=1,
+            proof_file_path=proof,
+        ))
+    db.session.commit()
+
+    assert registration_summary()["by_proof"] == {"NÃO": 2, "SIM": 1}
@@ -0,0 +1,61 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+
+from src.services.reports import report_cache
+
+
+def test_concurrent_downloads_build_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_cache, "REPORT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(report_cache, "_cache_key", lambda kind, filters: "chave")
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.05)  # segura o lock enquanto os outros chegam
+        return io.BytesIO(b"relatorio")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(report_cache.cached_report("excel", {}, build, ".xlsx")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert {path for path, _ in results} == {str(tmp_path / "chave.xlsx")}
+    assert os.listdir(tmp_path) == ["chave.xlsx"]
+    assert report_cache._build_locks == {}
+
+
+def test_failed_build_leaves_no_partial_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_cache, "REPORT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(report_cache, "_cache_key", lambda kind, filters: "chave")
+
+    class Broken(io.RawIOBase):
+        def readinto(self, buffer):
+            raise OSError("disco cheio")
+
+    with pytest.raises(OSError):
+        report_cache.cached_report("excel", {}, Broken, ".xlsx")
+
+    assert os.listdir(tmp_path) == []
+    assert report_cache._build_locks == {}
+
+
+def test_eviction_spares_files_just_handed_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_cache, "REPORT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(report_cache, "REPORT_CACHE_MAX_BYTES", 10)
+    old = time.time() - report_cache.REPORT_CACHE_MIN_AGE_SECONDS - 60
+    for name in ("antigo.xlsx", "recente.xlsx", "novo.xlsx"):
+        (tmp_path / name).write_bytes(b"x" * 10)
+    os.utime(tmp_path / "antigo.xlsx", (old, old))
+
+    # "recente" acabou de sair de um cached_report e ainda vai pro send_file
+    report_cache._evict(keep="novo")
+
+    assert sorted(os.listdir(tmp_path)) == ["novo.xlsx", "recente.xlsx"]
@@ -0,0 +1,53 @@
+import time
+from io import BytesIO
+
+import pytest
+
+from src.services.portal import upload_jobs
+
+
+@pytest.fixture(autouse=True)
+def _empty_registry(monkeypatch):
+    monkeypatch.setattr(upload_jobs, "_jobs", {})
+
+
+def _job(job_id: str, status: str, age: float, finished_age: float | None = None) -> dict:
+    now = time.time()
+    return {"id": job_id, "key": f"cms/{job_id}.jpg", "status": status, "error": None,
+            "created_at": now - age, "finished_at": None if finished_age is None else now - finished_age}
+
+
+def test_prune_keeps_unfinished_jobs():
+    old = upload_jobs.UPLOAD_JOB_TTL_SECONDS + 60
+    for job in (
+        _job("na-fila", upload_jobs.STATUS_PENDING, old),
+        _job("rodando", upload_jobs.STATUS_RUNNING, old),
+        _job("pronto-antigo", upload_jobs.STATUS_DONE, old * 2, finished_age=old),
+        _job("falhou-antigo", upload_jobs.STATUS_FAILED, old * 2, finished_age=old),
+        _job("pronto-agora", upload_jobs.STATUS_DONE, old, finished_age=1),
+    ):
+        upload_jobs._jobs[job["id"]] = job
+
+    upload_jobs._prune_finished_jobs()
+
+    assert set(upload_jobs._jobs) == {"na-fila", "rodando", "pronto-agora"}
+
+
+def test_failed_upload_is_not_retried_on_top_of_b2_utils(app, monkeypatch):
+    calls = []
+
+    def failing_upload(name, buffer, folder=""):
+        calls.append(name)
+        raise ConnectionError("B2 fora do ar")
+
+    monkeypatch.setattr(upload_jobs, "upload_to_b2", failing_upload)
+    monkeypatch.setattr(upload_jobs, "_record_failure", lambda job_id, key, exc: upload_jobs._set_job(
+        job_id, status=upload_jobs.STATUS_FAILED, error=str(exc)))
+    upload_jobs._jobs["j"] = _job("j", upload_jobs.STATUS_PENDING, 0)
+
+    upload_jobs._run_job("j", lambda: [("a.jpg", BytesIO(b"x")), ("b.webp", BytesIO(b"y"))], "a.jpg", "cms", None)
+
+    assert calls == ["a.jpg"]
+    job = upload_jobs.get_job("j")
+    assert job["status"] == upload_jobs.STATUS_FAILED
+    assert job["finished_at"] is not None